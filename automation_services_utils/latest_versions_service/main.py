@@ -1,169 +1,105 @@
 # Importing flask module in the project is mandatory
 # An object of Flask class is our WSGI application.
 import json
-import os
 
 from flask import Flask, request
 
 # Flask constructor takes the name of
 # current module (__name__) as argument.
 from component_type_enum import ComponentTypeEnum
+from versions_catalog import ContentCatalog, VersionsCatalog
 
 app = Flask(__name__)
 
 
-def update_dict_only_if_key_does_not_exist(dictionary: dict, key, value):
-    if key not in dictionary.keys():
-        dictionary[key] = value
-
-
-def append_value_to_list_if_dict_value_is_list(dictionary: dict, key, value, max_list_size: int = 1):
-    if key not in dictionary.keys():
-        dictionary[key] = [value]
-
-    else:
-        tmp_list = dictionary.get(key)
-        if len(tmp_list) < max_list_size:
-            tmp_list.append(value)
-
-
-def filter_versions_above_build(build_threshold, versions_list):
-    to_remove = []
-    for i in range(len(versions_list)):
-        curr_build = versions_list[i].split('.')[-1]
-        if int(curr_build) > int(build_threshold):
-            to_remove.append(versions_list[i])
-
-    filtered = list(set(versions_list) - set(to_remove))
-    return filtered
-
-
-def get_latest_versions_according_to_versions_path_as_dict(versions_path: str,
-                                                           base_version: str,
-                                                           component_type: ComponentTypeEnum,
-                                                           ignore_versions_above_threshold: int = None,
-                                                           num_build_to_return_per_component: int = 1):
-    all_dirs_in_version = os.listdir(versions_path)
-    filtered_dirs = [x for x in all_dirs_in_version if base_version in x]
-
-    if ignore_versions_above_threshold is not None:
-        filtered_dirs = filter_versions_above_build(build_threshold=ignore_versions_above_threshold,
-                                                    versions_list=filtered_dirs)
-
-    if len(filtered_dirs) == 0:
-        return {}
-
-    sorted_filtered_dirs = sorted(filtered_dirs, key=lambda x: [int(i) if i.isdigit() else i for i in x.split('.')])
-    sorted_filtered_dirs.reverse()
-    print(sorted_filtered_dirs)
-
-    all_versions_dict = {}
-    for version in sorted_filtered_dirs:
-        version_content_path = fr'{versions_path}\{version}'
-
-        files_in_dir = os.listdir(version_content_path)
-        if versions_path == r'X:':
-
-            if f'FortiEDR_{version}.iso' in files_in_dir:
-                if component_type == ComponentTypeEnum.MANAGER:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='management',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if component_type == ComponentTypeEnum.AGGREGATOR:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='aggregator',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if component_type == ComponentTypeEnum.CORE:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='core',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-            if component_type == ComponentTypeEnum.WINDOWS_COLLECTOR:
-                if f'FortiEDRCollectorInstaller32_{version}.msi' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='windows_32_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller64_{version}.msi' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='windows_64_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
+versions_catalog = VersionsCatalog(
+    versions_path=r'X:',
+    artifacts={
+        'management': (ComponentTypeEnum.MANAGER, 'FortiEDR_{version}.iso'),
+        'aggregator': (ComponentTypeEnum.AGGREGATOR, 'FortiEDR_{version}.iso'),
+        'core': (ComponentTypeEnum.CORE, 'FortiEDR_{version}.iso'),
+        'windows_32_collector': (ComponentTypeEnum.WINDOWS_COLLECTOR, 'FortiEDRCollectorInstaller32_{version}.msi'),
+        'windows_64_collector': (ComponentTypeEnum.WINDOWS_COLLECTOR, 'FortiEDRCollectorInstaller64_{version}.msi')
+    })
+
+linux_collectors_versions_catalog = VersionsCatalog(
+    versions_path=r'X:\linux-collector',
+    artifacts={
+        'amazonlinux': (ComponentTypeEnum.LINUX_COLLECTOR,
+                        'FortiEDRCollectorInstaller_amazonlinux-{version}.x86_64.rpm'),
+        'centos_6_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_CentOS6-{version}.x86_64.rpm'),
+        'centos_7_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_CentOS7-{version}.x86_64.rpm'),
+        'centos_8_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_CentOS8-{version}.x86_64.rpm'),
+        'openSUSE_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_openSUSE-{version}.x86_64.rpm'),
+        'oracle_7_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_Oracle7-{version}.x86_64.rpm'),
+        'oracle_8_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                               'FortiEDRCollectorInstaller_Oracle8-{version}.x86_64.rpm'),
+        'ubuntu_16_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                                'FortiEDRCollectorInstaller_Ubuntu16.04-{version}.deb'),
+        'ubuntu_18_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                                'FortiEDRCollectorInstaller_Ubuntu18.04-{version}.deb'),
+        'ubuntu_20_collector': (ComponentTypeEnum.LINUX_COLLECTOR,
+                                'FortiEDRCollectorInstaller_Ubuntu20.04-{version}.deb')
+    })
+
+content_catalog = ContentCatalog(content_path=r'X:\Collector_Content')
+
+
+def start_catalogs():
+    """ Build the catalogs (only on the first call) and refresh them in background """
+    versions_catalog.start()
+    linux_collectors_versions_catalog.start()
+    content_catalog.start()
+
+
+def create_conditional_json_response(content):
+    """
+    Response with ETag of the content, answered with 304 (without body) if the client already has this content
+    (If-None-Match)
+    """
+    response = app.response_class(
+        response=json.dumps(content),
+        status=200,
+        mimetype='application/json'
+    )
+    response.add_etag()
+    return response.make_conditional(request)
 
-        elif versions_path == r'X:\linux-collector':
-            if component_type == ComponentTypeEnum.LINUX_COLLECTOR:
-                if f'FortiEDRCollectorInstaller_amazonlinux-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='amazonlinux',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
 
-                if f'FortiEDRCollectorInstaller_CentOS6-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='centos_6_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
+@app.route('/list_content', methods=['GET'])
+def list_content():
+    num_last_content_files = int(request.args.get('num_last_content_files'))
+    start_catalogs()
 
-                if f'FortiEDRCollectorInstaller_CentOS7-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='centos_7_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
+    return create_conditional_json_response(
+        content=content_catalog.get_latest_content_files(num_content_files=num_last_content_files))
 
-                if f'FortiEDRCollectorInstaller_CentOS8-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='centos_8_collector',
-                                                               value=version)
-
-                if f'FortiEDRCollectorInstaller_openSUSE-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='openSUSE_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller_Oracle7-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='oracle_7_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller_Oracle8-{version}.x86_64.rpm' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='oracle_8_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller_Ubuntu16.04-{version}.deb' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='ubuntu_16_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller_Ubuntu18.04-{version}.deb' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='ubuntu_18_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-                if f'FortiEDRCollectorInstaller_Ubuntu20.04-{version}.deb' in files_in_dir:
-                    append_value_to_list_if_dict_value_is_list(dictionary=all_versions_dict, key='ubuntu_20_collector',
-                                                               value=version,
-                                                               max_list_size=num_build_to_return_per_component)
-
-    return all_versions_dict
 
+@app.route('/content_file_exists', methods=['GET'])
+def content_file_exists():
+    content_file_name = request.args.get('content_file_name', '')
+    start_catalogs()
 
-@app.route('/list_content', methods=['GET'])
-def list_content():
-    num_last_content_files = int(request.args.get('num_last_content_files'))
-    all_dirs_in_version = os.listdir(r'X:\Collector_Content')
-    filtered_nslo = [x for x in all_dirs_in_version if 'FortiEDRCollectorContent' in x and 'nslo' in x and 'tmp' not in x]
-    # filtered_json = [x for x in all_dirs_in_version if 'FortiEDRCollectorContent' in x and 'json' in x and 'tmp' not in x]
+    return create_conditional_json_response(
+        content={
+            'content_file_name': content_file_name,
+            'exists': content_catalog.is_content_file_exist(content_file_name=content_file_name)
+        })
 
-    filtered_nslo.sort(key=lambda o: int(o.split('FortiEDRCollectorContent-')[1].split('.nslo')[0]))
-    filtered_nslo.reverse()
 
-    # filtered_json.sort(key=lambda o: int(o.split('FortiEDRCollectorContent-')[1].split('.json')[0]))
-    # filtered_json.reverse()
+@app.route('/build_components', methods=['GET'])
+def build_components():
+    version = request.args.get('version', '')
+    start_catalogs()
 
-    response = app.response_class(
-        response=json.dumps(filtered_nslo[:num_last_content_files]),
-        status=200,
-        mimetype='application/json'
-    )
-    return response
+    components = versions_catalog.get_build_components(version=version) + \
+        linux_collectors_versions_catalog.get_build_components(version=version)
+    return create_conditional_json_response(content={'version': version, 'components': components})
 
 
 # The route() function of the Flask class is a decorator,
@@ -173,8 +109,9 @@ def list_content():
 def latest_build():
     base_version = request.args.get('base_version')
     num_builds = int(request.args.get('num_builds'))
+    start_catalogs()
 
-    if base_version is None or base_version.count('.') != 2 or not os.path.exists('X:'):
+    if base_version is None or base_version.count('.') != 2 or not versions_catalog.is_available:
 
         error_message = 'Invalid request'
 
@@ -185,14 +122,14 @@ def latest_build():
         elif base_version.count('.') != 2:
             error_message = 'invalid format for base version, use the following template 5.2.0 for example'
 
-        elif not os.path.exists('X:'):
+        elif not versions_catalog.is_available:
             error_message = r'\\ens-fs01.ensilo.local\Versions is not mounted on the server that the service running ' \
                             r'on, can not extract the versions'
 
         message = {
             'message': error_message
         }
-        app.response_class(
+        return app.response_class(
             response=json.dumps(message),
             status=404,
             mimetype='application/json'
@@ -216,46 +153,29 @@ def latest_build():
         # ignore_win_collector_above_threshold = 2050
         # ignore_linux_collector_above_threshold = 2050
 
-    versions_dict.update(get_latest_versions_according_to_versions_path_as_dict(versions_path=r'X:',
-                                                                                base_version=base_version,
-                                                                                ignore_versions_above_threshold=ignore_manager_above_threshold,
-                                                                                component_type=ComponentTypeEnum.MANAGER,
-                                                                                num_build_to_return_per_component=num_builds))
-
-    versions_dict.update(get_latest_versions_according_to_versions_path_as_dict(versions_path=r'X:',
-                                                                                base_version=base_version,
-                                                                                ignore_versions_above_threshold=ignore_aggregator_above_threshold,
-                                                                                component_type=ComponentTypeEnum.AGGREGATOR,
-                                                                                num_build_to_return_per_component=num_builds))
-
-    versions_dict.update(get_latest_versions_according_to_versions_path_as_dict(versions_path=r'X:',
-                                                                                base_version=base_version,
-                                                                                ignore_versions_above_threshold=ignore_core_above_threshold,
-                                                                                component_type=ComponentTypeEnum.CORE,
-                                                                                num_build_to_return_per_component=num_builds))
-
-    versions_dict.update(get_latest_versions_according_to_versions_path_as_dict(versions_path=r'X:',
-                                                                                base_version=base_version,
-                                                                                ignore_versions_above_threshold=ignore_win_collector_above_threshold,
-                                                                                component_type=ComponentTypeEnum.WINDOWS_COLLECTOR,
-                                                                                num_build_to_return_per_component=num_builds))
-
-    versions_dict.update(get_latest_versions_according_to_versions_path_as_dict(versions_path=r'X:\linux-collector',
-                                                                                base_version=base_version,
-                                                                                ignore_versions_above_threshold=ignore_linux_collector_above_threshold,
-                                                                                component_type=ComponentTypeEnum.LINUX_COLLECTOR,
-                                                                                num_build_to_return_per_component=num_builds))
+    ignore_builds_above = {
+        ComponentTypeEnum.MANAGER: ignore_manager_above_threshold,
+        ComponentTypeEnum.AGGREGATOR: ignore_aggregator_above_threshold,
+        ComponentTypeEnum.CORE: ignore_core_above_threshold,
+        ComponentTypeEnum.WINDOWS_COLLECTOR: ignore_win_collector_above_threshold,
+        ComponentTypeEnum.LINUX_COLLECTOR: ignore_linux_collector_above_threshold
+    }
 
-    response = app.response_class(
-        response=json.dumps(versions_dict),
-        status=200,
-        mimetype='application/json'
-    )
-    return response
+    versions_dict.update(versions_catalog.get_latest_builds(base_version=base_version,
+                                                            num_builds=num_builds,
+                                                            ignore_builds_above=ignore_builds_above))
+
+    versions_dict.update(linux_collectors_versions_catalog.get_latest_builds(base_version=base_version,
+                                                                             num_builds=num_builds,
+                                                                             ignore_builds_above=ignore_builds_above))
+
+    return create_conditional_json_response(content=versions_dict)
 
 
 # main driver function
 if __name__ == '__main__':
+    start_catalogs()
+
     # run() method of Flask class runs the application
     # on the local development server.
     app.run(host='0.0.0.0', port=5070)
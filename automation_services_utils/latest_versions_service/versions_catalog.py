@@ -0,0 +1,212 @@
+"""
+In memory catalogs of the versions share, so the service requests are answered without listing the share.
+The share is listed by a background thread every CATALOG_REFRESH_INTERVAL_SEC, and only the new version folders
+(and the recent ones that are still being copied) are listed again.
+"""
+import logging
+import os
+from abc import ABC, abstractmethod
+import re
+import threading
+import time
+from typing import Dict, List, Set, Tuple
+
+from component_type_enum import ComponentTypeEnum
+
+logger = logging.getLogger(__name__)
+
+CATALOG_REFRESH_INTERVAL_SEC = 60
+INCOMPLETE_VERSION_RELIST_PERIOD_SEC = 6 * 60 * 60
+VERSION_DIR_REGEX = re.compile(r'^(\d+\.\d+\.\d+)\.\d+$')
+
+
+def get_version_sort_key(version: str):
+    return [int(i) if i.isdigit() else i for i in version.split('.')]
+
+
+class PeriodicallyRefreshedCatalog(ABC):
+    """
+    Base class of a catalog that is built once on start and refreshed by a background thread.
+    The catalog is not available while its last refresh failed (for example the share is not mounted)
+    """
+
+    def __init__(self, name: str, refresh_interval_sec: int = CATALOG_REFRESH_INTERVAL_SEC):
+        self._name = name
+        self._refresh_interval_sec = refresh_interval_sec
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self.last_refresh_time = None
+        self._is_last_refresh_succeeded = False
+
+    @property
+    def is_available(self) -> bool:
+        return self._is_last_refresh_succeeded
+
+    def start(self):
+        """ Build the catalog and start refreshing it in background, does nothing if it was already started """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+
+            self._safe_refresh()
+            self._thread = threading.Thread(target=self._run, name=f'{self._name}_refresh', daemon=True)
+            self._thread.start()
+
+    @abstractmethod
+    def refresh(self):
+        pass
+
+    def _safe_refresh(self):
+        start_time = time.time()
+        try:
+            self.refresh()
+            self.last_refresh_time = time.time()
+            self._is_last_refresh_succeeded = True
+            logger.debug(f"{self._name} was refreshed in {self.last_refresh_time - start_time:.3f} seconds")
+        except Exception as e:
+            self._is_last_refresh_succeeded = False
+            logger.error(f"Failed to refresh {self._name}, it is not available until the next successful refresh, "
+                         f"original exception: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self._refresh_interval_sec)
+            self._safe_refresh()
+
+
+class VersionsCatalog(PeriodicallyRefreshedCatalog):
+    """
+    base version -> component -> builds (newest first) of a versions folder.
+    Every version folder is listed once, a folder that is missing some of the artifacts is listed again on every
+    refresh as long as it was modified in the last INCOMPLETE_VERSION_RELIST_PERIOD_SEC (the build is still copied).
+    Version folders that were removed from the share are removed from the catalog.
+    """
+
+    def __init__(self, versions_path: str, artifacts: Dict[str, Tuple[ComponentTypeEnum, str]]):
+        """
+        :param artifacts: component name -> (component type, artifact file name template),
+                          for example {'core': (ComponentTypeEnum.CORE, 'FortiEDR_{version}.iso')}
+        """
+        super().__init__(name=f'versions catalog of {versions_path}')
+        self._versions_path = versions_path
+        self._artifacts = artifacts
+        self._components_by_version = {}  # version folder -> set of the component names that have an artifact
+        self._builds = {}  # base version -> component name -> builds newest first
+
+    def refresh(self):
+        now = time.time()
+        version_dirs = {}
+        with os.scandir(self._versions_path) as entries:
+            for entry in entries:
+                if VERSION_DIR_REGEX.match(entry.name) is not None and entry.is_dir():
+                    version_dirs[entry.name] = entry.stat().st_mtime
+
+        is_changed = False
+        for version in set(self._components_by_version) - set(version_dirs):
+            del self._components_by_version[version]
+            is_changed = True
+
+        for version, modification_time in version_dirs.items():
+            components = self._components_by_version.get(version)
+            is_recent = now - modification_time < INCOMPLETE_VERSION_RELIST_PERIOD_SEC
+            if components is not None and (len(components) == len(self._artifacts) or not is_recent):
+                continue
+
+            listed_components = self._list_components(version=version)
+            if listed_components is not None and listed_components != components:
+                self._components_by_version[version] = listed_components
+                is_changed = True
+
+        if is_changed:
+            self._builds = self._build_index()
+
+    def get_latest_builds(self,
+                          base_version: str,
+                          num_builds: int,
+                          ignore_builds_above: Dict[ComponentTypeEnum, int] = None) -> Dict[str, List[str]]:
+        """
+        :param base_version: for example 5.2.0
+        :param ignore_builds_above: component type -> build number, builds above it are not returned
+        :return: component name -> latest num_builds builds of the base version (newest first),
+                 components without builds are not returned
+        """
+        ignore_builds_above = ignore_builds_above or {}
+        builds_by_component = self._builds.get(base_version, {})
+        latest_builds = {}
+        for component_name, (component_type, _) in self._artifacts.items():
+            builds = builds_by_component.get(component_name, [])
+            build_threshold = ignore_builds_above.get(component_type)
+            if build_threshold is not None:
+                builds = [x for x in builds if int(x.split('.')[-1]) <= int(build_threshold)]
+
+            if len(builds) > 0:
+                latest_builds[component_name] = builds[:num_builds]
+
+        return latest_builds
+
+    def get_build_components(self, version: str) -> List[str]:
+        """
+        :param version: full build version, for example 5.2.0.1234
+        :return: names of the components that have an artifact of the build, a build that is not in the catalog yet
+                 is looked up on the share
+        """
+        components = self._components_by_version.get(version)
+        if components is None and VERSION_DIR_REGEX.match(version) is not None:
+            components = self._list_components(version=version)
+
+        return [x for x in self._artifacts if components is not None and x in components]
+
+    def _list_components(self, version: str) -> Set[str] | None:
+        try:
+            files_in_dir = set(os.listdir(fr'{self._versions_path}\{version}'))
+        except OSError as e:
+            logger.warning(f"Failed to list {version} in {self._versions_path}, original exception: {e}")
+            return None
+
+        return {name for name, (_, file_name_template) in self._artifacts.items()
+                if file_name_template.format(version=version) in files_in_dir}
+
+    def _build_index(self) -> dict:
+        builds = {}
+        for version, components in self._components_by_version.items():
+            base_version = VERSION_DIR_REGEX.match(version).group(1)
+            for component_name in components:
+                builds.setdefault(base_version, {}).setdefault(component_name, []).append(version)
+
+        for builds_by_component in builds.values():
+            for component_builds in builds_by_component.values():
+                component_builds.sort(key=get_version_sort_key, reverse=True)
+
+        return builds
+
+
+class ContentCatalog(PeriodicallyRefreshedCatalog):
+    """
+    Collector content files (nslo) of the content folder, newest first
+    """
+
+    def __init__(self, content_path: str):
+        super().__init__(name=f'content catalog of {content_path}')
+        self._content_path = content_path
+        self._content_files = []
+        self._content_files_set = set()
+
+    def refresh(self):
+        all_files = os.listdir(self._content_path)
+        filtered_nslo = [x for x in all_files if 'FortiEDRCollectorContent' in x and 'nslo' in x and 'tmp' not in x]
+        filtered_nslo.sort(key=lambda o: int(o.split('FortiEDRCollectorContent-')[1].split('.nslo')[0]), reverse=True)
+        self._content_files = filtered_nslo
+        self._content_files_set = set(filtered_nslo)
+
+    def get_latest_content_files(self, num_content_files: int) -> List[str]:
+        return self._content_files[:num_content_files]
+
+    def is_content_file_exist(self, content_file_name: str) -> bool:
+        """ A file that is not in the catalog (created after the last refresh) is looked up on the share """
+        if content_file_name in self._content_files_set:
+            return True
+
+        if '\\' in content_file_name or '/' in content_file_name:
+            return False
+
+        return os.path.isfile(fr'{self._content_path}\{content_file_name}')
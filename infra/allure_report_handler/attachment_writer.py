@@ -0,0 +1,156 @@
+import atexit
+import gzip
+import hashlib
+import logging
+import queue
+import threading
+import uuid
+
+import allure
+from allure_commons import plugin_manager
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_ATTACHMENTS = 200  # the test thread blocks when the writer falls behind by more than this
+COMPRESS_ATTACHMENT_ABOVE_SIZE = 1024 * 1024
+GZIP_COMPRESS_LEVEL = 6
+MIN_SIZE_TO_DEDUPE = 1024
+MAX_ATTACHMENTS_SIZE_PER_TEST = 50 * 1024 * 1024
+TRUNCATED_ATTACHMENT_EDGE_SIZE = 128 * 1024
+GZIP_MIME_TYPE = 'application/gzip'
+
+
+class AttachmentWriter:
+    """
+    Writes allure attachments on a background thread, so big bodies (logs, command outputs) are not written to the
+    results dir on the test thread.
+    * the attachment is registered in the current allure step on the calling thread (allure keeps the step context and
+      the plugins per thread), only the compression and the write of the body are done in background
+    * bodies above COMPRESS_ATTACHMENT_ABOVE_SIZE are attached gzip compressed
+    * a body that is identical to a body that was already attached in the same test is replaced by a reference to the
+      first attachment
+    * once the attachments of a test reach MAX_ATTACHMENTS_SIZE_PER_TEST, only the head and the tail of every
+      further attachment are kept
+    """
+
+    def __init__(self,
+                 max_pending_attachments: int = MAX_PENDING_ATTACHMENTS,
+                 max_attachments_size_per_test: int = MAX_ATTACHMENTS_SIZE_PER_TEST):
+        self._queue = queue.Queue(maxsize=max_pending_attachments)
+        self._max_attachments_size_per_test = max_attachments_size_per_test
+        self._lock = threading.Lock()
+        self._thread = None
+        self._attached_bodies = {}  # hash of body -> name of the first attachment with this body in the current test
+        self._test_name = None
+        self._test_attachments_size = 0
+
+    def start_test(self, test_name: str):
+        """ Reset the attachments budget and the dedupe of the bodies, should be called before every test """
+        with self._lock:
+            self._test_name = test_name
+            self._test_attachments_size = 0
+            self._attached_bodies = {}
+
+    def attach(self, name: str, body: str | bytes, attachment_type):
+        body = body if body is not None else ''
+        body = body.encode('utf-8') if isinstance(body, str) else body
+
+        if len(body) >= MIN_SIZE_TO_DEDUPE:
+            body_hash = hashlib.sha1(body).hexdigest()
+            with self._lock:
+                first_attachment = self._attached_bodies.get(body_hash)
+                if first_attachment is None:
+                    self._attached_bodies[body_hash] = name
+
+            if first_attachment is not None:
+                allure.attach(name=name, body=f"Same content as the attachment '{first_attachment}'",
+                              attachment_type=allure.attachment_type.TEXT)
+                return
+
+        body = self._apply_test_budget(name=name, body=body)
+
+        is_compressed = len(body) > COMPRESS_ATTACHMENT_ABOVE_SIZE
+        file_name = self._register_attachment(name=name, attachment_type=attachment_type,
+                                              is_compressed=is_compressed)
+        if file_name is None:
+            # the private api of the allure reporter is not available, attach as usual (on the calling thread)
+            allure.attach(name=name, body=body, attachment_type=attachment_type)
+            return
+
+        # allure keeps its plugin manager per thread, so the hook of the calling thread is used to write the body
+        report_attached_data = plugin_manager.hook.report_attached_data
+        self._start_thread()
+        self._queue.put((report_attached_data, file_name, body, is_compressed))
+
+    def flush(self):
+        """ Block until all the pending attachments are written """
+        if self._thread is not None:
+            self._queue.join()
+
+    def _apply_test_budget(self, name: str, body: bytes) -> bytes:
+        with self._lock:
+            remaining_size = self._max_attachments_size_per_test - self._test_attachments_size
+            if len(body) > max(remaining_size, 2 * TRUNCATED_ATTACHMENT_EDGE_SIZE):
+                truncated_size = len(body) - 2 * TRUNCATED_ATTACHMENT_EDGE_SIZE
+                logger.info(f"Attachments budget of {self._test_name} was spent, truncating {truncated_size} bytes "
+                            f"of the attachment '{name}'")
+                marker = f"\n\n... {truncated_size} bytes were truncated, attachments budget of the test " \
+                         f"({self._max_attachments_size_per_test} bytes) was spent ...\n\n".encode('utf-8')
+                body = body[:TRUNCATED_ATTACHMENT_EDGE_SIZE] + marker + body[-TRUNCATED_ATTACHMENT_EDGE_SIZE:]
+
+            self._test_attachments_size += len(body)
+            return body
+
+    def _register_attachment(self, name: str, attachment_type, is_compressed: bool) -> str | None:
+        """
+        Add the attachment to the current allure step without writing its body, relies on the private
+        AllureReporter._attach (allure-python-commons 2.9.45, see resources/requirements.txt)
+        :return: file name that the body should be written to, None if the reporter api is not available
+        """
+        reporter = self._get_allure_reporter()
+        if reporter is None:
+            return None
+
+        try:
+            if is_compressed:
+                return reporter._attach(str(uuid.uuid4()), name=f'{name}.gz', attachment_type=GZIP_MIME_TYPE,
+                                        extension=f'{attachment_type.extension}.gz')
+
+            return reporter._attach(str(uuid.uuid4()), name=name, attachment_type=attachment_type)
+        except Exception as e:
+            logger.debug(f"Failed to register attachment '{name}' in allure reporter, original exception: {e}")
+            return None
+
+    @staticmethod
+    def _get_allure_reporter():
+        for plugin in plugin_manager.get_plugins():
+            reporter = getattr(plugin, 'allure_logger', None)
+            if reporter is not None and hasattr(reporter, '_attach'):
+                return reporter
+        return None
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='allure_attachment_writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            report_attached_data, file_name, body, is_compressed = self._queue.get()
+            try:
+                if is_compressed:
+                    body = gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL)
+                report_attached_data(body=body, file_name=file_name)
+            except Exception as e:
+                logger.error(f"Failed to write attachment {file_name}, original exception: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_attachment_writer = AttachmentWriter()
+atexit.register(_attachment_writer.flush)
+
+
+def get_attachment_writer() -> AttachmentWriter:
+    return _attachment_writer
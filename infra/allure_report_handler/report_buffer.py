@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import deque
+
+import allure
+from allure_commons import hookimpl, plugin_manager
+
+from infra.enums import ReportMode
+
+MAX_MESSAGES_PER_FLUSH = 200
+MAX_FULL_LOG_MESSAGES = 100000
+
+
+class ReportBuffer:
+    """
+    Buffers the Reporter.report messages of every thread instead of opening an allure step per message.
+    The buffer of a thread is flushed as a single step when a step is started or stopped on the thread (so the
+    messages stay in the step they were reported in), before an attachment and at the end of every test phase.
+    Consecutive identical messages (polling loops) are collapsed to a single line with "×N".
+    """
+
+    def __init__(self):
+        self.mode = ReportMode.FULL
+        self._lock = threading.Lock()
+        self._buffers = {}  # thread id -> list of [message, count]
+        self._full_log = deque(maxlen=MAX_FULL_LOG_MESSAGES)
+        self._is_registered = False
+
+    def set_mode(self, mode: ReportMode):
+        self.flush_all()
+        self.mode = mode
+        if mode != ReportMode.FULL and not self._is_registered:
+            plugin_manager.register(self)
+            self._is_registered = True
+
+    def add(self, message: str):
+        if self.mode == ReportMode.BUFFERED_FULL_LOG_ON_FAILURE:
+            self._full_log.append(f"{time.strftime('%H:%M:%S')} [{threading.current_thread().name}] {message}")
+
+        with self._lock:
+            buffer = self._buffers.setdefault(threading.get_ident(), [])
+            if len(buffer) > 0 and buffer[-1][0] == message:
+                buffer[-1][1] += 1
+                return
+
+            buffer.append([message, 1])
+            is_full = len(buffer) >= MAX_MESSAGES_PER_FLUSH
+
+        if is_full:
+            self.flush()
+
+    def flush(self):
+        """ Report the buffered messages of the current thread """
+        with self._lock:
+            buffer = self._buffers.pop(threading.get_ident(), None)
+
+        self._report(buffer)
+
+    def flush_all(self):
+        """ Report the buffered messages of all the threads (in the context of the current thread) """
+        with self._lock:
+            buffers = list(self._buffers.values())
+            self._buffers.clear()
+
+        for buffer in buffers:
+            self._report(buffer)
+
+    def start_test(self):
+        self._full_log.clear()
+
+    def attach_full_log(self, name: str):
+        """ Attach all the messages of the test as they were reported, without collapsing """
+        if len(self._full_log) > 0:
+            allure.attach(name=name, body='\n'.join(self._full_log), attachment_type=allure.attachment_type.TEXT)
+
+    @staticmethod
+    def _report(buffer: list | None):
+        if not buffer:
+            return
+
+        lines = [message if count == 1 else f"{message} ×{count}" for message, count in buffer]
+        if len(lines) == 1:
+            with allure.step(lines[0]):
+                pass
+            return
+
+        with allure.step(f"{lines[0]} (+{len(lines) - 1} more messages)"):
+            allure.attach(name='Report messages', body='\n'.join(lines), attachment_type=allure.attachment_type.TEXT)
+
+    @hookimpl(tryfirst=True)
+    def start_step(self, uuid, title, params):
+        self.flush()
+
+    @hookimpl(tryfirst=True)
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        self.flush()
+
+
+_report_buffer = ReportBuffer()
+
+
+def get_report_buffer() -> ReportBuffer:
+    return _report_buffer
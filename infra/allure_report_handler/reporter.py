@@ -2,6 +2,10 @@ import logging
 
 import allure
 
+from infra.allure_report_handler.attachment_writer import get_attachment_writer
+from infra.allure_report_handler.report_buffer import get_report_buffer
+from infra.enums import ReportMode
+
 
 _logger = logging.getLogger('TEST_STEP')
 
@@ -21,10 +25,21 @@ TEST_STEP = _step
 
 class Reporter:
 
+    @staticmethod
+    def set_report_mode(mode: ReportMode):
+        """ Switch between a step per report message (default) and buffered reporting, can be changed at runtime """
+        get_report_buffer().set_mode(mode)
+
     @staticmethod
     def report(message: str, logger_func=None):
         if logger_func is not None:
             logger_func(message)
+
+        report_buffer = get_report_buffer()
+        if report_buffer.mode != ReportMode.FULL:
+            report_buffer.add(message)
+            return
+
         with allure.step(message):
             pass
 
@@ -39,8 +54,10 @@ class Reporter:
 
     @staticmethod
     def attach_str_as_file(file_name: str, file_content: str):
-        allure.attach(name=file_name, body=file_content, attachment_type=allure.attachment_type.TEXT)
+        get_report_buffer().flush()
+        get_attachment_writer().attach(name=file_name, body=file_content, attachment_type=allure.attachment_type.TEXT)
 
     @staticmethod
     def attach_str_as_json_file(file_name: str, file_content: str):
-        allure.attach(name=file_name, body=file_content, attachment_type=allure.attachment_type.JSON)
+        get_report_buffer().flush()
+        get_attachment_writer().attach(name=file_name, body=file_content, attachment_type=allure.attachment_type.JSON)
@@ -5,8 +5,8 @@ from infra.api.management_api.event import Event, EventFieldsNames, WAIT_AFTER_D
 from infra import common_utils
 import logging
 import functools
-from typing import List
 import time
+from typing import List, Dict
 
 from infra.common_utils import WAIT_FOR_COLLECTOR_NEW_CONFIGURATION
 
@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 MAX_WAIT_FOR_EVENT = WAIT_FOR_COLLECTOR_NEW_CONFIGURATION
 GET_EVENT_INTERVAL = 2
+DELETE_EVENTS_BATCH_SIZE = 100
 
 
 class EventsFactory(BaseApiObjFactory):
@@ -24,14 +25,55 @@ class EventsFactory(BaseApiObjFactory):
     def __init__(self, organization_name: str, factory_rest_client: RestCommands):
         super().__init__(factory_rest_client=factory_rest_client)
         self._organization_name = organization_name
+        # index of the events that were found with the factory's rest client, the events are updated in place
+        # whenever they are received again from the server
+        self._events_by_id: Dict[int, Event] = {}
+
+    def _to_event(self, event_fields: dict, rest_client: RestCommands) -> Event:
+        if rest_client is not self._factory_rest_client:
+            return Event(rest_client=rest_client, initial_data=event_fields)
+
+        event_id = event_fields[EventFieldsNames.ID.value]
+        event = self._events_by_id.get(event_id)
+        if event is None:
+            event = Event(rest_client=rest_client, initial_data=event_fields)
+            self._events_by_id[event_id] = event
+        else:
+            event.cache = event_fields
+        return event
+
+    def get_by_id(self, event_id: int, rest_client=None, safe=False, from_index=True) -> Event:
+        """
+        Find event by its id, the event is taken from the factory's index if it was already found before,
+        otherwise only this event is fetched from the server (filtered by id in the server side)
+        """
+        rest_client = rest_client or self._factory_rest_client
+        if from_index and rest_client is self._factory_rest_client and event_id in self._events_by_id:
+            return self._events_by_id[event_id]
+
+        logger.debug(f"Find event with id {event_id} in organization {self._organization_name}")
+        events_fields = rest_client.events.get_events_by_ids(event_ids=[event_id])
+        for event_fields in events_fields:
+            if event_fields[EventFieldsNames.ID.value] == event_id:
+                return self._to_event(event_fields=event_fields, rest_client=rest_client)
+
+        self._events_by_id.pop(event_id, None)
+        assert safe, f"Didn't find event with id {event_id} in organization {self._organization_name}"
+        logger.info(f"Didn't find event with id {event_id} in organization {self._organization_name}")
+        return None
 
     def get_all(self, rest_client=None, safe=False) -> List[Event]:
         events = []
         rest_client = rest_client or self._factory_rest_client
         logger.debug(f"Find all Events in organization {self._organization_name}")
         all_events_fields = rest_client.events.get_events()
+        if rest_client is self._factory_rest_client:
+            # events that were not returned anymore do not exist, drop them from the index
+            existing_ids = {event_fields[EventFieldsNames.ID.value] for event_fields in all_events_fields}
+            self._events_by_id = {event_id: event for event_id, event in self._events_by_id.items()
+                                  if event_id in existing_ids}
         for event_fields in all_events_fields:
-            event = Event(rest_client=rest_client, initial_data=event_fields)
+            event = self._to_event(event_fields=event_fields, rest_client=rest_client)
             events.append(event)
         if len(events):
             return events
@@ -65,7 +107,7 @@ class EventsFactory(BaseApiObjFactory):
         logger.debug(f"Find events with field {field_name} = {value} in organization {org_name}")
         events_fields = rest_client.events.get_events(**{field_name: value})
         for event_fields in events_fields:
-            event = Event(rest_client=rest_client, initial_data=event_fields)
+            event = self._to_event(event_fields=event_fields, rest_client=rest_client)
             events.append(event)
         if len(events):
             logger.debug(f"Found these events with field {field_name}={value}: \n {events}")
@@ -76,17 +118,36 @@ class EventsFactory(BaseApiObjFactory):
 
     @allure.step("Delete all Events")
     def delete_all(self, rest_client=None, safe: bool = False, wait_sec: int = None):
+        """
+        Delete all the events with batched delete calls and wait for the deletion in the backend
+        :param wait_sec: seconds to wait after the deletion, the events list is empty right after the delete call but
+                         the deletion in the backend takes a fixed period of time (WAIT_AFTER_DELETE)
+        """
         wait_sec = wait_sec or WAIT_AFTER_DELETE
-        logger.info(f"Delete events in organization {self._organization_name} and wait {wait_sec} seconds")
         rest_client = rest_client or self._factory_rest_client
         all_events = self.get_all(rest_client=rest_client, safe=safe)
-        for event in all_events:
-            logger.info(f"Delete {event} from organization {self._organization_name}")
-            event.delete()
-        logger.info(f"Sleep {wait_sec} sec, this is the period of time that took for deletion in the backend")
-        time.sleep(wait_sec)
-        remaining_events = self.get_all(rest_client=rest_client, safe=safe)
-        assert len(remaining_events) == 0, f"These events were not deleted: {remaining_events}"
+        if len(all_events) == 0:
+            logger.info(f"There are no events to delete in organization {self._organization_name}")
+            return
+
+        event_ids = [event.id for event in all_events]
+        logger.info(f"Delete {len(event_ids)} events in organization {self._organization_name}")
+        for i in range(0, len(event_ids), DELETE_EVENTS_BATCH_SIZE):
+            rest_client.events.delete_events(event_ids=event_ids[i:i + DELETE_EVENTS_BATCH_SIZE])
+        delete_time = time.time()
+
+        for event_id in event_ids:
+            self._events_by_id.pop(event_id, None)
+
+        remaining_events = rest_client.events.get_events()
+        remaining_ids = [event_fields[EventFieldsNames.ID.value] for event_fields in remaining_events]
+        assert len(remaining_ids) == 0, f"These events were not deleted: {remaining_ids}"
+
+        remaining_wait_sec = wait_sec - (time.time() - delete_time)
+        if remaining_wait_sec > 0:
+            logger.info(f"Sleep {remaining_wait_sec:.1f} sec, this is the period of time that took for deletion in "
+                        f"the backend")
+            time.sleep(remaining_wait_sec)
 
 
 def _wait_for_event(get_event_func, timeout=None, interval=None, safe=False):
@@ -4,8 +4,8 @@ from infra.api.api_object import BaseApiObj
 from infra.api.nslo_wrapper.rest_commands import RestCommands
 from infra.enums import FortiEdrSystemState
 from infra.common_utils import wait_for_condition
-from infra.system_components.collectors.default_values import COLLECTOR_KEEPALIVE_INTERVAL, MAX_WAIT_FOR_STATUS, \
-    MAX_WAIT_FOR_DELETION
+from infra.system_components.collectors.default_values import MAX_WAIT_FOR_STATUS, MAX_WAIT_FOR_DELETION, \
+    get_status_polling_kwargs
 import allure
 logger = logging.getLogger(__name__)
 
@@ -109,7 +109,9 @@ class RestCollector(BaseApiObj):
 
     def get_fields(self, safe=False, update_cache_data=False, rest_client=None) -> dict:
         rest_client = rest_client or self._rest_client
-        collectors_fields = rest_client.system_inventory.get_collector_info_by_id(collector_id=self.id)
+        organization = self.cache.get(CollectorFieldsNames.ORGANIZATION.value)
+        collectors_fields = rest_client.system_inventory.get_collector_info_by_id(collector_id=self.id,
+                                                                                 organization=organization)
         if len(collectors_fields):
             assert len(collectors_fields) == 1
             collector_fields = collectors_fields[0]
@@ -162,28 +164,36 @@ class RestCollector(BaseApiObj):
         return self.get_status(from_cache=False) == FortiEdrSystemState.UNINSTALLING.value
 
     @allure.step("Wait until is Disconnected in management")
-    def wait_until_disconnected(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_disconnected(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is Disconnected in management")
-        wait_for_condition(condition_func=self.is_disconnected, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is in disconnected state in management")
+        wait_for_condition(condition_func=self.is_disconnected,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is in disconnected state in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Wait until is Degraded in management")
-    def wait_until_degraded(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_degraded(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is degraded in management")
-        wait_for_condition(condition_func=self.is_degraded, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is in Degraded state in management")
+        wait_for_condition(condition_func=self.is_degraded,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is in Degraded state in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Wait for status 'uninstalling' in management")
-    def wait_for_uninstalling(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_for_uninstalling(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is in status 'uninstalling' in management")
-        wait_for_condition(condition_func=self.is_uninstalling, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is in 'uninstalling' state in management")
+        wait_for_condition(condition_func=self.is_uninstalling,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is in 'uninstalling' state in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Wait until deleted from management")
-    def wait_until_deleted(self, timeout_sec=MAX_WAIT_FOR_DELETION, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_deleted(self, timeout_sec=MAX_WAIT_FOR_DELETION, interval_sec=None):
         logger.info(f"Wait until {self} is deleted from management")
-        wait_for_condition(condition_func=self.is_not_exist, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} does not appear in management")
+        wait_for_condition(condition_func=self.is_not_exist,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} does not appear in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Enable collector")
     def enable(self):
@@ -199,16 +209,20 @@ class RestCollector(BaseApiObj):
         return self.get_status(from_cache=False) == FortiEdrSystemState.RUNNING.value
 
     @allure.step("Wait until running in management")
-    def wait_until_running(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_running(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is running in management")
-        wait_for_condition(condition_func=self.is_running, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is in 'running' state in management")
+        wait_for_condition(condition_func=self.is_running,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is in 'running' state in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Wait until isolated in management")
-    def wait_until_isolated(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_isolated(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is isolated in management")
-        wait_for_condition(condition_func=self.is_isolated, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is isolated in management")
+        wait_for_condition(condition_func=self.is_isolated,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is isolated in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Disable collector")
     def disable(self):
@@ -220,10 +234,12 @@ class RestCollector(BaseApiObj):
         return self.get_status(from_cache=False) == FortiEdrSystemState.DISABLED.value
 
     @allure.step("Wait until disabled in management")
-    def wait_until_disabled(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_disabled(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is disabled in management")
-        wait_for_condition(condition_func=self.is_disabled, timeout_sec=timeout_sec, interval_sec=interval_sec,
-                           condition_msg=f"{self} is in 'disabled' state in management")
+        wait_for_condition(condition_func=self.is_disabled,
+                           timeout_sec=timeout_sec,
+                           condition_msg=f"{self} is in 'disabled' state in management",
+                           **get_status_polling_kwargs(interval_sec))
 
     def is_exist(self) -> bool:
         """ Check if collector exists in management """
@@ -82,7 +82,7 @@ class Event(BaseApiObj):
 
     def get_fields(self, safe=False, update_cache_data=False, rest_client=None) -> dict:
         rest_client = rest_client or self._rest_client
-        events_fields = rest_client.events.get_events()
+        events_fields = rest_client.events.get_events_by_ids(event_ids=[self.id])
         for event_fields in events_fields:
             if event_fields[EventFieldsNames.ID.value] == self.id:
                 logger.debug(f"{self} updated data from management: \n {event_fields}")
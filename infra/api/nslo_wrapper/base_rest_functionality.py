@@ -48,11 +48,17 @@ class BaseRestFunctionality:
                 response = response.text
             assert False, f'Could not get response from the management. \n{response}'
 
+        components = json.loads(response.text)
+        return self._filter_components(components, section, validation_data, output_parameters)
+
+    def _filter_components(self, components, section="", validation_data={}, output_parameters=[]):
+        """
+        Filter already parsed components, same as _get_info but without sending the request.
+        :param components: list of dictionaries, the parsed response.
+        """
         if isinstance(output_parameters, str):
             output_parameters = [output_parameters]
 
-        components = json.loads(response.text)
-
         if not validation_data and not output_parameters:
             return components
         elif not validation_data and output_parameters:
@@ -28,3 +28,7 @@ class EventsRest(BaseRestFunctionality):
         assert status, f'Could not get response from the management. \n{response}'
         events = json.loads(response.text)
         return events
+
+    def get_events_by_ids(self, event_ids: List[int]) -> List[dict]:
+        """ Server side filtered lookup, returns only the events with the given ids """
+        return self.get_events(eventIds=event_ids)
@@ -1,4 +1,7 @@
+import copy
 import json
+import threading
+import time
 from typing import List
 import logging
 import allure
@@ -9,13 +12,76 @@ from infra.api.nslo_wrapper.base_rest_functionality import BaseRestFunctionality
 from infra.system_components.collector import CollectorAgent
 logger = logging.getLogger(__name__)
 
+COLLECTORS_SNAPSHOT_TTL = 2  # seconds, 0 - always get the collectors from management
+
+
+class _CollectorsSnapshot:
+    """ Collectors list of a single ListCollectors response """
+
+    def __init__(self, collectors: List[dict], generation: int):
+        self.collectors = collectors
+        self.collectors_by_id = {collector['id']: collector for collector in collectors}
+        self.generation = generation
+        self.creation_time = time.time()
+
 
 class SystemInventoryRest(BaseRestFunctionality):
+    """
+    Collectors reads are served from a short living snapshot of the ListCollectors response (per organization),
+    so many status/name/ip reads of many collectors during the same second cost a single request.
+    Every call that changes the inventory (move, toggle, isolate, delete) invalidates the snapshots of all the users.
+    """
+    _inventory_generation = 0  # shared by all the users, bumped on every change of the inventory
+    _generation_lock = threading.Lock()
 
     def __init__(self, nslo_rest: NsloRest):
         super().__init__(nslo_rest=nslo_rest)
+        self.collectors_snapshot_ttl = COLLECTORS_SNAPSHOT_TTL
+        self._collectors_snapshots = {}  # organization -> _CollectorsSnapshot
+        self._collector_organizations = {}  # collector id -> organization of the snapshot that contains it
+        self._snapshots_lock = threading.Lock()
+
+    @classmethod
+    def invalidate_collectors_snapshots(cls):
+        """ Next collectors read of every user will get the collectors from management """
+        with cls._generation_lock:
+            cls._inventory_generation += 1
+
+    def _is_snapshot_valid(self, snapshot: _CollectorsSnapshot) -> bool:
+        return snapshot is not None and snapshot.generation == SystemInventoryRest._inventory_generation and \
+            time.time() - snapshot.creation_time < self.collectors_snapshot_ttl
+
+    def _get_collectors_snapshot(self, organization=None) -> _CollectorsSnapshot:
+        with self._snapshots_lock:
+            snapshot = self._collectors_snapshots.get(organization)
+            if self._is_snapshot_valid(snapshot):
+                return snapshot
+
+            generation = SystemInventoryRest._inventory_generation
+            status, response = self._rest.inventory.ListCollectors(organization=organization)
+            collectors = self._get_info(status, response, 'collector')
+            snapshot = _CollectorsSnapshot(collectors=collectors, generation=generation)
+            self._collectors_snapshots[organization] = snapshot
+            for collector_id in snapshot.collectors_by_id.keys():
+                self._collector_organizations[collector_id] = organization
+            return snapshot
+
+    def get_collector_info_by_id(self, collector_id: int, validation_data=None, output_parameters=None,
+                                 organization=None):
+        """
+        :param organization: organization of the collector, the collector is taken from the snapshot of this
+                             organization. None - the organization of the snapshot that contained it last time
+        """
+        if self.collectors_snapshot_ttl > 0:
+            organization = organization or self._collector_organizations.get(collector_id)
+            snapshot = self._get_collectors_snapshot(organization=organization)
+            collector = snapshot.collectors_by_id.get(collector_id)
+            if collector is not None:
+                return self._filter_components([copy.deepcopy(collector)], 'collector', validation_data,
+                                               output_parameters)
+            logger.debug(f"Collector {collector_id} is not in the collectors of organization {organization}, "
+                         f"get it by id from management")
 
-    def get_collector_info_by_id(self, collector_id: int, validation_data=None, output_parameters=None):
         status, response = self._rest.inventory.ListCollectors(devicesIds=[collector_id])
         return self._get_info(status, response, 'collector', validation_data, output_parameters)
 
@@ -28,6 +94,10 @@ class SystemInventoryRest(BaseRestFunctionality):
         :param validation_data: dictionary, the data to get from the collector.
         :return: according to the get_info function.
         """
+        if self.collectors_snapshot_ttl > 0:
+            collectors = copy.deepcopy(self._get_collectors_snapshot(organization=organization).collectors)
+            return self._filter_components(collectors, 'collector', validation_data, output_parameters)
+
         status, response = self._rest.inventory.ListCollectors(organization=organization)
         return self._get_info(status, response, 'collector', validation_data, output_parameters)
 
@@ -86,6 +156,7 @@ class SystemInventoryRest(BaseRestFunctionality):
         status, response = self._rest.passthrough.ExecuteRequest(url='/inventory/move-collectors',
                                                                  mode='put',
                                                                  inputParams=params)
+        self.invalidate_collectors_snapshots()
 
         self._validate_expected_status_code(expected_status_code=expected_status_code,
                                             actual_status_code=response.status_code,
@@ -94,6 +165,7 @@ class SystemInventoryRest(BaseRestFunctionality):
     @allure.step("Move collector {collector_name} to group: {group_name} in same organization")
     def move_collector_to_group(self, collector_name, group_name, expected_status_code: int = 200):
         status, response = self._rest.inventory.MoveCollectors(collectors=collector_name, group=group_name)
+        self.invalidate_collectors_snapshots()
         assert status, f'Could not get response from the management. \n{response}'
         err_msg = f"Failed to move collector {collector_name} to group {group_name}, " \
                   f"expected response code: {expected_status_code}, actual: {response.status_code}"
@@ -111,6 +183,7 @@ class SystemInventoryRest(BaseRestFunctionality):
             organization=organization_name,
             enable=enable
         )
+        self.invalidate_collectors_snapshots()
         self._validate_expected_status_code(
             expected_status_code=expected_status_code,
             actual_status_code=response.status_code,
@@ -133,6 +206,7 @@ class SystemInventoryRest(BaseRestFunctionality):
                           expected_status_code: int = 200):
 
         status, response = self._rest.inventory.DeleteCollectors(devices=collector_names)
+        self.invalidate_collectors_snapshots()
         self._validate_expected_status_code(expected_status_code=expected_status_code,
                                             actual_status_code=response.status_code,
                                             error_message=f"Reset user password - expected response code: {expected_status_code}, actual: {response.status_code}")
@@ -142,6 +216,7 @@ class SystemInventoryRest(BaseRestFunctionality):
         status, response = self._rest.inventory.IsolateCollectors(devices_names=[collector_name],
                                                                   devices_ids=[collector_id],
                                                                   organization=organization_name)
+        self.invalidate_collectors_snapshots()
         assert status, f"Failed to isolate collector {collector_name}, got error: {response}"
         self._validate_expected_status_code(expected_status_code=expected_status_code,
                                             actual_status_code=response.status_code,
@@ -153,6 +228,7 @@ class SystemInventoryRest(BaseRestFunctionality):
         status, response = self._rest.inventory.UnisolateCollectors(devices_names=[collector_name],
                                                                     devices_ids=[collector_id],
                                                                     organization=organization_name)
+        self.invalidate_collectors_snapshots()
         assert status, f"Failed to un isolate collector {collector_name}, got error: {response}"
         self._validate_expected_status_code(expected_status_code=expected_status_code,
                                             actual_status_code=response.status_code,
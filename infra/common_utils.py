@@ -1,6 +1,9 @@
 import allure
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from infra.condition_waiter import PollingProfile, ConditionWait, WaitMetrics
 
 WAIT_FOR_COLLECTOR_NEW_CONFIGURATION = 60  # time to wait for collector new configuration
 
@@ -8,15 +11,60 @@ logger = logging.getLogger(__name__)
 
 
 @allure.step("Wait max {timeout_sec} seconds for the condition: '{condition_msg}'")
-def wait_for_condition(condition_func, timeout_sec, interval_sec, condition_msg):
+def wait_for_condition(condition_func, timeout_sec, interval_sec, condition_msg,
+                       backoff_factor=1, max_interval_sec=None, jitter_ratio=0,
+                       fast_poll_sec=0, fast_poll_interval_sec=1) -> WaitMetrics:
+    """
+    Poll the condition until it is met, the first poll is done immediately and the last one exactly at the deadline
+    :param interval_sec: seconds between polls (after the fast poll period)
+    :param backoff_factor: multiply the interval by this factor after every poll, 1 - fixed interval
+    :param max_interval_sec: upper limit of the interval when backoff_factor is used
+    :param jitter_ratio: randomize every interval by +-this ratio, 0 - no jitter
+    :param fast_poll_sec: poll every fast_poll_interval_sec during the first fast_poll_sec seconds
+    :param fast_poll_interval_sec: seconds between polls during the fast poll period
+    :return: metrics of the wait (time until the condition was met and number of polls)
+    """
     logger.info(f"Wait max {timeout_sec} sec for this condition: {condition_msg}")
-    is_condition_met = condition_func()
-    start_time = time.time()
-    while not is_condition_met and time.time() - start_time < timeout_sec:
-        logger.info(f"Sleep {interval_sec} sec because condition is still not met")
-        time.sleep(interval_sec)
-        logger.info("Check again if condition is met")
-        is_condition_met = condition_func()
-    assert is_condition_met, f"Timeout: after waiting max {timeout_sec} seconds, " \
-                             f"this condition was NOT met !!!: \n '{condition_msg}'"
-    logger.info(f"This condition was met: '{condition_msg}'")
+    polling_profile = PollingProfile(interval_sec=interval_sec, backoff_factor=backoff_factor,
+                                     max_interval_sec=max_interval_sec, jitter_ratio=jitter_ratio,
+                                     fast_poll_sec=fast_poll_sec, fast_poll_interval_sec=fast_poll_interval_sec)
+    condition_wait = ConditionWait(condition_func=condition_func, timeout_sec=timeout_sec,
+                                   polling_profile=polling_profile, condition_msg=condition_msg)
+    metrics = condition_wait.run()
+    assert metrics.is_condition_met, f"Timeout: after waiting max {timeout_sec} seconds, " \
+                                     f"this condition was NOT met !!!: \n '{condition_msg}'"
+    logger.info(f"This condition was met: '{condition_msg}' after {metrics.elapsed_sec:.2f} sec "
+                f"and {metrics.num_of_polls} polls")
+    return metrics
+
+
+@allure.step("Wait max {timeout_sec} seconds for several conditions concurrently")
+def wait_for_conditions(conditions: List[Tuple], timeout_sec, interval_sec, **polling_kwargs) -> List[WaitMetrics]:
+    """
+    Wait for several conditions at the same time, every condition is polled by its own thread (the first one by the
+    calling thread), so a slow condition does not delay the polls of the others and the total time is about the time
+    of the slowest condition and not the sum of all of them.
+    Notice that the other conditions are polled off the calling thread, so their allure steps are not reported.
+    :param conditions: list of (condition_func, condition_msg)
+    :param polling_kwargs: same polling arguments of wait_for_condition (backoff_factor, jitter_ratio, etc.)
+    :return: metrics of the waits, at the same order of the conditions
+    """
+    polling_profile = PollingProfile(interval_sec=interval_sec, **polling_kwargs)
+    condition_waits = [ConditionWait(condition_func=condition_func, timeout_sec=timeout_sec,
+                                     polling_profile=polling_profile, condition_msg=condition_msg)
+                       for condition_func, condition_msg in conditions]
+    if len(condition_waits) == 0:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(len(condition_waits) - 1, 1),
+                            thread_name_prefix='wait_for_conditions') as executor:
+        for condition_wait in condition_waits[1:]:
+            executor.submit(condition_wait.run)
+        condition_waits[0].run()
+
+    all_metrics = [condition_wait.result() for condition_wait in condition_waits]
+    not_met = [metrics.condition_msg for metrics in all_metrics if not metrics.is_condition_met]
+    assert len(not_met) == 0, f"Timeout: after waiting max {timeout_sec} seconds, " \
+                              f"these conditions were NOT met !!!: \n {not_met}"
+    logger.info(f"All the {len(all_metrics)} conditions were met")
+    return all_metrics
@@ -0,0 +1,150 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+MAX_WAIT_METRICS_TO_KEEP = 1000
+
+
+class PollingProfile:
+    """
+    Describes when to poll a condition:
+    * first poll is always done immediately
+    * during the first fast_poll_sec seconds, poll every fast_poll_interval_sec seconds
+    * after that, start with interval_sec and multiply the interval by backoff_factor after every poll, up to
+      max_interval_sec
+    * every interval is randomized by +-jitter_ratio so many waits will not hit the same target together
+    * the last poll is always done exactly at the deadline (never sleeps past it)
+    """
+
+    def __init__(self,
+                 interval_sec: float,
+                 backoff_factor: float = 1,
+                 max_interval_sec: float = None,
+                 jitter_ratio: float = 0,
+                 fast_poll_sec: float = 0,
+                 fast_poll_interval_sec: float = 1):
+        self.interval_sec = interval_sec
+        self.backoff_factor = backoff_factor
+        self.max_interval_sec = max_interval_sec
+        self.jitter_ratio = jitter_ratio
+        self.fast_poll_sec = fast_poll_sec
+        self.fast_poll_interval_sec = fast_poll_interval_sec
+
+    def get_interval(self, elapsed_sec: float, num_of_regular_polls: int) -> float:
+        if elapsed_sec < self.fast_poll_sec:
+            interval = self.fast_poll_interval_sec
+        else:
+            interval = self.interval_sec * (self.backoff_factor ** num_of_regular_polls)
+            if self.max_interval_sec is not None:
+                interval = min(interval, self.max_interval_sec)
+
+        if self.jitter_ratio > 0:
+            interval *= random.uniform(1 - self.jitter_ratio, 1 + self.jitter_ratio)
+
+        return max(interval, 0)
+
+
+class WaitMetrics:
+    """ Statistics of a single wait, can be used to tune timeouts and intervals according to real data """
+
+    def __init__(self, condition_msg: str, timeout_sec: float):
+        self.condition_msg = condition_msg
+        self.timeout_sec = timeout_sec
+        self.is_condition_met = False
+        self.num_of_polls = 0
+        self.elapsed_sec = None
+
+    def __repr__(self):
+        status = 'met' if self.is_condition_met else 'NOT met'
+        return f"WaitMetrics('{self.condition_msg}' {status} after {self.elapsed_sec:.2f} sec and " \
+               f"{self.num_of_polls} polls, timeout: {self.timeout_sec} sec)"
+
+
+_wait_metrics = deque(maxlen=MAX_WAIT_METRICS_TO_KEEP)
+_wait_metrics_lock = threading.Lock()
+
+
+def get_wait_metrics() -> List[WaitMetrics]:
+    with _wait_metrics_lock:
+        return list(_wait_metrics)
+
+
+def _record_wait_metrics(metrics: WaitMetrics):
+    logger.info(f"Wait finished: {metrics}")
+    with _wait_metrics_lock:
+        _wait_metrics.append(metrics)
+
+
+class ConditionWait:
+    """ State of a single wait, polled by the thread that runs it (run) """
+
+    def __init__(self, condition_func, timeout_sec: float, polling_profile: PollingProfile, condition_msg: str):
+        self._condition_func = condition_func
+        self._polling_profile = polling_profile
+        self._start_time = time.time()
+        self._deadline = self._start_time + timeout_sec
+        self._num_of_regular_polls = 0
+        self._done = threading.Event()
+        self._exception = None
+        self.next_poll_time = self._start_time
+        self.metrics = WaitMetrics(condition_msg=condition_msg, timeout_sec=timeout_sec)
+
+    @property
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def poll(self) -> bool:
+        """
+        Check the condition once and schedule the next poll
+        :return: True if the wait is done (condition met, deadline passed or condition raised an exception)
+        """
+        self.metrics.num_of_polls += 1
+        try:
+            is_condition_met = self._condition_func()
+        except Exception as e:
+            self._exception = e
+            self._finish(is_condition_met=False)
+            return True
+
+        now = time.time()
+        if is_condition_met or now >= self._deadline:
+            self._finish(is_condition_met=is_condition_met)
+            return True
+
+        elapsed_sec = now - self._start_time
+        interval = self._polling_profile.get_interval(elapsed_sec=elapsed_sec,
+                                                      num_of_regular_polls=self._num_of_regular_polls)
+        if elapsed_sec >= self._polling_profile.fast_poll_sec:
+            self._num_of_regular_polls += 1
+
+        # last chance poll exactly at the deadline
+        self.next_poll_time = min(now + interval, self._deadline)
+        return False
+
+    def run(self) -> WaitMetrics:
+        """ Poll in the calling thread until the wait is done """
+        while not self.poll():
+            time.sleep(max(self.next_poll_time - time.time(), 0))
+
+        return self.result()
+
+    def result(self, timeout: float = None) -> WaitMetrics:
+        """ Block until the wait is done and return its metrics, raise the exception of the condition if raised """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Wait for '{self.metrics.condition_msg}' is still running")
+
+        if self._exception is not None:
+            raise self._exception
+
+        return self.metrics
+
+    def _finish(self, is_condition_met: bool):
+        self.metrics.is_condition_met = is_condition_met
+        self.metrics.elapsed_sec = time.time() - self._start_time
+        _record_wait_metrics(self.metrics)
+        self._done.set()
@@ -3,6 +3,11 @@ import time
 from infra.allure_report_handler.reporter import Reporter
 
 
+def _is_retryable(e: Exception) -> bool:
+    """ Set is_retryable = False on an exception that should not be retried (for example after a partial side effect) """
+    return getattr(e, 'is_retryable', True)
+
+
 def short_retry(func):
     def inner(*args, **kwargs):
         num_retries = 3
@@ -13,7 +18,7 @@ def short_retry(func):
                 return func(*args, **kwargs)
             except Exception as e:
                 curr_try += 1
-                if curr_try == num_retries:
+                if curr_try == num_retries or not _is_retryable(e):
                     raise e
                 time.sleep(sleep_delay_sec)
                 Reporter.report(f"#{curr_try + 1} Try to invoke function with the name {func.__name__} failed, sleep {sleep_delay_sec} seconds ang trying again")
@@ -30,7 +35,7 @@ def retry(func):
                 return func(*args, **kwargs)
             except Exception as e:
                 curr_try += 1
-                if curr_try == num_retries:
+                if curr_try == num_retries or not _is_retryable(e):
                     raise e
                 time.sleep(sleep_delay_sec)
                 Reporter.report(f"#{curr_try + 1} Try to invoke function with the name {func.__name__} failed, sleep {sleep_delay_sec} seconds ang trying again")
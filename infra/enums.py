@@ -140,3 +140,9 @@ class CollectorConfigurationTypes(Enum):
 class DeploymentMethods(Enum):
     EXTERNAL = 'external'
     DIRECT = 'direct'
+
+
+class ReportMode(Enum):
+    FULL = 'full'  # allure step for every Reporter.report message
+    BUFFERED = 'buffered'  # consecutive messages are reported as a single step, repeated messages are collapsed
+    BUFFERED_FULL_LOG_ON_FAILURE = 'buffered_full_log_on_failure'  # buffered + all messages attached to failed tests
@@ -159,11 +159,13 @@ def _wait_for_system_load(host: str, timeout: int = 1.5*60):
             f'https://{host}',
             expected_status_code=200,
             verify_tls_certificate=False,
+            attach_to_report=False,
         )
         is_page_ready = 'SYSTEM INITIALIZING' not in response
         is_page_ready &= 'FIRST TIME ADMINISTRATOR LOGIN' not in response
         if not is_page_ready:
             time.sleep(15)
+    Reporter.report(f"https://{host} finished loading")
     return True
 
 
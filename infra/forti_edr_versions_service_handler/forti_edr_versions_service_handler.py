@@ -1,11 +1,25 @@
+import copy
+import logging
+import threading
+import time
+
 import allure
 
 import third_party_details
-from infra.enums import HttpRequestMethodsEnum
 from infra.utils.utils import HttpRequesterUtils
 
+logger = logging.getLogger(__name__)
+
+VERSIONS_CACHE_TTL_SEC = 60  # cached responses are revalidated against the service (If-None-Match) after this period
+VERSIONS_SERVICE_REQUEST_TIMEOUT = 60
+# number of the last content files that are searched when the service does not have the content_file_exists endpoint
+NUM_CONTENT_FILES_TO_SEARCH = 100
+
 
 class FortiEdrVersionsServiceHandler:
+    # url -> (etag, response content, time of the last validation against the service), shared by the whole session
+    _responses_cache = {}
+    _responses_cache_lock = threading.Lock()
 
     @staticmethod
     @allure.step('Extract latest versions from dedicated service of the base version: {base_version}')
@@ -24,9 +38,7 @@ class FortiEdrVersionsServiceHandler:
             f'{third_party_details.AUTOMATION_SERVICES_URL}/'
             f'latest_build?base_version={base_version}&num_builds={num_builds}'
         )
-        versions_dict = HttpRequesterUtils.send_request(request_method=HttpRequestMethodsEnum.GET,
-                                                        url=url,
-                                                        expected_status_code=200)
+        versions_dict = FortiEdrVersionsServiceHandler._get(url=url)
         return versions_dict
 
     @staticmethod
@@ -36,7 +48,68 @@ class FortiEdrVersionsServiceHandler:
             f'{third_party_details.AUTOMATION_SERVICES_URL}'
             f'/list_content?num_last_content_files={num_last_content_files}'
         )
-        versions_dict = HttpRequesterUtils.send_request(request_method=HttpRequestMethodsEnum.GET,
-                                                        url=url,
-                                                        expected_status_code=200)
+        versions_dict = FortiEdrVersionsServiceHandler._get(url=url)
         return versions_dict
+
+    @staticmethod
+    @allure.step("Check if content file {content_file_name} exists in shared folder")
+    def is_content_file_exist_in_shared_folder(content_file_name: str) -> bool:
+        """
+        :param content_file_name: for example FortiEDRCollectorContent-1234.nslo
+        """
+        url = (
+            f'{third_party_details.AUTOMATION_SERVICES_URL}'
+            f'/content_file_exists?content_file_name={content_file_name}'
+        )
+        # not memoized, callers poll until a new content file appears
+        result = FortiEdrVersionsServiceHandler._get(url=url, use_cache=False, none_if_not_found=True)
+        if result is not None:
+            return result.get('exists')
+
+        logger.info("Versions service does not have the content_file_exists endpoint (deployed before it was added), "
+                    f"searching the last {NUM_CONTENT_FILES_TO_SEARCH} content files")
+        url = (
+            f'{third_party_details.AUTOMATION_SERVICES_URL}'
+            f'/list_content?num_last_content_files={NUM_CONTENT_FILES_TO_SEARCH}'
+        )
+        return content_file_name in FortiEdrVersionsServiceHandler._get(url=url, use_cache=False)
+
+    @staticmethod
+    def _get(url: str, use_cache: bool = True, none_if_not_found: bool = False):
+        """
+        Send GET request to the versions service, the responses are memoized for VERSIONS_CACHE_TTL_SEC, after that
+        the request is sent with the ETag of the cached response so an unchanged response is not transferred again.
+        :param none_if_not_found: True - return None if the service answers 404 (endpoint does not exist)
+        :return: copy of the response content, callers may change it
+        """
+        with FortiEdrVersionsServiceHandler._responses_cache_lock:
+            cached_response = FortiEdrVersionsServiceHandler._responses_cache.get(url)
+
+        if cached_response is not None:
+            etag, content, validation_time = cached_response
+            if use_cache and time.time() - validation_time < VERSIONS_CACHE_TTL_SEC:
+                logger.debug(f"Response of {url} is taken from cache")
+                return copy.deepcopy(content)
+
+        headers = None
+        if cached_response is not None and cached_response[0] is not None:
+            headers = {'If-None-Match': cached_response[0]}
+
+        session = HttpRequesterUtils.get_session(url=url)
+        response = session.get(url=url, headers=headers, timeout=VERSIONS_SERVICE_REQUEST_TIMEOUT)
+
+        if response.status_code == 404 and none_if_not_found:
+            return None
+
+        if response.status_code == 304:
+            logger.debug(f"Response of {url} was not changed since the last request")
+            content = cached_response[1]
+        else:
+            assert response.status_code == 200, \
+                f"expected status code is: 200, actual status code is: {response.status_code}, url: {url}"
+            content = response.json()
+
+        with FortiEdrVersionsServiceHandler._responses_cache_lock:
+            FortiEdrVersionsServiceHandler._responses_cache[url] = (response.headers.get('ETag'), content, time.time())
+
+        return copy.deepcopy(content)
@@ -1,15 +1,28 @@
 import json
+import logging
+import queue
+import threading
+import time
 from enum import Enum
+from typing import Dict
 
-import allure
 import requests
 
 import third_party_details
-from infra.allure_report_handler.reporter import Reporter
 from infra.system_components.aggregator import Aggregator
 from infra.system_components.collector import CollectorAgent
 from infra.system_components.core import Core
 from infra.system_components.management import Management
+from infra.utils.utils import HttpRequesterUtils
+
+logger = logging.getLogger(__name__)
+
+JIRA_BATCH_WINDOW_SEC = 5  # results that are published within this window are sent in a single import call
+JIRA_MAX_TESTS_PER_BATCH = 100
+JIRA_PUBLISH_MAX_RETRIES = 3
+JIRA_PUBLISH_BACKOFF_SEC = 2
+JIRA_REQUEST_TIMEOUT = 60
+JIRA_FLUSH_TIMEOUT = 5 * 60
 
 
 class JiraConfiguration:
@@ -40,6 +53,12 @@ class JiraXrayHandler:
         self._aggregator = None
         self._core = None
         self._collector = None
+        self._results_queue = queue.Queue()
+        # results that were not published since Jira was not reachable, they are published with the next batch of
+        # the same session (only the publisher thread changes it)
+        self._spooled_results = {}
+        self._publisher_thread = None
+        self._publisher_lock = threading.Lock()
 
     @property
     def mark(self):
@@ -82,22 +101,117 @@ class JiraXrayHandler:
         self._collector = collector
 
     def publish_test_result(self, test_key, status: TestStatusEnum):
-        test = dict(testKey=test_key, status=status.value)
+        """
+        Queue the result of the test, results are published by a background thread, so Jira latency (and the creation
+        of the test execution) does not add to the test time.
+        Results of the same test that are published within the same batch are coalesced, the last status wins
+        (same as the last import call won before).
+        """
+        self._start_publisher()
+        self._results_queue.put((test_key, status.value))
+
+    def flush(self, timeout: float = JIRA_FLUSH_TIMEOUT):
+        """
+        Block until all the queued (and spooled) results were published, results that could not be published are
+        reported to the log (they belong to the execution of this session, so they are not kept for the next one)
+        """
+        if self._publisher_thread is None:
+            return
+
+        flush_event = threading.Event()
+        self._results_queue.put(flush_event)
+        if not flush_event.wait(timeout):
+            logger.error(f"Results were not published to Jira within {timeout} seconds")
+            return
+
+        if len(self._spooled_results) > 0:
+            logger.error(f"These test results were not published to Jira execution {self.execution_key}: "
+                         f"{self._spooled_results}")
+
+    def _start_publisher(self):
+        with self._publisher_lock:
+            if self._publisher_thread is None or not self._publisher_thread.is_alive():
+                self._publisher_thread = threading.Thread(target=self._publish_results_in_background,
+                                                          name='jira_xray_publisher',
+                                                          daemon=True)
+                self._publisher_thread.start()
+
+    def _publish_results_in_background(self):
+        while True:
+            results = {}
+            flush_event = None
+            item = self._results_queue.get()
+            deadline = time.time() + JIRA_BATCH_WINDOW_SEC
+            while True:
+                if isinstance(item, threading.Event):
+                    flush_event = item
+                    break
+
+                test_key, status = item
+                results[test_key] = status
+                if len(results) >= JIRA_MAX_TESTS_PER_BATCH:
+                    break
+
+                try:
+                    item = self._results_queue.get(timeout=max(deadline - time.time(), 0))
+                except queue.Empty:
+                    break
+
+            if len(results) > 0 or flush_event is not None:
+                self._publish_batch(results=results)
+
+            if flush_event is not None:
+                flush_event.set()
+
+    def _publish_batch(self, results: Dict[str, str]):
+        """
+        Publish the results together with the results that were spooled since Jira was not reachable,
+        if Jira is still not reachable all of them are spooled (and published with the next batch)
+        """
+        all_results = {**self._spooled_results, **results}
+        if len(all_results) == 0:
+            return
+
+        try:
+            self._import_results(results=all_results)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(all_results)} test results to Jira, they will be published with "
+                         f"the next batch, original exception: {e}")
+            self._spooled_results = all_results
+            return
+
+        self._spooled_results = {}
+
+    def _import_results(self, results: Dict[str, str]):
         execution_key = self.get_execution_key()
-        data = dict(testExecutionKey=execution_key, tests=[test])
-        data_as_json = json.dumps(data)
+        tests = [dict(testKey=test_key, status=status) for test_key, status in results.items()]
+        data_as_json = json.dumps(dict(testExecutionKey=execution_key, tests=tests))
         endpoint = f'{self.base_url}/rest/raven/2.0/import/execution'
-        try:
-            response = requests.post(url=endpoint, headers=self.headers, data=data_as_json, auth=self.auth, verify=False)
-            if not 200 <= response.status_code < 300:
-                content = None
-                try:
-                    content = json.loads(response.content)
-                finally:
-                    assert False, f"Failed to publish test reults to Jira, test_key: {test}, statuse code: {response.status_code}, response content: {content}"
-        except requests.exceptions.ConnectionError as e:
-            Reporter.report('Fail to publish test result to Jira')
-            raise e
+        session = HttpRequesterUtils.get_session(url=endpoint)
+
+        error = None
+        for attempt in range(JIRA_PUBLISH_MAX_RETRIES):
+            try:
+                response = session.post(url=endpoint, headers=self.headers, data=data_as_json, auth=self.auth,
+                                        verify=False, timeout=JIRA_REQUEST_TIMEOUT)
+                if 200 <= response.status_code < 300:
+                    logger.info(f"Published {len(tests)} test results to Jira execution {execution_key}")
+                    return
+
+                if response.status_code < 500:
+                    # the request itself is wrong, it will not succeed later either, so it is not spooled
+                    logger.error(f"Failed to publish test results to Jira, tests: {tests}, "
+                                 f"status code: {response.status_code}, response content: {response.content}")
+                    return
+
+                error = f"status code: {response.status_code}, response content: {response.content}"
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            if attempt < JIRA_PUBLISH_MAX_RETRIES - 1:
+                time.sleep(JIRA_PUBLISH_BACKOFF_SEC * 2 ** attempt)
+
+        raise Exception(f"Failed to publish test results to Jira after {JIRA_PUBLISH_MAX_RETRIES} attempts, {error}")
 
     def get_execution_key(self):
         if self.execution_key is None:
@@ -105,8 +219,8 @@ class JiraXrayHandler:
 
         return self.execution_key
 
-    @allure.step("Create test execution in Jira")
     def create_test_execution(self):
+        logger.info("Create test execution in Jira")
 
         collector_os_architecture = self.collector.os_station.os_architecture.replace(' ', '-')
         collector_os_version = self.collector.os_station.os_version.replace(' ', '-')
@@ -146,7 +260,9 @@ class JiraXrayHandler:
         }
         data_as_json = json.dumps(fields)
         endpoint = f'{self.base_url}/rest/api/latest/issue'
-        response = requests.post(url=endpoint, headers=self.headers, data=data_as_json, auth=self.auth, verify=False)
+        session = HttpRequesterUtils.get_session(url=endpoint)
+        response = session.post(url=endpoint, headers=self.headers, data=data_as_json, auth=self.auth, verify=False,
+                                timeout=JIRA_REQUEST_TIMEOUT)
         if not 200 <= response.status_code < 300:
             content = None
             try:
@@ -1,4 +1,8 @@
+import base64
+import codecs
 import re
+import select
+import socket
 from datetime import datetime
 from typing import List
 from infra.enums import LinuxDistroTypes
@@ -8,7 +12,9 @@ import paramiko
 import third_party_details
 from infra.allure_report_handler.reporter import Reporter, INFO
 from infra.decorators import retry
-from infra.os_stations.os_station_base import OsStation
+from infra.os_stations.os_station_base import OsStation, CommandResult, ResourcesUsage, MAX_OUTPUT_SIZE_TO_ATTACH
+from infra.os_stations.ssh_async_command import SshAsyncCommand
+from infra.os_stations.log_cursor import LogFilePosition, LogsCursor
 from infra.utils.utils import StringUtils
 from infra.common_utils import wait_for_condition
 from .linux_distros import LinuxDistroDetails
@@ -16,22 +22,47 @@ import logging
 logger = logging.getLogger(__name__)
 
 INTERVAL_STATION_KEEPALIVE = 5
+MAX_INTERVAL_STATION_KEEPALIVE = 30  # a rebooting machine is polled less often as time goes by
+STATION_KEEPALIVE_BACKOFF_FACTOR = 1.5
 WAIT_FOR_STATION_UP_TIMEOUT = 4 * 60
 WAIT_FOR_STATION_DOWN_TIMEOUT = 2 * 60
 COLLECTOR_TEMP_PATH = "/tmp"
 COLLECTOR_EDR_EVENT_TESTER_PATH = f"{COLLECTOR_TEMP_PATH}/edr_event_tester"
+OUTPUT_READ_CHUNK_SIZE = 32 * 1024
+OS_ARCHITECTURE_CMD = 'arch'
+OS_VERSION_CMD = 'hostnamectl | grep -i "Kernel"'
+OS_NAME_CMD = 'hostnamectl | grep -i "Operating System"'
+CPU_USAGE_CMD = 'top -b -n 1'
+MEMORY_USAGE_CMD = 'free'
+DISK_USAGE_CMD = "df -h / | awk '{print $5}'"
 
 
 class LinuxStation(OsStation):
 
-    def __init__(self, host_ip: str, user_name: str, password: str):
+    def __init__(self, host_ip: str, user_name: str, password: str, prefetch_details: bool = False):
+        """
+        :param prefetch_details: True - resolve the OS details and the vSphere vm in background right away
+        """
         OsStation.__init__(self, host_ip=host_ip, user_name=user_name, password=password)
-        self.distro_type = self.get_distro_type()
-        self.distro_data = LinuxDistroDetails(self.distro_type)
+        self._distro_type: LinuxDistroTypes | None = None  # resolved together with the OS details
+        self._distro_data: LinuxDistroDetails | None = None
         self.__collector_installation_path: str = ""
         self.__collector_config_folder: str = ""
 
         self.__qa_files_path: str = COLLECTOR_TEMP_PATH
+        if prefetch_details:
+            self.prefetch_details()
+
+    @property
+    def distro_type(self) -> LinuxDistroTypes:
+        self._resolve_os_details()
+        return self._distro_type
+
+    @property
+    def distro_data(self) -> LinuxDistroDetails:
+        if self._distro_data is None:
+            self._distro_data = LinuxDistroDetails(self.distro_type)
+        return self._distro_data
 
     @retry
     def connect(self):
@@ -58,30 +89,51 @@ class LinuxStation(OsStation):
     @retry
     @allure.step("Executing command: {cmd}")
     def execute_cmd(self, cmd: str, return_output: bool = True, fail_on_err: bool = False, timeout: int = 180,
-                    attach_output_to_report: bool = True, asynchronous: bool = False):
-
+                    attach_output_to_report: bool = True, asynchronous: bool = False,
+                    line_callback=None, max_output_size: int = None):
+        """
+        :param asynchronous: True - the command is started in background and a SshAsyncCommand handle is returned
+        instead of the output, use it in order to poll/wait/read the output/kill the command.
+        :param line_callback: function that is called with every stdout line as soon as the line is received,
+        if the command fails after lines were passed to it, the command is not retried (lines would be passed again)
+        :param max_output_size: max bytes of stdout/stderr to keep in memory, the rest is dropped (but still passed
+        to line_callback), None - no limit
+        """
         if asynchronous:
-            raise Exception("Can not execute asynchronous command via ssh with paramiko library")
+            return self._execute_async_cmd(cmd=cmd)
+
+        num_of_streamed_lines = 0
+
+        def streaming_line_callback(line: str):
+            nonlocal num_of_streamed_lines
+            num_of_streamed_lines += 1
+            line_callback(line)
 
         try:
             self.establish_ssh_active_session()
             stdin, stdout, stderr = self._remote_connection_session.exec_command(command=cmd, timeout=timeout)
 
-            if return_output or attach_output_to_report:
-                stdout_output = stdout.read()
-                stdout_output = stdout_output.decode('utf-8')
-
-                stderr_err_output = stderr.read()
-                stderr_err_output = stderr_err_output.decode('utf-8')
+            if return_output or attach_output_to_report or line_callback is not None:
+                output_line_callback = streaming_line_callback if line_callback is not None else None
+                # when the output is consumed only by the callback, there is no need to keep stdout in memory
+                keep_stdout = return_output or attach_output_to_report
+                stdout_output, stderr_err_output, is_truncated = self._read_cmd_output(channel=stdout.channel,
+                                                                                       timeout=timeout,
+                                                                                       line_callback=output_line_callback,
+                                                                                       max_output_size=max_output_size,
+                                                                                       keep_stdout=keep_stdout)
 
                 output = stdout_output if stdout_output != '' else stderr_err_output if stderr_err_output != '' else None
                 if output is not None:
                     output = self.__escape_ansi(output).strip()
 
+                if is_truncated:
+                    Reporter.report(f"Command output is bigger than {max_output_size} bytes, the rest was dropped")
+
                 if attach_output_to_report:
                     if output is not None and len(output) > 1000:
 
-                        if len(output) < 2000000:
+                        if len(output) < MAX_OUTPUT_SIZE_TO_ATTACH:
                             Reporter.attach_str_as_file(file_name='command output', file_content=output)
                         else:
                             Reporter.report("Content is to big to attach to allure report, sorry")
@@ -99,8 +151,152 @@ class LinuxStation(OsStation):
         except Exception as e:
             Reporter.report(f'Failed to execute command {cmd} on remote Linux machine, original exception: {e}')
             self.disconnect()
+            if num_of_streamed_lines > 0:
+                e.is_retryable = False
+            raise e
+
+    def iter_cmd_output_lines(self, cmd: str, timeout: int = 180):
+        """
+        Generator that yields the stdout lines of the command as soon as they are received, without keeping the
+        whole output in memory, so it can be used for huge outputs (cat/grep of big log files).
+        stderr of the command is ignored.
+        """
+        Reporter.report(f"Streaming output of command: {cmd}")
+        try:
+            self.establish_ssh_active_session()
+            stdin, stdout, stderr = self._remote_connection_session.exec_command(command=cmd, timeout=timeout)
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            partial_line = ''
+            for is_stderr, chunk in self._iter_channel_output(channel=stdout.channel, timeout=timeout):
+                if is_stderr:
+                    continue
+
+                *lines, partial_line = (partial_line + decoder.decode(chunk)).split('\n')
+                for line in lines:
+                    yield self.__escape_ansi(line.rstrip('\r'))
+
+            partial_line += decoder.decode(b'', final=True)
+            if partial_line != '':
+                yield self.__escape_ansi(partial_line.rstrip('\r'))
+
+        except Exception as e:
+            Reporter.report(f'Failed to stream output of command {cmd} on remote Linux machine, original exception: {e}')
+            self.disconnect()
+            raise e
+
+    def _read_cmd_output(self, channel: paramiko.Channel, timeout: int, line_callback=None,
+                         max_output_size: int = None, keep_stdout: bool = True) -> (str, str, bool):
+        """
+        Read stdout and stderr of the command chunk by chunk
+        :param keep_stdout: False - stdout is only passed to line_callback and an empty stdout is returned
+        :return: stdout, stderr and whether part of the output was dropped because of max_output_size
+        """
+        stdout_chunks, stderr_chunks = [], []
+        stdout_size, stderr_size = 0, 0
+        is_truncated = False
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        partial_line = ''
+
+        for is_stderr, chunk in self._iter_channel_output(channel=channel, timeout=timeout):
+            if not is_stderr and line_callback is not None:
+                *lines, partial_line = (partial_line + decoder.decode(chunk)).split('\n')
+                for line in lines:
+                    line_callback(self.__escape_ansi(line.rstrip('\r')))
+
+            if not is_stderr and not keep_stdout:
+                continue
+
+            kept_size = stderr_size if is_stderr else stdout_size
+            if max_output_size is not None and kept_size + len(chunk) > max_output_size:
+                is_truncated = True
+                chunk = chunk[:max(max_output_size - kept_size, 0)]
+
+            if is_stderr:
+                stderr_chunks.append(chunk)
+                stderr_size += len(chunk)
+            else:
+                stdout_chunks.append(chunk)
+                stdout_size += len(chunk)
+
+        if line_callback is not None:
+            partial_line += decoder.decode(b'', final=True)
+            if partial_line != '':
+                line_callback(self.__escape_ansi(partial_line.rstrip('\r')))
+
+        stdout_output = b''.join(stdout_chunks).decode('utf-8', errors='replace')
+        stderr_err_output = b''.join(stderr_chunks).decode('utf-8', errors='replace')
+        return stdout_output, stderr_err_output, is_truncated
+
+    @staticmethod
+    def _iter_channel_output(channel: paramiko.Channel, timeout: int):
+        """
+        Yields (is_stderr, chunk) as soon as data is received on one of the streams.
+        Both streams are drained together, so the command can not get stuck on a full stderr window while
+        we are waiting for stdout (or the opposite).
+        The exit status can arrive before the last output packets, so the output ends only at EOF of the channel.
+        """
+        while True:
+            has_data = False
+            while channel.recv_ready():
+                has_data = True
+                yield False, channel.recv(OUTPUT_READ_CHUNK_SIZE)
+
+            while channel.recv_stderr_ready():
+                has_data = True
+                yield True, channel.recv_stderr(OUTPUT_READ_CHUNK_SIZE)
+
+            is_finished = channel.eof_received or channel.closed
+            if is_finished and not channel.recv_ready() and not channel.recv_stderr_ready():
+                return
+
+            if not has_data:
+                # the channel is readable when data is received on one of the streams or when the channel is closed
+                readable, _, _ = select.select([channel], [], [], timeout)
+                if len(readable) == 0:
+                    raise socket.timeout(f"No output was received from the command for {timeout} seconds")
+
+    def _execute_async_cmd(self, cmd: str) -> SshAsyncCommand:
+        try:
+            self.establish_ssh_active_session()
+            async_command = SshAsyncCommand(cmd=cmd, transport=self._remote_connection_session.get_transport())
+            Reporter.report(f"Command started in background, pid: {async_command.pid}")
+            return async_command
+
+        except Exception as e:
+            Reporter.report(f'Failed to start command {cmd} on remote Linux machine, original exception: {e}')
+            self.disconnect()
+            raise e
+
+    @allure.step("Executing batch of commands: {commands}")
+    def execute_batch(self, commands: List[str], timeout: int = 180,
+                      attach_output_to_report: bool = True) -> List[CommandResult]:
+        marker = self._generate_batch_marker()
+        script = ''
+        for index, cmd in enumerate(commands):
+            # each command runs in a sub shell so 'cd', 'exit' etc. will not affect the next commands
+            script += f"echo '{marker}:START:{index}'; echo '{marker}:START:{index}' >&2\n" \
+                      f"( {cmd}\n)\n" \
+                      f"printf '\\n%s\\n' \"{marker}:END:{index}:$?\"; printf '\\n%s\\n' '{marker}:END:{index}' >&2\n"
+
+        try:
+            self.establish_ssh_active_session()
+            stdin, stdout, stderr = self._remote_connection_session.exec_command(command=script, timeout=timeout)
+            stdout_output, stderr_err_output, _ = self._read_cmd_output(channel=stdout.channel, timeout=timeout)
+            stdout_output = self.__escape_ansi(stdout_output)
+            stderr_err_output = self.__escape_ansi(stderr_err_output)
+
+        except Exception as e:
+            Reporter.report(f'Failed to execute batch of commands on remote Linux machine, original exception: {e}')
+            self.disconnect()
             raise e
 
+        results = self._parse_batch_output(commands=commands, marker=marker,
+                                           stdout=stdout_output, stderr=stderr_err_output)
+        if attach_output_to_report:
+            self._report_batch_results(results)
+
+        return results
+
     def establish_ssh_active_session(self):
         ssh_client = self._remote_connection_session
         if ssh_client is not None:
@@ -110,9 +306,16 @@ class LinuxStation(OsStation):
         elif ssh_client is None:
             self.connect()
 
+    def _init_os_details(self):
+        version_result, name_result, architecture_result = self.execute_batch(
+            commands=[OS_VERSION_CMD, OS_NAME_CMD, OS_ARCHITECTURE_CMD])
+        self._os_version = self._parse_os_version(version_result.output)
+        self._os_name = self._parse_os_name(name_result.output)
+        self._os_architecture = architecture_result.output
+        self._distro_type = self._parse_distro_type(self._os_name)
+
     def get_os_architecture(self):
-        cmd = 'arch'
-        result = self.execute_cmd(cmd=cmd, return_output=True)
+        result = self.execute_cmd(cmd=OS_ARCHITECTURE_CMD, return_output=True)
         return result
 
     def get_hostname(self):
@@ -125,16 +328,20 @@ class LinuxStation(OsStation):
         return package_installed_name
 
     def get_os_version(self):
-        cmd = 'hostnamectl | grep -i "Kernel"'
-        result = self.execute_cmd(cmd=cmd, return_output=True)
-        ver = StringUtils.get_txt_by_regex(text=result, regex='Kernel:\s+(.+)', group=1)
-        return ver
+        result = self.execute_cmd(cmd=OS_VERSION_CMD, return_output=True)
+        return self._parse_os_version(result)
+
+    @staticmethod
+    def _parse_os_version(output: str) -> str:
+        return StringUtils.get_txt_by_regex(text=output, regex='Kernel:\s+(.+)', group=1)
 
     def get_os_name(self):
-        cmd = 'hostnamectl | grep -i "Operating System"'
-        result = self.execute_cmd(cmd=cmd, return_output=True)
-        os_name = StringUtils.get_txt_by_regex(text=result, regex='Operating\s+System:\s+(.+)', group=1)
-        return os_name
+        result = self.execute_cmd(cmd=OS_NAME_CMD, return_output=True)
+        return self._parse_os_name(result)
+
+    @staticmethod
+    def _parse_os_name(output: str) -> str:
+        return StringUtils.get_txt_by_regex(text=output, regex='Operating\s+System:\s+(.+)', group=1)
 
     def stop_service(self, service_name: str):
         raise Exception("Not Implemented yet")
@@ -193,14 +400,18 @@ class LinuxStation(OsStation):
             return result
 
         wait_for_condition(condition_func=predict, timeout_sec=timeout,
-                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is unreachable")
+                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is unreachable",
+                           backoff_factor=STATION_KEEPALIVE_BACKOFF_FACTOR,
+                           max_interval_sec=MAX_INTERVAL_STATION_KEEPALIVE, jitter_ratio=0.1)
 
     @allure.step("Wait until machine is reachable")
     def wait_until_machine_is_reachable(self, timeout=None):
         timeout = timeout or WAIT_FOR_STATION_UP_TIMEOUT
         predict_condition_func = self.is_reachable
         wait_for_condition(condition_func=predict_condition_func, timeout_sec=timeout,
-                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is reachable")
+                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is reachable",
+                           backoff_factor=STATION_KEEPALIVE_BACKOFF_FACTOR,
+                           max_interval_sec=MAX_INTERVAL_STATION_KEEPALIVE, jitter_ratio=0.1)
 
     @allure.step("Get current linux machine date time")
     def get_current_machine_datetime(self, date_format="%d/%m/%Y %H:%M:%S"):
@@ -260,6 +471,52 @@ class LinuxStation(OsStation):
         files_paths = [f'{folder_path}/{file_name}' for file_name in files_names]
         return files_paths
 
+    def get_files_positions(self, folder_path: str, file_suffix: str = None) -> List[LogFilePosition]:
+        """
+        Inode and size of all the files inside the folder, fetched with a single command
+        :param folder_path: folder to check (not recursive)
+        :param file_suffix: same filter as in get_list_of_files_in_folder, only files that contain it in their name
+        """
+        cmd = f"find {folder_path} -maxdepth 1 -type f -printf '%i %s %p\\n'"
+        output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=True, attach_output_to_report=False)
+        positions = []
+        if output is None:
+            return positions
+
+        for line in output.split('\n'):
+            parts = line.split(' ', 2)
+            if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+                continue
+
+            inode, size, file_path = parts
+            if file_suffix is not None and file_suffix not in file_path.split('/')[-1]:
+                continue
+
+            positions.append(LogFilePosition(file_path=file_path, inode=int(inode), size=int(size)))
+
+        return positions
+
+    @allure.step("Create logs cursor of the folder {folder_path}")
+    def create_logs_cursor(self, folder_path: str, file_suffix: str = None) -> LogsCursor:
+        positions = self.get_files_positions(folder_path=folder_path, file_suffix=file_suffix)
+        return LogsCursor(folder_path=folder_path, file_suffix=file_suffix, positions=positions)
+
+    def iter_logs_appended_after_cursor(self, cursor: LogsCursor):
+        """
+        Generator that yields (file path, content) of every log file that was written after the cursor was created,
+        the content holds only the bytes written after the cursor (read with tail -c, not by parsing timestamps),
+        so files are fetched one by one and the unchanged ones are not fetched at all.
+        """
+        for position in self.get_files_positions(folder_path=cursor.folder_path, file_suffix=cursor.file_suffix):
+            start_offset = cursor.get_start_offset(current_position=position)
+            if position.size <= start_offset:
+                continue
+
+            # the file might grow between find and tail, take only up to the size that was seen by find
+            cmd = f'tail -c +{start_offset + 1} {position.file_path} | head -c {position.size - start_offset}'
+            content = '\n'.join(self.iter_cmd_output_lines(cmd=cmd))
+            yield position.file_path, content
+
     @allure.step("Get files inside {folder_path} include file size and datetime")
     def get_files_details(self, folder_path: str) -> List[dict]:
         raise NotImplemented("Should be implemented")
@@ -283,32 +540,54 @@ class LinuxStation(OsStation):
 
     @allure.step("Get CPU usage")
     def get_cpu_usage(self) -> float:
-        info = self.execute_cmd("top -b -n 1")
-        cpu_usage = float(str(info).split("%Cpu(s):  ")[1].split(" us")[0])
+        info = self.execute_cmd(CPU_USAGE_CMD)
+        cpu_usage = self._parse_cpu_usage(info)
         Reporter.report(f"CPU usage: {cpu_usage}%")
         return cpu_usage
 
     @allure.step("Get memory usage")
     def get_memory_usage(self) -> float:
-        info = self.execute_cmd("free")
-        memory_total = self.execute_cmd("free | grep Mem: | awk '{print $2}'")
-        memory_used = self.execute_cmd("free | grep Mem: | awk '{print $3}'")
-        mem_usage = float(int(memory_used)/int(memory_total)) * 100
+        info = self.execute_cmd(MEMORY_USAGE_CMD)
+        mem_usage = self._parse_memory_usage(info)
         Reporter.report(f"Memory usage: {mem_usage}")
         return mem_usage
 
     @allure.step("Get disk usage")
     def get_disk_usage(self) -> float:
-        output = self.execute_cmd("df -h / | awk '{print $5}'")
-        results = re.findall(r'\d+', output)
-        if results is None or len(results) != 1:
-            Reporter.report("Can not extract disk usage, please look at the command output")
-
-        disk_usage = float(results[0])
+        output = self.execute_cmd(DISK_USAGE_CMD)
+        disk_usage = self._parse_disk_usage(output)
         Reporter.report(f"Disk usage: {disk_usage}")
 
         return disk_usage
 
+    @allure.step("Get CPU, memory and disk usage")
+    def get_resources_usage(self) -> ResourcesUsage:
+        cpu_result, memory_result, disk_result = self.execute_batch(
+            commands=[CPU_USAGE_CMD, MEMORY_USAGE_CMD, DISK_USAGE_CMD], attach_output_to_report=False)
+        resources_usage = ResourcesUsage(cpu=self._parse_cpu_usage(cpu_result.output),
+                                         memory=self._parse_memory_usage(memory_result.output),
+                                         disk=self._parse_disk_usage(disk_result.output))
+        Reporter.report(f"Resources usage: {resources_usage}")
+        return resources_usage
+
+    @staticmethod
+    def _parse_cpu_usage(top_output: str) -> float:
+        return float(str(top_output).split("%Cpu(s):  ")[1].split(" us")[0])
+
+    @staticmethod
+    def _parse_memory_usage(free_output: str) -> float:
+        # total and used memory are taken from the 'Mem:' row of the same output
+        memory_total, memory_used = re.search(r'Mem:\s+(\d+)\s+(\d+)', free_output).groups()
+        return float(int(memory_used)/int(memory_total)) * 100
+
+    @staticmethod
+    def _parse_disk_usage(df_output: str) -> float:
+        results = re.findall(r'\d+', df_output)
+        if results is None or len(results) != 1:
+            Reporter.report("Can not extract disk usage, please look at the command output")
+
+        return float(results[0])
+
     @allure.step("Get {service_identifier} service process ID")
     def get_service_process_ids(self, service_identifier: str) -> List[int]:
         # pid_of_fortiedr_scanner in old infra
@@ -336,15 +615,11 @@ class LinuxStation(OsStation):
     def is_path_exist(self, path: str) -> bool:
         expected_message = "exist"
 
-        # check if dir exist
-        cmd = f'[ -d {path} ] && echo "{expected_message}"'
-        result_dir = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True)
-
-        # check if file exist
-        cmd = f'[ -f {path} ] && echo "{expected_message}"'
-        result_file = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True)
+        # check if dir or file exist in one round trip
+        cmd = f'{{ [ -d {path} ] || [ -f {path} ]; }} && echo "{expected_message}"'
+        result = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True)
 
-        if (result_dir is not None and expected_message in result_dir) or (result_file is not None and expected_message in result_file):
+        if result is not None and expected_message in result:
             Reporter.report(f"Path {path} exist!")
             return True
 
@@ -475,8 +750,29 @@ class LinuxStation(OsStation):
         output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=True)
         return output
 
+    def get_file_size(self, file_path: str) -> int:
+        output = self.execute_cmd(cmd=f'stat -c %s {file_path}', return_output=True, fail_on_err=True,
+                                  attach_output_to_report=False)
+        return int(output)
+
+    def read_file_bytes(self, file_path: str, offset: int, size: int) -> bytes:
+        # base64 so the bytes are returned as is, without decoding them to text
+        cmd = f'tail -c +{offset + 1} {file_path} | head -c {size} | base64 -w 0'
+        output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=True, attach_output_to_report=False)
+        return base64.b64decode(output) if output is not None else b''
+
+    def get_file_content_from_offset(self, file_path: str, offset: int) -> str:
+        return '\n'.join(self.iter_cmd_output_lines(cmd=f'tail -c +{offset + 1} {file_path}'))
+
     def get_distro_type(self):
-        os_name = self.os_name.lower()
+        return self._parse_distro_type(self.os_name)
+
+    @staticmethod
+    def _parse_distro_type(os_name: str | None) -> LinuxDistroTypes | None:
+        if os_name is None:
+            return None
+
+        os_name = os_name.lower()
         if "ubuntu" in os_name:
             return LinuxDistroTypes.UBUNTU
         elif "centos" in os_name:
@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+
+class LogFilePosition:
+    """ Size of a log file at a point in time, the inode identifies the file even after it was renamed (rotated) """
+
+    def __init__(self, file_path: str, inode: int, size: int):
+        self.file_path = file_path
+        self.inode = inode
+        self.size = size
+
+    def __repr__(self):
+        return f"LogFilePosition({self.file_path}, inode={self.inode}, size={self.size})"
+
+
+class LogsCursor:
+    """
+    Positions of all the log files of a folder at a point in time (usually the test start), so later only the bytes
+    that were appended after it can be fetched.
+    Positions are matched by inode and not by path:
+    * a file that was rotated (renamed, for example x.log -> x.log.1) is read from the position of its old name
+    * a file that was created after the cursor (including the new file of a rotated path) is read from the start
+    * a file that became smaller than its position (truncated) is read from the start
+    """
+
+    def __init__(self, folder_path: str, file_suffix: str, positions: List[LogFilePosition]):
+        self._folder_path = folder_path
+        self._file_suffix = file_suffix
+        self._positions_by_inode: Dict[int, LogFilePosition] = {position.inode: position for position in positions}
+
+    @property
+    def folder_path(self) -> str:
+        return self._folder_path
+
+    @property
+    def file_suffix(self) -> str:
+        return self._file_suffix
+
+    @property
+    def positions(self) -> List[LogFilePosition]:
+        return list(self._positions_by_inode.values())
+
+    def get_start_offset(self, current_position: LogFilePosition) -> int:
+        """
+        :return: byte offset in the file (as it is now) from which the content was written after the cursor
+        """
+        cursor_position = self._positions_by_inode.get(current_position.inode)
+        if cursor_position is None or current_position.size < cursor_position.size:
+            return 0
+        return cursor_position.size
+
+    def __repr__(self):
+        return f"LogsCursor({self._folder_path}, {len(self._positions_by_inode)} files)"
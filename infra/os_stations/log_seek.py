@@ -0,0 +1,121 @@
+"""
+Binary search of a log file that is sorted by time, by byte offset, so only the part of the log that was written
+after a given time stamp has to be transferred from the remote machine.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+SEEK_SAMPLE_SIZE = 16 * 1024
+
+
+class LogTimestampSeeker:
+    """
+    Finds the offset of the first log line with time stamp >= the given one while reading only small samples of the
+    file: every probe reads a sample from the middle of the current range, skips the partial line it landed on and
+    parses the time stamp of the first complete line.
+    Lines without time stamp (stack traces, multi line messages) belong to the line before them, so they are never
+    returned as the start.
+    """
+
+    def __init__(self,
+                 read_bytes: Callable[[int, int], bytes],
+                 file_size: int,
+                 timestamp_regex: str,
+                 timestamp_format: str,
+                 sample_size: int = SEEK_SAMPLE_SIZE):
+        """
+        :param read_bytes: function(offset, size) that returns up to size bytes of the file from the given offset
+        :param timestamp_regex: regex of the time stamp inside a log line
+        :param timestamp_format: datetime format of the time stamp, for example "%d/%m/%Y %H:%M:%S"
+        """
+        self._read_bytes = read_bytes
+        self._file_size = file_size
+        self._timestamp_regex = re.compile(f'({timestamp_regex})')
+        self._timestamp_format = timestamp_format
+        self._sample_size = sample_size
+        self.num_of_reads = 0
+
+    def find_offset(self, timestamp: datetime) -> int:
+        """
+        :return: offset of the first line with time stamp >= timestamp, the file size if there is no such line
+        """
+        low, high = 0, self._file_size
+        found_offset = self._file_size
+        while high - low > self._sample_size:
+            middle = (low + high) // 2
+            line = next(self._iter_timestamped_lines(start=middle, end=high), None)
+            if line is None:
+                # only continuation lines in [middle, high), the start is before middle (or it is found_offset)
+                high = middle
+                continue
+
+            line_offset, next_line_offset, line_timestamp = line
+            if line_timestamp >= timestamp:
+                found_offset = line_offset
+                high = middle
+            else:
+                low = next_line_offset
+
+        for line_offset, _, line_timestamp in self._iter_timestamped_lines(start=low, end=high):
+            if line_timestamp >= timestamp:
+                found_offset = line_offset
+                break
+
+        logger.debug(f"Found offset {found_offset} of {self._file_size} bytes after {self.num_of_reads} reads")
+        return found_offset
+
+    def _iter_timestamped_lines(self, start: int, end: int):
+        """
+        Generator of (line offset, next line offset, time stamp) of the complete lines that start in [start, end)
+        and have a time stamp
+        """
+        # read one byte before start, so a line that starts exactly at start is not considered as partial
+        buffer_offset = max(start - 1, 0)
+        read_position = buffer_offset
+        buffer = b''
+        skip_partial_line = start > 0
+        while True:
+            newline_index = buffer.find(b'\n')
+            if newline_index == -1:
+                if read_position < self._file_size:
+                    chunk = self._read_bytes(read_position, self._sample_size)
+                    self.num_of_reads += 1
+                    read_position = read_position + len(chunk) if len(chunk) > 0 else self._file_size
+                    buffer += chunk
+                    continue
+
+                if buffer == b'' or skip_partial_line:
+                    return
+
+                # last line of the file, without new line at its end
+                newline_index = len(buffer)
+
+            line_offset = buffer_offset
+            line = buffer[:newline_index]
+            buffer = buffer[newline_index + 1:]
+            buffer_offset += newline_index + 1
+
+            if skip_partial_line:
+                skip_partial_line = False
+                continue
+
+            if line_offset >= end:
+                return
+
+            line_timestamp = self._parse_timestamp(line=line)
+            if line_timestamp is not None:
+                yield line_offset, buffer_offset, line_timestamp
+
+    def _parse_timestamp(self, line: bytes) -> datetime | None:
+        match = self._timestamp_regex.search(line.decode('utf-8', errors='replace'))
+        if match is None:
+            return None
+
+        try:
+            return datetime.strptime(match.group(1), self._timestamp_format)
+        except ValueError:
+            return None
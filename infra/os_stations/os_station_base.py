@@ -1,23 +1,71 @@
 import ipaddress
+import logging
+import re
+import threading
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
 from typing import List
 
 import allure
 
 from infra.allure_report_handler.reporter import Reporter
+from infra.os_stations.log_seek import LogTimestampSeeker
 from infra.utils.utils import StringUtils
 import third_party_details
 from infra.vpshere.vsphere_cluster_handler import VmSearchTypeEnum
 from infra.vpshere.vsphere_utils import VsphereUtils
 from infra.vpshere.vsphere_vm_operations import VsphereMachineOperations
 
+logger = logging.getLogger(__name__)
+
 EXTRACT_EDR_EVENT_TESTER_TIMEOUT = 60
 MAX_WAIT_FOR_FILE_TO_APPEAR = 60
+BATCH_MARKER_PREFIX = "QA_AUTOMATION_BATCH"
+MAX_OUTPUT_SIZE_TO_ATTACH = 2000000
+
+
+class CommandResult:
+    """
+    Result of a single command that was executed as part of a batch (see OsStation.execute_batch)
+    """
+
+    def __init__(self, cmd: str, stdout: str, stderr: str, exit_code: int):
+        self.cmd = cmd
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+    @property
+    def output(self) -> str:
+        """ Same semantic as the output that execute_cmd returns: stdout, if empty then stderr, if empty then None """
+        return self.stdout if self.stdout != '' else self.stderr if self.stderr != '' else None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exit_code == 0
+
+    def __repr__(self):
+        return f"CommandResult(cmd={self.cmd}, exit_code={self.exit_code})"
+
+
+class ResourcesUsage:
+    """
+    CPU, memory and disk usage (percents) of a machine that were sampled together (see OsStation.get_resources_usage)
+    """
+
+    def __init__(self, cpu: float, memory: float, disk: float):
+        self.cpu = cpu
+        self.memory = memory
+        self.disk = disk
+
+    def __repr__(self):
+        return f"ResourcesUsage(cpu={self.cpu}, memory={self.memory}, disk={self.disk})"
 
 
 class OsStation(metaclass=ABCMeta):
 
     def __init__(self, host_ip: str, user_name: str, password: str):
+        """ OS details and the vSphere vm are resolved on first access (and then kept), see also prefetch_details """
         self._host_ip = host_ip
         self._user_name = user_name
         self._password = password
@@ -25,12 +73,11 @@ class OsStation(metaclass=ABCMeta):
         self._os_architecture = None
         self._os_version = None
         self._os_name = None
-        self._init_os_details()
-        self._vm_operations: VsphereMachineOperations = VsphereUtils.get_specific_vm_from_vsphere(
-            vm_search_type=VmSearchTypeEnum.VM_IP_V4,
-            txt_to_search=self._host_ip,
-            user_name=third_party_details.USER_NAME_DOMAIN,
-            password=third_party_details.PASSWORD)
+        self._is_os_details_resolved = False
+        self._os_details_lock = threading.Lock()
+        self._vm_operations: VsphereMachineOperations | None = None
+        self._is_vm_operations_resolved = False
+        self._vm_operations_lock = threading.Lock()
 
     @property
     def host_ip(self) -> str:
@@ -62,20 +109,56 @@ class OsStation(metaclass=ABCMeta):
 
     @property
     def os_architecture(self):
+        self._resolve_os_details()
         return self._os_architecture
 
     @property
     def os_name(self):
+        self._resolve_os_details()
         return self._os_name
 
     @property
     def os_version(self):
+        self._resolve_os_details()
         return self._os_version
 
     @property
     def vm_operations(self) -> VsphereMachineOperations:
+        self._resolve_vm_operations()
         return self._vm_operations
 
+    def prefetch_details(self, os_details: bool = True, vm_operations: bool = True):
+        """
+        Resolve the OS details and/or the vSphere vm in a background thread, accessing them later waits for the
+        prefetch to finish. If the prefetch fails, the access tries again and raises the original error.
+        """
+        def prefetch():
+            try:
+                if os_details:
+                    self._resolve_os_details()
+                if vm_operations:
+                    self._resolve_vm_operations()
+            except Exception as e:
+                logger.info(f"Failed to prefetch details of {self._host_ip}, original exception: {e}")
+
+        threading.Thread(target=prefetch, name=f'prefetch_{self._host_ip}', daemon=True).start()
+
+    def _resolve_os_details(self):
+        with self._os_details_lock:
+            if not self._is_os_details_resolved:
+                self._init_os_details()
+                self._is_os_details_resolved = True
+
+    def _resolve_vm_operations(self):
+        with self._vm_operations_lock:
+            if not self._is_vm_operations_resolved:
+                self._vm_operations = VsphereUtils.get_specific_vm_from_vsphere(
+                    vm_search_type=VmSearchTypeEnum.VM_IP_V4,
+                    txt_to_search=self._host_ip,
+                    user_name=third_party_details.USER_NAME_DOMAIN,
+                    password=third_party_details.PASSWORD)
+                self._is_vm_operations_resolved = True
+
     def _init_os_details(self):
         self._os_version = self.get_os_version()
         self._os_name = self.get_os_name()
@@ -111,6 +194,55 @@ class OsStation(metaclass=ABCMeta):
                     asynchronous: bool = False):
         pass
 
+    @abstractmethod
+    def execute_batch(self, commands: List[str], timeout: int = 180,
+                      attach_output_to_report: bool = True) -> List[CommandResult]:
+        """
+        Execute several commands in a single remote invocation, each command is delimited by unique markers
+        so the output of every command can be separated afterwards.
+        The commands are executed one after another, failure of one command does not stop the next ones.
+        :return: result per command, at the same order of the given commands
+        """
+        pass
+
+    @staticmethod
+    def _generate_batch_marker() -> str:
+        return f"{BATCH_MARKER_PREFIX}_{StringUtils.generate_random_string(length=16)}"
+
+    @staticmethod
+    def _parse_batch_output(commands: List[str], marker: str, stdout: str, stderr: str) -> List[CommandResult]:
+        """
+        Split the output of a batch into the output of each command.
+        stdout of the command with the index i is wrapped with '<marker>:START:<i>' and '<marker>:END:<i>:<exit code>'
+        and stderr of the command is wrapped with '<marker>:START:<i>' and '<marker>:END:<i>'
+        """
+        results = []
+        for index, cmd in enumerate(commands):
+            stdout_match = re.search(rf'{marker}:START:{index}\s(.*?){marker}:END:{index}:(-?\d+)', stdout, re.DOTALL)
+            stderr_match = re.search(rf'{marker}:START:{index}\s(.*?){marker}:END:{index}\b', stderr, re.DOTALL)
+            if stdout_match is None:
+                raise Exception(f"Failed to find the output of the command '{cmd}' in the batch output, "
+                                f"probably the batch was interrupted")
+
+            results.append(CommandResult(cmd=cmd,
+                                         stdout=stdout_match.group(1).strip(),
+                                         stderr=stderr_match.group(1).strip() if stderr_match is not None else '',
+                                         exit_code=int(stdout_match.group(2))))
+
+        return results
+
+    @staticmethod
+    def _report_batch_results(results: List[CommandResult]):
+        for result in results:
+            output = result.output
+            if output is not None and len(output) > 1000:
+                if len(output) < MAX_OUTPUT_SIZE_TO_ATTACH:
+                    Reporter.attach_str_as_file(file_name=result.cmd, file_content=output)
+                else:
+                    Reporter.report(f"Output of '{result.cmd}' is to big to attach to allure report, sorry")
+            else:
+                Reporter.report(f"'{result.cmd}' (exit code {result.exit_code}) output: {output}")
+
     @abstractmethod
     def get_current_machine_datetime(self, date_format: str):
         pass
@@ -155,6 +287,11 @@ class OsStation(metaclass=ABCMeta):
     def get_disk_usage(self):
         pass
 
+    @abstractmethod
+    def get_resources_usage(self) -> ResourcesUsage:
+        """ Sample CPU, memory and disk usage in a single remote invocation """
+        pass
+
     @abstractmethod
     def get_service_process_ids(self, service_identifier: str) -> List[int]:
         pass
@@ -183,6 +320,47 @@ class OsStation(metaclass=ABCMeta):
     def get_file_last_modify_date(self, file_path: str, date_format: str) -> str:
         pass
 
+    @abstractmethod
+    def get_file_size(self, file_path: str) -> int:
+        pass
+
+    @abstractmethod
+    def read_file_bytes(self, file_path: str, offset: int, size: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def get_file_content_from_offset(self, file_path: str, offset: int) -> str:
+        pass
+
+    @allure.step("Get content of {file_path} from the first log line with time stamp >= {timestamp}")
+    def get_log_content_from_timestamp(self,
+                                       file_path: str,
+                                       timestamp: datetime,
+                                       timestamp_regex: str,
+                                       timestamp_format: str) -> str | None:
+        """
+        Binary search the log file (sorted by time) on the remote machine and transfer only the part after the given
+        time stamp, instead of getting the whole file and parsing every line
+        :param timestamp_regex: regex of the time stamp inside a log line
+        :param timestamp_format: datetime format of the time stamp
+        :return: None if there is no log line with time stamp >= the given one
+        """
+        file_size = self.get_file_size(file_path=file_path)
+        seeker = LogTimestampSeeker(read_bytes=lambda offset, size: self.read_file_bytes(file_path=file_path,
+                                                                                          offset=offset,
+                                                                                          size=size),
+                                    file_size=file_size,
+                                    timestamp_regex=timestamp_regex,
+                                    timestamp_format=timestamp_format)
+        offset = seeker.find_offset(timestamp=timestamp)
+        if offset >= file_size:
+            Reporter.report(f"There is no logs in {file_path} after {timestamp}")
+            return None
+
+        Reporter.report(f"Logs after {timestamp} start at offset {offset} of {file_size} bytes "
+                        f"(found after {seeker.num_of_reads} reads)")
+        return self.get_file_content_from_offset(file_path=file_path, offset=offset)
+
     @abstractmethod
     def create_new_folder(self, folder_path: str) -> str:
         pass
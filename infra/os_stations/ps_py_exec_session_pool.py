@@ -0,0 +1,208 @@
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from pypsexec.exceptions import PAExecException, SCMRException
+from smbprotocol.exceptions import SMBException
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_POOL_SIZE = 2
+HEALTH_CHECK_IDLE_TIMEOUT = 60
+HEALTH_CHECK_CMD_TIMEOUT = 30
+ACQUIRE_SESSION_TIMEOUT = 5 * 60
+
+# exceptions that mean the PAExec service or the SMB connection behind a pooled session is not usable anymore
+# (OSError covers the socket errors: connection reset/aborted, timeout, broken pipe)
+BROKEN_SESSION_EXCEPTIONS = (SCMRException, SMBException, OSError)
+# exceptions of the remote command itself (PAExec reported an error), the session is still usable after them
+REMOTE_COMMAND_EXCEPTIONS = (PAExecException,)
+
+
+class _PooledSession:
+
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.time()
+
+
+class PsPyExecSessionPool:
+    """
+    Bounded pool of connected pypsexec clients (each one with its own PAExec service already created and started)
+    for a single remote windows host.
+    Instead of creating and removing a PAExec service for every command, the sessions stay alive between commands,
+    sessions that were idle for a while are health checked before reuse and broken sessions are thrown away and
+    rebuilt on demand.
+    Pools are shared by all the stations that point to the same host with the same user, use get_pool to get one.
+    """
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, host_ip: str, session_factory, max_size: int = DEFAULT_SESSION_POOL_SIZE):
+        """
+        :param host_ip: remote windows host
+        :param session_factory: callable that returns a connected client with a created service
+        :param max_size: max number of sessions (PAExec services) that can be opened to the host at the same time
+        """
+        self._host_ip = host_ip
+        self._session_factory = session_factory
+        self._max_size = max_size
+        self._idle_sessions = []
+        self._num_of_sessions = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def host_ip(self) -> str:
+        return self._host_ip
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closed
+
+    @classmethod
+    def get_pool(cls, host_ip: str, user_name: str, session_factory, max_size: int = DEFAULT_SESSION_POOL_SIZE):
+        key = (host_ip, user_name)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None or pool.is_closed:
+                pool = cls(host_ip=host_ip, session_factory=session_factory, max_size=max_size)
+                cls._pools[key] = pool
+            return pool
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+
+        for pool in pools:
+            pool.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow a session from the pool for one remote invocation.
+        If the invocation fails with anything else than an error of the remote command itself, the state of the
+        session is unknown, so it is discarded and not returned to the pool.
+        """
+        pooled_session = self._acquire()
+        try:
+            yield pooled_session.client
+        except REMOTE_COMMAND_EXCEPTIONS:
+            self._release(pooled_session)
+            raise
+        except BaseException as e:
+            logger.debug(f"Session to {self._host_ip} failed, discarding it, original exception: {e}")
+            self._discard(pooled_session)
+            raise
+        else:
+            self._release(pooled_session)
+
+    def close(self, cleanup_remote_services: bool = True):
+        """
+        Close all the idle sessions, sessions that are in use will be closed when they are released.
+        :param cleanup_remote_services: False when the remote host is known to be down (reboot, snapshot revert),
+        in that case the sessions are just dropped without talking with the remote host.
+        """
+        with self._condition:
+            self._closed = True
+            idle_sessions = self._idle_sessions
+            self._idle_sessions = []
+            self._num_of_sessions -= len(idle_sessions)
+            self._condition.notify_all()
+
+        if cleanup_remote_services:
+            for pooled_session in idle_sessions:
+                self._close_client(pooled_session.client)
+
+    def _acquire(self, timeout: int = ACQUIRE_SESSION_TIMEOUT) -> _PooledSession:
+        deadline = time.time() + timeout
+        while True:
+            pooled_session = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise Exception(f"Session pool of {self._host_ip} is already closed")
+
+                    if len(self._idle_sessions) > 0:
+                        pooled_session = self._idle_sessions.pop()
+                        break
+
+                    if self._num_of_sessions < self._max_size:
+                        self._num_of_sessions += 1
+                        break
+
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        # not TimeoutError, it is an OSError that is considered as a broken session
+                        raise Exception(f"Timeout: no free session to {self._host_ip} after {timeout} seconds")
+                    self._condition.wait(remaining)
+
+            if pooled_session is None:
+                return self._create_session()
+
+            if self._is_healthy(pooled_session):
+                return pooled_session
+
+            self._discard(pooled_session)
+
+    def _create_session(self) -> _PooledSession:
+        try:
+            logger.debug(f"Creating new PAExec session to {self._host_ip}")
+            return _PooledSession(client=self._session_factory())
+        except Exception:
+            with self._condition:
+                self._num_of_sessions -= 1
+                self._condition.notify()
+            raise
+
+    def _is_healthy(self, pooled_session: _PooledSession) -> bool:
+        if time.time() - pooled_session.last_used < HEALTH_CHECK_IDLE_TIMEOUT:
+            return True
+
+        try:
+            pooled_session.client.run_executable("cmd.exe",
+                                                  arguments='/c exit 0',
+                                                  timeout_seconds=HEALTH_CHECK_CMD_TIMEOUT,
+                                                  use_system_account=True)
+            return True
+        except Exception as e:
+            logger.debug(f"Idle session to {self._host_ip} failed the health check, original exception: {e}")
+            return False
+
+    def _release(self, pooled_session: _PooledSession):
+        pooled_session.last_used = time.time()
+        with self._condition:
+            if not self._closed:
+                self._idle_sessions.append(pooled_session)
+                self._condition.notify()
+                return
+
+            self._num_of_sessions -= 1
+
+        self._close_client(pooled_session.client)
+
+    def _discard(self, pooled_session: _PooledSession):
+        with self._condition:
+            self._num_of_sessions -= 1
+            self._condition.notify()
+
+        self._close_client(pooled_session.client)
+
+    def _close_client(self, client):
+        try:
+            client.remove_service()
+        except Exception as e:
+            logger.debug(f"Failed to remove PAExec service from {self._host_ip}, original exception: {e}")
+
+        try:
+            client.disconnect()
+        except Exception as e:
+            logger.debug(f"Failed to disconnect from {self._host_ip}, original exception: {e}")
+
+
+atexit.register(PsPyExecSessionPool.close_all)
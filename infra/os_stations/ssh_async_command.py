@@ -0,0 +1,136 @@
+import codecs
+import logging
+import time
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 32 * 1024
+POLL_INTERVAL = 0.2
+KILL_CMD_TIMEOUT = 30
+
+
+class SshAsyncCommand:
+    """
+    Handle of a command that runs in background on a remote linux machine.
+    Every command gets its own channel over the already opened paramiko transport, so many commands can run in
+    parallel (and together with regular execute_cmd calls) over a single ssh connection.
+    The output is not collected by a background thread, it is read from the channel on every call to
+    poll/wait/read_stdout/read_stderr, so call one of them from time to time if the command is expected to write a lot.
+    """
+
+    def __init__(self, cmd: str, transport: paramiko.Transport):
+        self._cmd = cmd
+        self._transport = transport
+        self._pid = None
+        self._exit_code = None
+        self._pid_line = b''
+        self._stdout_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._stderr_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending_stdout = ''
+        self._pending_stderr = ''
+
+        self._channel = transport.open_session()
+        # the pid of the shell is written first so the command (and its children) can be killed later
+        self._channel.exec_command(f'echo $$; {cmd}')
+
+    @property
+    def cmd(self) -> str:
+        return self._cmd
+
+    @property
+    def pid(self) -> int:
+        while self._pid is None and not self._channel.exit_status_ready():
+            self._pump()
+            if self._pid is None:
+                time.sleep(POLL_INTERVAL)
+        self._pump()
+        return self._pid
+
+    @property
+    def exit_code(self) -> int:
+        return self._exit_code
+
+    def poll(self):
+        """
+        :return: exit code of the command if it finished, otherwise None
+        """
+        self._pump()
+        if self._exit_code is None and self._channel.exit_status_ready():
+            # read what left in the buffers after the command exited
+            self._pump()
+            self._exit_code = self._channel.recv_exit_status()
+            self._channel.close()
+        return self._exit_code
+
+    def wait(self, timeout: int = None) -> int:
+        """
+        Wait until the command finishes
+        :param timeout: max seconds to wait, None - wait forever
+        :return: exit code of the command
+        """
+        start_time = time.time()
+        while self.poll() is None:
+            if timeout is not None and time.time() - start_time > timeout:
+                raise TimeoutError(f"Timeout: command '{self._cmd}' is still running after {timeout} seconds")
+            time.sleep(POLL_INTERVAL)
+
+        return self._exit_code
+
+    def read_stdout(self) -> str:
+        """
+        :return: the stdout that was written since the previous call (empty string if nothing new was written)
+        """
+        self._pump()
+        output, self._pending_stdout = self._pending_stdout, ''
+        return output
+
+    def read_stderr(self) -> str:
+        """
+        :return: the stderr that was written since the previous call (empty string if nothing new was written)
+        """
+        self._pump()
+        output, self._pending_stderr = self._pending_stderr, ''
+        return output
+
+    def kill(self):
+        """ Kill the command together with all the processes that it created """
+        if self.poll() is not None:
+            return
+
+        pid = self.pid
+        if pid is not None:
+            kill_tree_cmd = 'kill_tree() { for child in $(pgrep -P $1); do kill_tree $child; done; kill -KILL $1; }; ' \
+                            f'kill_tree {pid}'
+            kill_channel = self._transport.open_session()
+            try:
+                kill_channel.settimeout(KILL_CMD_TIMEOUT)
+                kill_channel.exec_command(kill_tree_cmd)
+                kill_channel.recv_exit_status()
+            finally:
+                kill_channel.close()
+
+        self._channel.close()
+        logger.debug(f"Command '{self._cmd}' (pid {pid}) was killed")
+
+    def _pump(self):
+        while self._channel.recv_ready():
+            self._on_stdout(self._channel.recv(READ_CHUNK_SIZE))
+
+        while self._channel.recv_stderr_ready():
+            self._pending_stderr += self._stderr_decoder.decode(self._channel.recv_stderr(READ_CHUNK_SIZE))
+
+    def _on_stdout(self, data: bytes):
+        if self._pid is None:
+            self._pid_line += data
+            if b'\n' not in self._pid_line:
+                return
+            pid, data = self._pid_line.split(b'\n', 1)
+            self._pid = int(pid.strip())
+            self._pid_line = b''
+
+        self._pending_stdout += self._stdout_decoder.decode(data)
+
+    def __repr__(self):
+        return f"SshAsyncCommand(cmd={self._cmd}, pid={self._pid}, exit_code={self._exit_code})"
@@ -0,0 +1,113 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATION_TIMEOUT = 10 * 60
+
+
+class StationResult:
+    """
+    Result of a callable that was invoked on a single station as part of StationGroup.run
+    """
+
+    def __init__(self, station, result=None, exception: Exception = None, duration: float = None):
+        self.station = station
+        self.result = result
+        self.exception = exception
+        self.duration = duration
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+    def __repr__(self):
+        status = 'succeeded' if self.succeeded else f'failed: {self.exception}'
+        return f"StationResult({self.station} {status})"
+
+
+class StationGroup:
+    """
+    Run the same callable/command on many stations (os stations, system components or collectors) concurrently,
+    so the total time is the time of the slowest station and not the sum of all of them.
+    Exception of a single station does not stop the others, it is captured in the result of that station.
+    """
+
+    def __init__(self, stations: List, max_workers: int = None, timeout_per_station: int = DEFAULT_STATION_TIMEOUT):
+        """
+        :param stations: the objects that the callable will get, must be hashable (used as keys of the results)
+        :param max_workers: max stations to run on at the same time, None - all the stations together
+        :param timeout_per_station: max seconds to wait for each station, counted from the time it started
+        """
+        self._stations = list(stations)
+        self._max_workers = max_workers or max(len(self._stations), 1)
+        self._timeout_per_station = timeout_per_station
+
+    @property
+    def stations(self) -> List:
+        return self._stations
+
+    def run(self, func: Callable, raise_on_error: bool = False) -> Dict[object, StationResult]:
+        """
+        :param func: callable that gets a single station
+        :param raise_on_error: True - raise the first captured exception after all the stations finished
+        :return: results by station, at the same order of the stations
+        """
+        results = {station: StationResult(station=station) for station in self._stations}
+        start_times = {}
+
+        def run_on_station(station):
+            start_times[station] = time.time()
+            return func(station)
+
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='station_group')
+        try:
+            futures = {executor.submit(run_on_station, station): station for station in self._stations}
+            pending = set(futures.keys())
+            while len(pending) > 0:
+                done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    station = futures[future]
+                    station_result = results[station]
+                    station_result.duration = time.time() - start_times.get(station, time.time())
+                    try:
+                        station_result.result = future.result()
+                    except Exception as e:
+                        logger.info(f"Failed to run {func.__name__} on {station}, original exception: {e}")
+                        station_result.exception = e
+
+                for future in list(pending):
+                    station = futures[future]
+                    start_time = start_times.get(station)
+                    if start_time is not None and time.time() - start_time > self._timeout_per_station:
+                        # the thread can not be stopped, the result of the station is just not waited anymore
+                        results[station].exception = TimeoutError(
+                            f"Timeout: {func.__name__} did not finish on {station} after "
+                            f"{self._timeout_per_station} seconds")
+                        results[station].duration = time.time() - start_time
+                        pending.remove(future)
+
+        finally:
+            executor.shutdown(wait=False)
+
+        if raise_on_error:
+            self.raise_first_error(results)
+
+        return results
+
+    def execute_cmd(self, cmd: str, **execute_cmd_kwargs) -> Dict[object, StationResult]:
+        """ Execute the same command on all the stations, the stations must have execute_cmd """
+        def execute_cmd_on_station(station):
+            return station.execute_cmd(cmd=cmd, **execute_cmd_kwargs)
+
+        return self.run(func=execute_cmd_on_station)
+
+    @staticmethod
+    def raise_first_error(results: Dict[object, StationResult]):
+        failed_results = [result for result in results.values() if not result.succeeded]
+        if len(failed_results) > 0:
+            failed_stations = ', '.join(str(result.station) for result in failed_results)
+            logger.info(f"Failed stations: {failed_stations}")
+            raise failed_results[0].exception
@@ -1,3 +1,4 @@
+import base64
 from datetime import datetime
 import functools
 import random
@@ -17,17 +18,29 @@ from infra.allure_report_handler.reporter import Reporter
 from infra.decorators import retry, short_retry
 from infra.common_utils import wait_for_condition
 
-from infra.os_stations.os_station_base import OsStation
+from infra.os_stations.os_station_base import OsStation, CommandResult, ResourcesUsage
 from infra.os_stations.ps_py_exec_client_wrapper import PsPyExecClientWrapper
+from infra.os_stations.ps_py_exec_session_pool import PsPyExecSessionPool, BROKEN_SESSION_EXCEPTIONS
 from infra.utils.utils import StringUtils
-from infra.os_stations.os_station_base import EXTRACT_EDR_EVENT_TESTER_TIMEOUT, MAX_WAIT_FOR_FILE_TO_APPEAR
+from infra.os_stations.os_station_base import EXTRACT_EDR_EVENT_TESTER_TIMEOUT, MAX_WAIT_FOR_FILE_TO_APPEAR, \
+    MAX_OUTPUT_SIZE_TO_ATTACH
 
 logger = logging.getLogger(__name__)
 
 INTERVAL_STATION_KEEPALIVE = 5
+MAX_INTERVAL_STATION_KEEPALIVE = 30  # a rebooting machine is polled less often as time goes by
+STATION_KEEPALIVE_BACKOFF_FACTOR = 1.5
 WAIT_FOR_STATION_UP_TIMEOUT = 5 * 60
 WAIT_FOR_STATION_DOWN_TIMEOUT = WAIT_FOR_STATION_UP_TIMEOUT
 SEVEN_ZIP_APPLICATION_PATH = "C:\\Program Files\\7-Zip"
+OS_ARCHITECTURE_CMD = 'wmic os get osarchitecture'
+OS_VERSION_CMD = 'systeminfo | findstr /B /C:"OS Version"'
+OS_NAME_CMD = 'systeminfo | findstr /B /C:"OS Name"'
+OS_NAME_AND_VERSION_CMD = 'systeminfo | findstr /B /C:"OS Name" /C:"OS Version"'
+CPU_USAGE_CMD = 'wmic cpu get loadpercentage /format:value'
+MEMORY_USAGE_CMD = 'systeminfo | find /I "Physical Memory"'
+DISK_SIZE_CMD = 'wmic logicaldisk get size'
+DISK_FREE_SPACE_CMD = 'wmic logicaldisk get freespace'
 
 
 class WindowsServiceStartTypeEnum(Enum):
@@ -41,11 +54,19 @@ class WindowsServiceStartTypeEnum(Enum):
 
 class WindowsStation(OsStation):
 
-    def __init__(self, host_ip, user_name, password):
+    def __init__(self, host_ip, user_name, password, keep_alive_session: bool = True, prefetch_details: bool = False):
+        """
+        :param keep_alive_session: True - commands are executed over a pool of long-lived PAExec sessions,
+        False - a new PAExec service is created and removed for every command.
+        :param prefetch_details: True - resolve the OS details and the vSphere vm in background right away
+        """
         self.__encrypted_connection = True
+        self._keep_alive_session = keep_alive_session
         super().__init__(host_ip=host_ip,
                          user_name=user_name,
                          password=password)
+        if prefetch_details:
+            self.prefetch_details()
 
     @allure.step("Clean all previous SMB connections")
     def clean_all_previous_connections(self):
@@ -67,7 +88,10 @@ class WindowsStation(OsStation):
             # here we are using wrapper because this library creates always same service name in the remote machine
             # and we want to ensure that it will create always unique process id in case that something will get wrong
             # with the original service.
-            if self._remote_connection_session is None:
+            if self._keep_alive_session:
+                self._get_session_pool()
+
+            elif self._remote_connection_session is None:
                 self._connect_with_retry_on_different_encrypted_option()
 
         except Exception as e:
@@ -76,28 +100,61 @@ class WindowsStation(OsStation):
             raise e
 
     def _connect_with_retry_on_different_encrypted_option(self):
-        try:
-            self._remote_connection_session = PsPyExecClientWrapper(self._host_ip,
-                                                                    unique_connection_id=random.randint(1000000,
-                                                                                                        9999999),
-                                                                    username=self._user_name,
-                                                                    password=self._password,
-                                                                    encrypt=self.__encrypted_connection)
+        self._remote_connection_session = self._create_connected_client()
 
-            self._remote_connection_session.connect()
-            self._remote_connection_session.create_service()
+    def _create_connected_client(self) -> PsPyExecClientWrapper:
+        try:
+            client = PsPyExecClientWrapper(self._host_ip,
+                                           unique_connection_id=random.randint(1000000, 9999999),
+                                           username=self._user_name,
+                                           password=self._password,
+                                           encrypt=self.__encrypted_connection)
+            client.connect()
+            client.create_service()
 
         except:
-            self._remote_connection_session = PsPyExecClientWrapper(self._host_ip,
-                                                                    unique_connection_id=random.randint(1000000,
-                                                                                                        9999999),
-                                                                    username=self._user_name,
-                                                                    password=self._password,
-                                                                    encrypt=not self.__encrypted_connection)
-            self._remote_connection_session.connect()
-            self._remote_connection_session.create_service()
+            client = PsPyExecClientWrapper(self._host_ip,
+                                           unique_connection_id=random.randint(1000000, 9999999),
+                                           username=self._user_name,
+                                           password=self._password,
+                                           encrypt=not self.__encrypted_connection)
+            client.connect()
+            client.create_service()
             self.__encrypted_connection = not self.__encrypted_connection
 
+        return client
+
+    def _get_session_pool(self) -> PsPyExecSessionPool:
+        return PsPyExecSessionPool.get_pool(host_ip=self._host_ip,
+                                            user_name=self._user_name,
+                                            session_factory=self._create_connected_client)
+
+    def _run_executable(self, cmd: str, timeout: int, asynchronous: bool):
+        if not self._keep_alive_session:
+            return self._remote_connection_session.run_executable("cmd.exe",
+                                                                  arguments=f'/c {cmd}',
+                                                                  timeout_seconds=timeout,
+                                                                  asynchronous=asynchronous,
+                                                                  use_system_account=True)
+
+        try:
+            with self._get_session_pool().session() as client:
+                return client.run_executable("cmd.exe",
+                                             arguments=f'/c {cmd}',
+                                             timeout_seconds=timeout,
+                                             asynchronous=asynchronous,
+                                             use_system_account=True)
+
+        except BROKEN_SESSION_EXCEPTIONS as e:
+            # the broken session was already thrown away by the pool, so the retry is done on a new session
+            logger.debug(f"Pooled session is broken, executing again on a new session, original exception: {e}")
+            with self._get_session_pool().session() as client:
+                return client.run_executable("cmd.exe",
+                                             arguments=f'/c {cmd}',
+                                             timeout_seconds=timeout,
+                                             asynchronous=asynchronous,
+                                             use_system_account=True)
+
     @short_retry
     @allure.step("Executing command: {cmd}")
     def execute_cmd(self, cmd: str, return_output: bool = True, fail_on_err: bool = False, timeout=180,
@@ -109,11 +166,9 @@ class WindowsStation(OsStation):
 
             cmd = cmd.replace('\\\\', r'\\')
             logger.debug(f"Executing command: {cmd}")
-            stdout_output, stderr_err_output, status_code = self._remote_connection_session.run_executable("cmd.exe",
-                                                                                                           arguments=f'/c {cmd}',
-                                                                                                           timeout_seconds=timeout,
-                                                                                                           asynchronous=asynchronous,
-                                                                                                           use_system_account=True)
+            stdout_output, stderr_err_output, status_code = self._run_executable(cmd=cmd,
+                                                                                 timeout=timeout,
+                                                                                 asynchronous=asynchronous)
             if asynchronous is True:
                 return
 
@@ -124,7 +179,7 @@ class WindowsStation(OsStation):
                 output = stdout_output if stdout_output != '' else stderr_err_output if stderr_err_output != '' else None
                 if attach_output_to_report:
                     if output is not None and len(output) > 1000:
-                        if len(output) < 2000000:
+                        if len(output) < MAX_OUTPUT_SIZE_TO_ATTACH:
                             Reporter.attach_str_as_file(file_name=cmd, file_content=output)
                         else:
                             Reporter.report("Content is to big to attach to allure report, sorry")
@@ -168,20 +223,73 @@ class WindowsStation(OsStation):
             raise e
 
         finally:
-            self.disconnect()
+            if not self._keep_alive_session:
+                self.disconnect()
+
+    @allure.step("Executing batch of commands: {commands}")
+    def execute_batch(self, commands: List[str], timeout: int = 180,
+                      attach_output_to_report: bool = True) -> List[CommandResult]:
+        """
+        Notice that the commands are wrapped with brackets and joined to a single cmd.exe command line,
+        so the total length is limited to 8191 characters.
+        """
+        marker = self._generate_batch_marker()
+        script_parts = []
+        for index, cmd in enumerate(commands):
+            # 'ver > nul' resets the errorlevel so the exit code of the previous command will not leak,
+            # 'call' with %^errorlevel% delays the expansion of the errorlevel until the command finished
+            script_parts.append(f'echo {marker}:START:{index} & echo {marker}:START:{index} 1>&2 & ver > nul & '
+                                f'({cmd}) & '
+                                f'call echo {marker}:END:{index}:%^errorlevel% & echo {marker}:END:{index} 1>&2')
+        script = ' & '.join(script_parts).replace('\\\\', r'\\')
+
+        try:
+            self.connect()
+            stdout_output, stderr_err_output, status_code = self._run_executable(cmd=script,
+                                                                                 timeout=timeout,
+                                                                                 asynchronous=False)
+        except Exception as e:
+            Reporter.report(f"Failed to execute batch of commands on remote windows machine, original exception: {e}")
+            raise e
+
+        finally:
+            if not self._keep_alive_session:
+                self.disconnect()
+
+        results = self._parse_batch_output(commands=commands, marker=marker,
+                                           stdout=stdout_output.decode('utf-8'),
+                                           stderr=stderr_err_output.decode('utf-8'))
+        if attach_output_to_report:
+            self._report_batch_results(results)
+
+        return results
 
     @allure.step("Disconnect from remote machine")
     def disconnect(self):
+        if self._keep_alive_session:
+            self._get_session_pool().close()
+
         if self._remote_connection_session is not None:
             self._remote_connection_session.remove_service()
             self._remote_connection_session.disconnect()
         self._remote_connection_session = None
 
+    def reset_sessions(self):
+        """
+        Drop the open sessions without talking with the remote host, use it when the machine state was changed under
+        the sessions (reboot, snapshot revert), the next command opens a new session
+        """
+        if self._keep_alive_session:
+            self._get_session_pool().close(cleanup_remote_services=False)
+        self._remote_connection_session = None
+
     @allure.step("Reboot")
     def reboot(self):
         uptime_sec_before_reboot = self.get_machine_uptime_seconds()
         cmd = 'shutdown -r -t 0'
         self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True)
+        # the PAExec services will not survive the reboot
+        self.reset_sessions()
         self.wait_until_machine_is_unreachable()
         self.wait_until_machine_is_reachable()
         uptime_sec_after_reboot = self.get_machine_uptime_seconds()
@@ -207,7 +315,9 @@ class WindowsStation(OsStation):
         timeout = timeout or WAIT_FOR_STATION_UP_TIMEOUT
         predict_condition_func = self.is_reachable
         wait_for_condition(condition_func=predict_condition_func, timeout_sec=timeout,
-                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is reachable")
+                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is reachable",
+                           backoff_factor=STATION_KEEPALIVE_BACKOFF_FACTOR,
+                           max_interval_sec=MAX_INTERVAL_STATION_KEEPALIVE, jitter_ratio=0.1)
 
     @allure.step("Wait until machine is unreachable")
     def wait_until_machine_is_unreachable(self, timeout=None):
@@ -218,7 +328,9 @@ class WindowsStation(OsStation):
             return result
 
         wait_for_condition(condition_func=predict, timeout_sec=timeout,
-                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is unreachable")
+                           interval_sec=INTERVAL_STATION_KEEPALIVE, condition_msg="VM is unreachable",
+                           backoff_factor=STATION_KEEPALIVE_BACKOFF_FACTOR,
+                           max_interval_sec=MAX_INTERVAL_STATION_KEEPALIVE, jitter_ratio=0.1)
 
     @allure.step("Stop service {service_name}")
     def stop_service(self, service_name: str) -> str:
@@ -232,13 +344,26 @@ class WindowsStation(OsStation):
         result = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True, )
         return result
 
+    def _init_os_details(self):
+        # systeminfo is slow, so it is invoked once for both name and version and together with the architecture
+        name_and_version_result, architecture_result = self.execute_batch(
+            commands=[OS_NAME_AND_VERSION_CMD, OS_ARCHITECTURE_CMD])
+        self._os_version = self._parse_os_version(name_and_version_result.output)
+        self._os_name = self._parse_os_name(name_and_version_result.output)
+        self._os_architecture = self._parse_os_architecture(architecture_result.output)
+
+        if self._os_name is None:
+            self._os_name = self.get_os_name()
+
     @allure.step("Get OS architecture")
     def get_os_architecture(self):
-        cmd = 'wmic os get osarchitecture'
-        result = self.execute_cmd(cmd=cmd, fail_on_err=True)
-        result = result.replace('\r', '').replace('\n', '')
-        arch = StringUtils.get_txt_by_regex(text=result, regex=r'OSArchitecture\s+(.+)', group=1)
-        return arch
+        result = self.execute_cmd(cmd=OS_ARCHITECTURE_CMD, fail_on_err=True)
+        return self._parse_os_architecture(result)
+
+    @staticmethod
+    def _parse_os_architecture(output: str) -> str:
+        output = output.replace('\r', '').replace('\n', '')
+        return StringUtils.get_txt_by_regex(text=output, regex=r'OSArchitecture\s+(.+)', group=1)
 
     @allure.step("Get hostname")
     def get_hostname(self):
@@ -247,10 +372,15 @@ class WindowsStation(OsStation):
 
     @allure.step("Get OS version")
     def get_os_version(self):
-        cmd = 'systeminfo | findstr /B /C:"OS Version"'
-        result = self.execute_cmd(cmd=cmd, fail_on_err=True)
-        os_ver = StringUtils.get_txt_by_regex(text=result, regex=r'OS\s+Version:\s+(.+)', group=1)
-        return os_ver
+        result = self.execute_cmd(cmd=OS_VERSION_CMD, fail_on_err=True)
+        return self._parse_os_version(result)
+
+    @staticmethod
+    def _parse_os_version(output: str) -> str:
+        if output is None:
+            return None
+        os_ver = StringUtils.get_txt_by_regex(text=output, regex=r'OS\s+Version:\s+(.+)', group=1)
+        return os_ver.strip() if os_ver is not None else None
 
     @allure.step("Get current windows machine date time")
     def get_current_machine_datetime(self, date_format="-UFormat '%d/%m/%Y %T'"):
@@ -262,42 +392,73 @@ class WindowsStation(OsStation):
     @allure.step("Get OS name")
     def get_os_name(self):
         # takes time to invoke this command, so if you are working from home or have high latency the result can be None
-        cmd = 'systeminfo | findstr /B /C:"OS Name"'
-        result = self.execute_cmd(cmd=cmd, fail_on_err=True)
-        os_ver = StringUtils.get_txt_by_regex(text=result, regex=r'OS\s+Name:\s+(.+)', group=1)
-        return os_ver
+        result = self.execute_cmd(cmd=OS_NAME_CMD, fail_on_err=True)
+        return self._parse_os_name(result)
+
+    @staticmethod
+    def _parse_os_name(output: str) -> str:
+        if output is None:
+            return None
+        os_name = StringUtils.get_txt_by_regex(text=output, regex=r'OS\s+Name:\s+(.+)', group=1)
+        return os_name.strip() if os_name is not None else None
 
     @allure.step("Get CPU usage")
     def get_cpu_usage(self) -> float:
-        cmd = "wmic cpu get loadpercentage /format:value"
-        cpu_info = self.execute_cmd(cmd=cmd, fail_on_err=True)
-        cpu = re.search(r'LoadPercentage=(\d+)', cpu_info).group(1)
+        cpu_info = self.execute_cmd(cmd=CPU_USAGE_CMD, fail_on_err=True)
+        cpu = self._parse_cpu_usage(cpu_info)
         Reporter.report(f'CPU usage: {cpu}')
-        return float(cpu)
+        return cpu
 
     @allure.step("Get memory usage")
     def get_memory_usage(self) -> float:
-        cpu_info = self.execute_cmd(cmd='systeminfo | find /I "Physical Memory"', fail_on_err=True)
-        available_mem = int(
-            re.search(r'Available\s+Physical\s+Memory:\s+(\d+,\d+)', cpu_info).group(1).replace(',', ''))
-        total_mem = int(re.search(r'Total\s+Physical\s+Memory:\s+(\d+,\d+)', cpu_info).group(1).replace(',', ''))
-        usage = float((total_mem - available_mem) / total_mem)
-        usage *= 100
+        memory_info = self.execute_cmd(cmd=MEMORY_USAGE_CMD, fail_on_err=True)
+        usage = self._parse_memory_usage(memory_info)
         Reporter.report(f"Memory usage: {usage}")
         return usage
 
     @allure.step("Get disk usage")
     def get_disk_usage(self) -> float:
-        total_disk_size = self.execute_cmd(cmd='wmic logicaldisk get size', fail_on_err=True)
-        total_disk_size = int(re.search('\d+', total_disk_size).group(0))
+        total_disk_size_result, disk_free_space_result = self.execute_batch(
+            commands=[DISK_SIZE_CMD, DISK_FREE_SPACE_CMD])
+        usage = self._parse_disk_usage(total_disk_size_result=total_disk_size_result,
+                                       disk_free_space_result=disk_free_space_result)
+        Reporter.report(f"Disk usage: {usage}")
+        return usage
+
+    @allure.step("Get CPU, memory and disk usage")
+    def get_resources_usage(self) -> ResourcesUsage:
+        cpu_result, memory_result, total_disk_size_result, disk_free_space_result = self.execute_batch(
+            commands=[CPU_USAGE_CMD, MEMORY_USAGE_CMD, DISK_SIZE_CMD, DISK_FREE_SPACE_CMD],
+            attach_output_to_report=False)
+        assert cpu_result.succeeded, f"Failed to get CPU usage: {cpu_result.output}"
+        assert memory_result.succeeded, f"Failed to get memory usage: {memory_result.output}"
+        resources_usage = ResourcesUsage(cpu=self._parse_cpu_usage(cpu_result.stdout),
+                                         memory=self._parse_memory_usage(memory_result.stdout),
+                                         disk=self._parse_disk_usage(total_disk_size_result=total_disk_size_result,
+                                                                     disk_free_space_result=disk_free_space_result))
+        Reporter.report(f"Resources usage: {resources_usage}")
+        return resources_usage
+
+    @staticmethod
+    def _parse_cpu_usage(cpu_info: str) -> float:
+        return float(re.search(r'LoadPercentage=(\d+)', cpu_info).group(1))
+
+    @staticmethod
+    def _parse_memory_usage(memory_info: str) -> float:
+        available_mem = int(
+            re.search(r'Available\s+Physical\s+Memory:\s+(\d+,\d+)', memory_info).group(1).replace(',', ''))
+        total_mem = int(re.search(r'Total\s+Physical\s+Memory:\s+(\d+,\d+)', memory_info).group(1).replace(',', ''))
+        usage = float((total_mem - available_mem) / total_mem)
+        return usage * 100
 
-        disk_free_space = self.execute_cmd(cmd='wmic logicaldisk get freespace')
-        disk_free_space = int(re.search('\d+', disk_free_space).group(0))
+    @staticmethod
+    def _parse_disk_usage(total_disk_size_result: CommandResult, disk_free_space_result: CommandResult) -> float:
+        assert total_disk_size_result.succeeded, f"Failed to get disk size: {total_disk_size_result.output}"
+        total_disk_size = int(re.search('\d+', total_disk_size_result.stdout).group(0))
+        disk_free_space = int(re.search('\d+', disk_free_space_result.stdout).group(0))
 
         usage = float((total_disk_size - disk_free_space) / total_disk_size)
-        usage *= 100
-        Reporter.report(f"Disk usage: {usage}")
-        return usage
+        return usage * 100
 
     @allure.step("Get {service_identifier} service process IDs")
     def get_service_process_ids(self, service_identifier: str) -> List[int]:
@@ -493,7 +654,7 @@ class WindowsStation(OsStation):
         try:
             self.remove_mounted_drive()
 
-            if "Windows 7" in self._os_name and not shared_drive_user_name.startswith(
+            if "Windows 7" in self.os_name and not shared_drive_user_name.startswith(
                     "ensilo\\") and 'ens-fs01' in shared_drive_path:
                 shared_drive_user_name = fr"ensilo\{shared_drive_user_name}"
 
@@ -540,6 +701,26 @@ class WindowsStation(OsStation):
         result = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=True)
         return result
 
+    def get_file_size(self, file_path: str) -> int:
+        cmd = f"powershell \"(Get-Item '{file_path}').Length\""
+        result = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=False)
+        return int(result)
+
+    def read_file_bytes(self, file_path: str, offset: int, size: int) -> bytes:
+        # file is opened with ReadWrite share mode since the logs are still written by the collector
+        cmd = f"""powershell "$f = [System.IO.File]::Open('{file_path}', 'Open', 'Read', 'ReadWrite'); """ \
+              f"""try {{ $null = $f.Seek({offset}, 'Begin'); $b = New-Object byte[] {size}; $n = $f.Read($b, 0, {size}); """ \
+              f"""[Convert]::ToBase64String($b, 0, $n) }} finally {{ $f.Close() }}\""""
+        result = self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=False)
+        return base64.b64decode(result) if result is not None else b''
+
+    def get_file_content_from_offset(self, file_path: str, offset: int) -> str:
+        cmd = f"""powershell "$f = [System.IO.File]::Open('{file_path}', 'Open', 'Read', 'ReadWrite'); """ \
+              f"""try {{ $null = $f.Seek({offset}, 'Begin'); (New-Object System.IO.StreamReader($f)).ReadToEnd() }} """ \
+              f"""finally {{ $f.Close() }}\""""
+        return self.execute_cmd(cmd=cmd, fail_on_err=True, return_output=True, attach_output_to_report=False,
+                                timeout=5 * 60)
+
     @allure.step("Change service {service_name} start type to {service_start_type}")
     def change_service_start_type(self, service_name: str, service_start_type: WindowsServiceStartTypeEnum):
         cmd = f'sc config {service_name} start={service_start_type.value}'
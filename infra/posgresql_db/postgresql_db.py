@@ -1,18 +1,51 @@
+import functools
 import json
 import warnings
+from typing import Iterator
 import allure
 import logging
-from sshtunnel import SSHTunnelForwarder
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 from infra.allure_report_handler.reporter import Reporter
 from infra.containers.postgresql_over_ssh_details import PostgresqlOverSshDetails
 from infra.containers.ssh_details import SshDetails
+from infra.posgresql_db.ssh_tunnel_pool import SshTunnelPool, SharedSshTunnel
 logger = logging.getLogger(__name__)
 
+DB_POOL_SIZE = 5
+DB_POOL_RECYCLE = 30 * 60  # seconds, connections older than that are replaced before use
+DEFAULT_STREAM_BATCH_SIZE = 1000
+MAX_ROWS_TO_ATTACH = 50  # only a preview of the results is attached to the report
+PREPARED_STATEMENTS_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PREPARED_STATEMENTS_CACHE_SIZE)
+def _prepare_statement(sql: str):
+    """ Same sql text gets the same statement object, so sqlalchemy reuses its compiled form """
+    return text(sql)
+
+
+def _row_to_dict(row) -> dict:
+    return dict(row._mapping) if hasattr(row, '_mapping') else dict(row)
+
+
+def _attach_rows_preview(rows: list[dict], total_rows: int):
+    preview = json.dumps(rows[:MAX_ROWS_TO_ATTACH], indent=4, default=str)
+    if total_rows > MAX_ROWS_TO_ATTACH:
+        preview = f"First {MAX_ROWS_TO_ATTACH} rows out of {total_rows}:\n{preview}"
+    Reporter.attach_str_as_file(file_name='result', file_content=preview)
+
 
 class PostgresqlOverSshDb:
+    """
+    The ssh tunnel is shared with all the other db objects of the same host (see SshTunnelPool) and the engine keeps
+    a pool of warm connections that are pinged before use, so many queries pay a single ssh handshake.
+    Can be used as context manager, the session is closed at the end of the outermost with block only if it was
+    opened by it, the engine and the tunnel stay alive until disconnect (or the end of the run):
+        with management.postgresql_db as db:
+            db.execute_sql_command(...)
+    """
 
     def __init__(self,
                  ssh_details: SshDetails,
@@ -20,56 +53,205 @@ class PostgresqlOverSshDb:
 
         self._ssh_details: SshDetails = ssh_details
         self._postgresql_details: PostgresqlOverSshDetails= postgresql_details
+        self._shared_tunnel: SharedSshTunnel | None = None
         self._engine = None
+        self._engine_local_port = None
         self._session = None
+        self._context_depth = 0
+        self._connected_by_context = False
 
     @property
     def session(self):
         return self._session
 
+    @property
+    def is_connected(self) -> bool:
+        return self._session is not None
+
+    def __enter__(self):
+        if self._context_depth == 0 and not self.is_connected:
+            self.connect()
+            self._connected_by_context = True
+        self._context_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._context_depth -= 1
+        if self._context_depth == 0 and self._connected_by_context:
+            self._connected_by_context = False
+            self._close_session()
+
     @allure.step("Connect to postgresql DB Using SSH binding")
     def connect(self):
         """
         This method use to connect to postgresql DB via SSHTunnelForwarder since postgresql configuration allows
         to connect to the DB only from the machine itself (127.0.0.1) unless we change the configuration of it.
         """
-        server = SSHTunnelForwarder((self._ssh_details.host_ip, int(self._ssh_details.port)),  # Remote server IP and SSH port
-                                     ssh_username=self._ssh_details.user_name,
-                                    ssh_password=self._ssh_details.password,
-                                    remote_bind_address=(self._postgresql_details.server_ip, int(self._postgresql_details.server_port)))
-        server.start()  # start ssh sever
-
-        # connect to PostgreSQL
-        local_port = str(server.local_bind_port)
-        self._engine = create_engine(
-            f'postgresql://{self._postgresql_details.user_name}:{self._postgresql_details.password}@{self._postgresql_details.server_ip}:{local_port}/{self._postgresql_details.db_name}')
+        if self._shared_tunnel is None:
+            self._shared_tunnel = SshTunnelPool.acquire(
+                ssh_details=self._ssh_details,
+                remote_bind_address=(self._postgresql_details.server_ip, int(self._postgresql_details.server_port)))
 
+        self._ensure_engine()
+        self._close_session()
         Session = sessionmaker(bind=self._engine, autocommit=True)
         self._session = Session()
 
-    @allure.step("Disconnect from DB")
-    def disconnect(self):
+    def _close_session(self):
+        """ Return the connection of the session to the engine pool """
         if self._session is not None:
             self._session.close()
+            self._session = None
+
+    def _ensure_engine(self):
+        """ Create the engine, or recreate it if the tunnel was restarted on a different local port """
+        self._shared_tunnel.ensure_active()
+        local_port = self._shared_tunnel.local_bind_port
+        if self._engine is not None and self._engine_local_port == local_port:
+            return
+
+        if self._engine is not None:
+            logger.debug(f"SSH tunnel local port was changed to {local_port}, recreate the db engine")
+            self._engine.dispose()
+
+        # connect to PostgreSQL
+        self._engine = create_engine(
+            f'postgresql://{self._postgresql_details.user_name}:{self._postgresql_details.password}@{self._postgresql_details.server_ip}:{local_port}/{self._postgresql_details.db_name}',
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            pool_recycle=DB_POOL_RECYCLE)
+        self._engine_local_port = local_port
+        if self._session is not None:
+            self._session.bind = self._engine
+
+    @allure.step("Disconnect from DB")
+    def disconnect(self):
+        """ Close the session, the pooled connections and release the ssh tunnel """
+        self._close_session()
+
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+            self._engine_local_port = None
+
+        if self._shared_tunnel is not None:
+            SshTunnelPool.release(self._shared_tunnel)
+            self._shared_tunnel = None
 
     @allure.step("Execute SQL command")
     def execute_sql_command(self, sql_cmd: str) -> list[dict]:
         """
         This method execute any sql query
-        will return result only in case that "select" in the sql_cmd
+        will return result only in case that the sql_cmd returns rows
+        The sql_cmd is sent to the driver as is (no bind parameters, so ':' and '%' are literal),
+        prefer query/execute with params over building the sql_cmd with f-strings
         :param sql_cmd: sql query as string
         :return: list of dict with key as column_name, and value as data
         """
         with warnings.catch_warnings():
             warnings.simplefilter('ignore')
-            if self._session is None:
-                self.connect()
-
-            if 'select' in sql_cmd.lower():
-                Reporter.report(message=f"Going to execute sql command: {sql_cmd}", logger_func=logger.info)
-                results = self._session.execute(sql_cmd).fetchall()
-                results_as_list_of_dicts = [{**row} for row in results]
-                Reporter.attach_str_as_file(file_name='result', file_content=json.dumps(results_as_list_of_dicts, indent=4))
+            self._ensure_connected()
+            Reporter.report(message=f"Going to execute sql command: {sql_cmd}", logger_func=logger.info)
+            connection = self._session.connection().execution_options(no_parameters=True)
+            result = connection.exec_driver_sql(sql_cmd)
+            if result.returns_rows:
+                results_as_list_of_dicts = [_row_to_dict(row) for row in result.fetchall()]
+                _attach_rows_preview(rows=results_as_list_of_dicts, total_rows=len(results_as_list_of_dicts))
                 return results_as_list_of_dicts
 
-            self._session.execute(sql_cmd)
+    @allure.step("Execute SQL query")
+    def query(self, sql: str, params: dict = None) -> list[dict]:
+        """
+        Execute query with bound parameters, for example:
+            query("select id from adm_users where username = :user_name", {'user_name': 'admin'})
+        :param sql: sql query with :name placeholders
+        :param params: values of the placeholders
+        :return: list of dict with key as column_name, and value as data
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self._ensure_connected()
+            Reporter.report(message=f"Going to execute sql query: {sql} with params: {params}",
+                            logger_func=logger.info)
+            result = self._session.execute(_prepare_statement(sql), params or {})
+            if not result.returns_rows:
+                return []
+
+            rows = [_row_to_dict(row) for row in result.fetchall()]
+            _attach_rows_preview(rows=rows, total_rows=len(rows))
+            return rows
+
+    @allure.step("Execute SQL command with params")
+    def execute(self, sql: str, params: dict = None):
+        """
+        Execute a single command (insert/update/delete) with bound parameters in its own transaction, for example:
+            execute("insert into adm_users_roles (user_id, role_id) values (:user_id, :role_id)",
+                    {'user_id': 1, 'role_id': 2})
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self._ensure_connected()
+            Reporter.report(message=f"Going to execute sql command: {sql} with params: {params}",
+                            logger_func=logger.info)
+            with self._engine.begin() as connection:
+                connection.execute(_prepare_statement(sql), params or {})
+
+    @allure.step("Execute SQL command for {num_of_params} sets of params")
+    def _executemany(self, sql: str, params_list: list[dict], num_of_params: int):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self._ensure_connected()
+            Reporter.report(message=f"Going to execute sql command: {sql} for {num_of_params} sets of params",
+                            logger_func=logger.info)
+            with self._engine.begin() as connection:
+                connection.execute(_prepare_statement(sql), params_list)
+
+    def executemany(self, sql: str, params_list: list[dict]):
+        """
+        Execute the same command (usually insert) for many sets of params in a single transaction
+        :param sql: sql command with :name placeholders
+        :param params_list: list of dicts, values of the placeholders for every execution
+        """
+        if len(params_list) == 0:
+            return
+        self._executemany(sql=sql, params_list=params_list, num_of_params=len(params_list))
+
+    def stream(self, sql: str, params: dict = None, batch_size: int = DEFAULT_STREAM_BATCH_SIZE) -> Iterator[dict]:
+        """
+        Iterate over the rows of a large query in constant memory, rows are read with a server side cursor
+        batch_size rows at a time. Only a preview of the rows is attached to the report.
+        The db connection is held until the iteration ends, so consume the iterator (or close it) soon.
+        :param sql: sql query with :name placeholders
+        :param params: values of the placeholders
+        :param batch_size: rows to fetch from the server in every round trip
+        """
+        self._ensure_connected()
+        Reporter.report(message=f"Going to stream sql query: {sql} with params: {params}, batch size: {batch_size}",
+                        logger_func=logger.info)
+        preview = []
+        num_of_rows = 0
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                with self._engine.connect() as connection:
+                    result = connection.execution_options(stream_results=True).execute(_prepare_statement(sql),
+                                                                                       params or {})
+                    while True:
+                        rows = result.fetchmany(batch_size)
+                        if len(rows) == 0:
+                            break
+
+                        for row in rows:
+                            row_as_dict = _row_to_dict(row)
+                            if len(preview) < MAX_ROWS_TO_ATTACH:
+                                preview.append(row_as_dict)
+                            num_of_rows += 1
+                            yield row_as_dict
+        finally:
+            _attach_rows_preview(rows=preview, total_rows=num_of_rows)
+
+    def _ensure_connected(self):
+        if self._session is None:
+            self.connect()
+        else:
+            self._ensure_engine()
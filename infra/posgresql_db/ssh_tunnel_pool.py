@@ -0,0 +1,90 @@
+import atexit
+import logging
+import threading
+
+from sshtunnel import SSHTunnelForwarder
+
+from infra.containers.ssh_details import SshDetails
+
+logger = logging.getLogger(__name__)
+
+
+class SharedSshTunnel:
+    """ SSHTunnelForwarder that is shared by all the users of the same ssh host and remote bind address """
+
+    def __init__(self, key: tuple, tunnel: SSHTunnelForwarder):
+        self.key = key
+        self.tunnel = tunnel
+        self.ref_count = 0
+
+    @property
+    def local_bind_port(self) -> int:
+        return self.tunnel.local_bind_port
+
+    def ensure_active(self):
+        """ Restart the tunnel if the ssh transport behind it is down (machine rebooted, connection dropped) """
+        if self.tunnel.is_active:
+            return
+
+        logger.info(f"SSH tunnel to {self.key[0]} is not active, restarting it")
+        self.tunnel.restart()
+
+
+class SshTunnelPool:
+    """
+    Keeps a single ssh tunnel per (ssh host, ssh user, remote bind address) for all the db objects in the process,
+    the tunnel is started by the first user and stopped when the last user releases it.
+    """
+
+    _tunnels = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def acquire(cls, ssh_details: SshDetails, remote_bind_address: tuple) -> SharedSshTunnel:
+        key = (ssh_details.host_ip, int(ssh_details.port), ssh_details.user_name, remote_bind_address)
+        with cls._lock:
+            shared_tunnel = cls._tunnels.get(key)
+            if shared_tunnel is None:
+                logger.debug(f"Start ssh tunnel to {ssh_details.host_ip} for {remote_bind_address}")
+                tunnel = SSHTunnelForwarder((ssh_details.host_ip, int(ssh_details.port)),
+                                            ssh_username=ssh_details.user_name,
+                                            ssh_password=ssh_details.password,
+                                            remote_bind_address=remote_bind_address)
+                tunnel.start()
+                shared_tunnel = SharedSshTunnel(key=key, tunnel=tunnel)
+                cls._tunnels[key] = shared_tunnel
+            else:
+                shared_tunnel.ensure_active()
+
+            shared_tunnel.ref_count += 1
+            return shared_tunnel
+
+    @classmethod
+    def release(cls, shared_tunnel: SharedSshTunnel):
+        with cls._lock:
+            shared_tunnel.ref_count -= 1
+            if shared_tunnel.ref_count > 0:
+                return
+
+            cls._tunnels.pop(shared_tunnel.key, None)
+
+        cls._stop(shared_tunnel)
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            shared_tunnels = list(cls._tunnels.values())
+            cls._tunnels.clear()
+
+        for shared_tunnel in shared_tunnels:
+            cls._stop(shared_tunnel)
+
+    @staticmethod
+    def _stop(shared_tunnel: SharedSshTunnel):
+        try:
+            shared_tunnel.tunnel.stop()
+        except Exception as e:
+            logger.debug(f"Failed to stop ssh tunnel to {shared_tunnel.key[0]}, original exception: {e}")
+
+
+atexit.register(SshTunnelPool.close_all)
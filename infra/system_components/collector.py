@@ -5,7 +5,7 @@ import allure
 
 import third_party_details
 from infra.enums import FortiEdrSystemState
-from infra.system_components.collectors.default_values import COLLECTOR_KEEPALIVE_INTERVAL, MAX_WAIT_FOR_STATUS
+from infra.system_components.collectors.default_values import MAX_WAIT_FOR_STATUS, get_status_polling_kwargs
 from infra.common_utils import wait_for_condition
 logger = logging.getLogger(__name__)
 
@@ -99,34 +99,38 @@ class CollectorAgent:
         return self.get_agent_status() == FortiEdrSystemState.ISOLATED
 
     @allure.step("Wait until agent is running")
-    def wait_until_agent_running(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_agent_running(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is running")
         wait_for_condition(condition_func=self.is_agent_running, timeout_sec=timeout_sec,
-                           interval_sec=interval_sec, condition_msg=f"{self} is running")
+                           condition_msg=f"{self} is running",
+                           **get_status_polling_kwargs(interval_sec))
 
     @allure.step("Wait until agent is isolated")
-    def wait_until_agent_isolated(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_agent_isolated(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is isolated")
         wait_for_condition(condition_func=self.is_agent_isolated, timeout_sec=timeout_sec,
-                           interval_sec=interval_sec, condition_msg=f"{self} is isolated")
+                           condition_msg=f"{self} is isolated",
+                           **get_status_polling_kwargs(interval_sec))
 
     def is_agent_down(self):
         return self.get_agent_status() == FortiEdrSystemState.DOWN
 
     @allure.step("Wait until agent is down")
-    def wait_until_agent_down(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_agent_down(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is down")
         wait_for_condition(condition_func=self.is_agent_down, timeout_sec=timeout_sec,
-                           interval_sec=interval_sec, condition_msg=f"{self} is down")
+                           condition_msg=f"{self} is down",
+                           **get_status_polling_kwargs(interval_sec))
 
     def is_agent_disabled(self):
         return self.get_agent_status() == FortiEdrSystemState.DISABLED
 
     @allure.step("Wait until agent is disabled")
-    def wait_until_agent_disabled(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=COLLECTOR_KEEPALIVE_INTERVAL):
+    def wait_until_agent_disabled(self, timeout_sec=MAX_WAIT_FOR_STATUS, interval_sec=None):
         logger.info(f"Wait until {self} is disabled")
         wait_for_condition(condition_func=self.is_agent_disabled, timeout_sec=timeout_sec,
-                           interval_sec=interval_sec, condition_msg=f"{self} is disabled")
+                           condition_msg=f"{self} is disabled",
+                           **get_status_polling_kwargs(interval_sec))
 
     @abstractmethod
     def reboot(self):
@@ -3,7 +3,7 @@ import allure
 import logging
 from infra.common_utils import wait_for_condition
 from infra.system_components.collector import CollectorAgent
-from .default_values import MAX_WAIT_FOR_PID, PID_INTERVAL
+from .default_values import MAX_WAIT_FOR_PID, PID_INTERVAL, PID_FAST_POLL_SEC, PID_FAST_POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,11 @@ def _wait_for_process_id(collector: CollectorAgent, is_alive, timeout=None, inte
     log_msg = "appear" if is_alive else "disappear"
     logger.info(f"Wait for collector pid to {log_msg}")
     timeout = timeout or MAX_WAIT_FOR_PID
-    interval = interval or PID_INTERVAL
+    # fast poll only by default, an interval given by the caller is kept as is
+    polling_kwargs = dict(interval_sec=interval)
+    if interval is None:
+        polling_kwargs = dict(interval_sec=PID_INTERVAL, fast_poll_sec=PID_FAST_POLL_SEC,
+                              fast_poll_interval_sec=PID_FAST_POLL_INTERVAL)
 
     def is_expected_pid():
         current_pid = collector.get_current_process_id()
@@ -33,8 +37,8 @@ def _wait_for_process_id(collector: CollectorAgent, is_alive, timeout=None, inte
             is_correct_pid = current_pid is None
         return is_correct_pid
 
-    wait_for_condition(condition_func=is_expected_pid, timeout_sec=timeout, interval_sec=interval,
-                       condition_msg=f"Wait for collector pid to {log_msg}")
+    wait_for_condition(condition_func=is_expected_pid, timeout_sec=timeout,
+                       condition_msg=f"Wait for collector pid to {log_msg}", **polling_kwargs)
 
 
 @contextmanager
@@ -1,6 +1,8 @@
 
 MAX_WAIT_FOR_PID = 10
 PID_INTERVAL = 1
+PID_FAST_POLL_SEC = 3  # the process usually appears/disappears within a few seconds
+PID_FAST_POLL_INTERVAL = 0.2
 COLLECTOR_KEEPALIVE_INTERVAL = 5
 MAX_WAIT_FOR_STATUS = 5 * 60
 MAX_WAIT_FOR_DELETION = 5 * 60
@@ -8,3 +10,20 @@ MAX_WAIT_FOR_ISOLATE = 2 * 60
 
 MAX_WAIT_FOR_NEW_CONFIG_FILE_TO_APPEAR = 3 * 60
 CONFIG_FILE_APPEAR_INTERVAL = 5
+
+# status transitions are usually fast, so poll often at the beginning and then back off to not overload the target
+STATUS_POLLING_KWARGS = dict(fast_poll_sec=15, fast_poll_interval_sec=1, backoff_factor=1.5, max_interval_sec=30,
+                             jitter_ratio=0.1)
+CONFIG_FILE_POLLING_KWARGS = dict(backoff_factor=1.5, max_interval_sec=20, jitter_ratio=0.1)
+
+
+def get_status_polling_kwargs(interval_sec: float = None) -> dict:
+    """
+    Polling arguments of wait_for_condition for status waits
+    :param interval_sec: interval given by the caller - poll at this fixed interval,
+    None - poll according to the status polling profile
+    """
+    if interval_sec is not None:
+        return dict(interval_sec=interval_sec)
+
+    return dict(interval_sec=COLLECTOR_KEEPALIVE_INTERVAL, **STATUS_POLLING_KWARGS)
@@ -39,11 +39,14 @@ class LinuxCollector(CollectorAgent):
     def __init__(self, host_ip: str, user_name: str, password: str):
         super().__init__(host_ip=host_ip)
         self._os_station = LinuxStation(host_ip=host_ip, user_name=user_name, password=password)
-        self.distro_type = self.os_station.distro_type
         self._process_id = self.get_current_process_id()
         self.__qa_files_path = "/home/qa"
         self._initial_version = self.get_version()
 
+    @property
+    def distro_type(self) -> LinuxDistroTypes:
+        return self.os_station.distro_type
+
     @property
     def cached_process_id(self) -> int:
         """ Caching the current process id in order later validate if it changed """
@@ -155,10 +158,10 @@ class LinuxCollector(CollectorAgent):
     @allure.step("Get crash dump files paths")
     def get_crash_dumps_files_paths(self) -> List[str]:
         crash_dumps_paths = []
-        for folder_path in CRASH_FOLDERS_PATHS:
-            files_paths = self.os_station.get_list_of_files_in_folder(folder_path=folder_path)
-            if files_paths is not None and len(files_paths) > 0:
-                crash_dumps_paths += files_paths
+        results = self.os_station.execute_batch(commands=[f'ls {folder_path}' for folder_path in CRASH_FOLDERS_PATHS])
+        for folder_path, result in zip(CRASH_FOLDERS_PATHS, results):
+            if result.succeeded and result.stdout != '':
+                crash_dumps_paths += [f'{folder_path}/{file_name}' for file_name in result.stdout.split('\n')]
 
         return crash_dumps_paths if len(crash_dumps_paths) > 0 else None
 
@@ -322,8 +325,12 @@ class LinuxCollector(CollectorAgent):
         return package_name_to_uninstall
 
     @allure.step("{0} - Create event {malware_name}")
-    def create_event(self, malware_name: str=SUPPORTED_MALWARE_FOLDER_NAME):
-        """ If the malware simulator does not exist on local machine, we will copy it from the shared drive """
+    def create_event(self, malware_name: str=SUPPORTED_MALWARE_FOLDER_NAME, asynchronous: bool = False):
+        """
+        If the malware simulator does not exist on local machine, we will copy it from the shared drive
+        :param asynchronous: True - the malware is started in background and the SshAsyncCommand handle is returned,
+        so other actions (for example logs collection) can run while the malware is running.
+        """
         malware_folder_name = malware_name
         assert malware_folder_name == SUPPORTED_MALWARE_FOLDER_NAME, \
             f"Malware '{malware_folder_name}' is not supported in linux"
@@ -347,6 +354,9 @@ class LinuxCollector(CollectorAgent):
         pid = self.os_station.get_malware_process_id(malware_name)
         assert pid is None, f"{malware_name} already running pid is {pid}"
         trigger_event_cmd = f"cd {local_malware_folder_path}; {malware_file_path}"
+        if asynchronous:
+            return self.os_station.execute_cmd(cmd=trigger_event_cmd, asynchronous=True)
+
         result = self.os_station.execute_cmd(cmd=trigger_event_cmd, fail_on_err=False, return_output=True,
                                              attach_output_to_report=True)
         self.os_station.execute_cmd(cmd="ps aux")
@@ -1,6 +1,5 @@
-import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import logging
 import allure
 
@@ -15,7 +14,7 @@ from infra.allure_report_handler.reporter import Reporter, INFO
 from infra.system_components.collector import CollectorAgent, FILENAME_EDR_TESTER
 from infra.enums import FortiEdrSystemState
 from infra.system_components.collectors.default_values import MAX_WAIT_FOR_NEW_CONFIG_FILE_TO_APPEAR, \
-    CONFIG_FILE_APPEAR_INTERVAL
+    CONFIG_FILE_APPEAR_INTERVAL, CONFIG_FILE_POLLING_KWARGS
 from infra.utils.utils import StringUtils
 from sut_details import default_organization_registration_password
 from infra.system_components.collectors.windows_os.windows_collector_installation_utils import (
@@ -34,13 +33,19 @@ SERVICE_NAME = "FortiEDRCollectorService."
 INSTALL_UNINSTALL_LOGS_FOLDER_PATH = "C:\\InstallUninstallLogs"
 EXTRACT_EDR_EVENT_TESTER_TIMEOUT = 30
 EDR_EVENT_TESTER_TIMEOUT = 1200
+BLG_FILES_TO_PARSE_PER_CMD = 20  # keeps the command line below the cmd.exe length limit
+BLG_PARSE_TIMEOUT = 10 * 60
 
 
 class WindowsCollector(CollectorAgent):
 
-    def __init__(self, host_ip: str, user_name: str, password: str):
+    def __init__(self, host_ip: str, user_name: str, password: str, os_station: WindowsStation = None):
+        """
+        :param os_station: station of the host that was already created (its connection and resolved details are
+        reused), None - create a new station
+        """
         super().__init__(host_ip=host_ip)
-        self._os_station = WindowsStation(host_ip=host_ip, user_name=user_name, password=password)
+        self._os_station = os_station or WindowsStation(host_ip=host_ip, user_name=user_name, password=password)
         self._process_id = self.get_current_process_id()
         self.__collector_installation_path: str = r"C:\Program Files\Fortinet\FortiEDR"
         self.__collector_service_exe: str = f"{self.__collector_installation_path}\FortiEDRCollectorService.exe"
@@ -48,6 +53,9 @@ class WindowsCollector(CollectorAgent):
         self.__counters_file: str = fr"{self.__program_data}\Logs\Driver\counters.txt"
         self.__crash_dumps_dir: str = fr"{self.program_data}\CrashDumps\Collector"
         self.__target_logs_folder: str = "C:\\ParsedLogsFolder"
+        self.__log_parser_file: str | None = None
+        self.__log_parser_version: str | None = None
+        self.__parsed_blg_files_cache: Dict[str, Tuple[str, str]] = {}  # .blg path -> (size, modify time) when parsed
         self.__memory_dmp_file_path: str = r'C:\WINDOWS\memory.dmp'
         self.__collected_crash_dump_dedicated_folder: str = r'C:\CrashDumpsCollected'
         self.__collector_logs_folder: str = f"{self.__program_data}\Logs"
@@ -161,7 +169,8 @@ class WindowsCollector(CollectorAgent):
         wait_for_condition(condition_func=condition,
                            timeout_sec=MAX_WAIT_FOR_NEW_CONFIG_FILE_TO_APPEAR,
                            interval_sec=CONFIG_FILE_APPEAR_INTERVAL,
-                           condition_msg=f"{self} got new configuration file")
+                           condition_msg=f"{self} got new configuration file",
+                           **CONFIG_FILE_POLLING_KWARGS)
 
     def get_qa_files_path(self):
         return self.__qa_files_path
@@ -280,26 +289,31 @@ class WindowsCollector(CollectorAgent):
     def get_crash_dumps_files(self) -> List[str]:
         folder_to_search = self._get_crash_folders()
 
+        # all the crash folders and the memory dump are checked in a single round trip,
+        # 'dir /b' of a missing folder fails so there is no need to check if the folder exist before
+        commands = [f'dir /b {single_folder}' for single_folder in folder_to_search]
+        commands.append(f'IF exist {self.__memory_dmp_file_path} (echo {str(True)}) ELSE (echo {str(False)})')
+        results = self.os_station.execute_batch(commands=commands)
+        memory_dump_result = results.pop()
+
         crash_dumps_list = None
-        for single_folder in folder_to_search:
-            is_folder_exist = self.os_station.is_path_exist(single_folder)
-            if is_folder_exist:
-                files_in_folder = self.os_station.get_list_of_files_in_folder(folder_path=single_folder)
-                if files_in_folder is not None and len(files_in_folder) > 0:
-                    files_in_folder = [fr'{single_folder}\{single_file}' for single_file in files_in_folder]
-                    if 'C:\ProgramData\FortiEDR\Dumps\Collector\TMP' in files_in_folder:
-                        files_in_folder.remove('C:\ProgramData\FortiEDR\Dumps\Collector\TMP')
+        for single_folder, result in zip(folder_to_search, results):
+            if not result.succeeded or result.stdout == '':
+                continue
 
-                    if single_folder == 'C:\ProgramData\FortiEDR\Dumps\Collector':
-                        files_in_folder = [file for file in files_in_folder if not file.endswith('.exe.mem')]
+            files_in_folder = [fr'{single_folder}\{single_file.strip()}' for single_file in result.stdout.split('\n')]
+            if 'C:\ProgramData\FortiEDR\Dumps\Collector\TMP' in files_in_folder:
+                files_in_folder.remove('C:\ProgramData\FortiEDR\Dumps\Collector\TMP')
 
-                    if crash_dumps_list is None:
-                        crash_dumps_list = []
+            if single_folder == 'C:\ProgramData\FortiEDR\Dumps\Collector':
+                files_in_folder = [file for file in files_in_folder if not file.endswith('.exe.mem')]
 
-                    crash_dumps_list += files_in_folder
+            if crash_dumps_list is None:
+                crash_dumps_list = []
 
-        is_memory_dump_exist = self.os_station.is_path_exist(path=self.__memory_dmp_file_path)
-        if is_memory_dump_exist:
+            crash_dumps_list += files_in_folder
+
+        if str(True) in memory_dump_result.stdout:
             if crash_dumps_list is None:
                 crash_dumps_list = []
 
@@ -399,14 +413,15 @@ class WindowsCollector(CollectorAgent):
         return True
 
     @allure.step("{0} - Copy log parser to machine")
-    def copy_log_parser_to_machine(self):
+    def copy_log_parser_to_machine(self, version: str = None):
         """
         The role of this method is to copy the log parser to the machine.
         if log parser exist it will return the full path of log parser path, else copy from shared folder
         and return file path
+        :param version: collector version, None - get it from the collector
         :return: full log parser file path
         """
-        version = self.get_version()
+        version = version if version is not None else self.get_version()
         shared_drive_path = rf'{third_party_details.SHARED_DRIVE_VERSIONS_PATH}\{version}'
         desired_file_name = f'blg2log_{version}.exe'
 
@@ -426,32 +441,88 @@ class WindowsCollector(CollectorAgent):
 
         return full_decoder_file_path
 
-    @allure.step("{0} - Copy all .blg log files that was modified after {initial_timestamp} to C:\\ParsedLogsFolder")
-    def _copy_blg_log_files_that_was_modified_after_given_timestamp_to_parsed_log_folder(self,
-                                                                                         initial_timestamp: str):
+    def _get_parsed_log_file_path(self, blg_file_path: str, suffix: str = '.log') -> str:
+        file_name = blg_file_path.split('\\')[-1]
+        return fr'{self.__target_logs_folder}\{file_name[:-len(".blg")]}{suffix}'
+
+    @allure.step("{0} - Get details of the .blg log files and of the parsed log files")
+    def _get_blg_and_parsed_log_files_details(self) -> (Dict[str, Tuple[str, str, datetime]], set):
         """
-        the role of this method is to copy all blg .files that was modified after the initial timestamp
-        :param initial_timestamp: should be in the format: 25/01/2022 16:11:38
+        Get the size and last modify time of all the .blg files and the paths of the parsed log files
+        with a single command
+        :return: dict of .blg file path -> (size, modify time ticks, modify time),
+        set of the existing parsed log files paths (lower case)
         """
+        paths = fr"'{self.__collector_logs_folder}\*\*.blg', '{self.__target_logs_folder}\*.log'"
+        file_details = "$_.FullName + '|' + $_.Length + '|' + $_.LastWriteTime.Ticks + '|' + " \
+                       "$_.LastWriteTime.ToString('yyyy-MM-dd HH:mm:ss')"
+        cmd = f'powershell "Get-ChildItem -Path {paths} -ErrorAction SilentlyContinue | ' \
+              f'ForEach-Object {{ {file_details} }}"'
+        output = self.os_station.execute_cmd(cmd=cmd, return_output=True, fail_on_err=False,
+                                             attach_output_to_report=False)
+
+        blg_files_details = {}
+        parsed_log_files = set()
+        for line in (output or '').splitlines():
+            parts = line.strip().split('|')
+            if len(parts) != 4:
+                continue
+
+            file_path, size, modify_time_ticks, modify_time = parts
+            if file_path.lower().endswith('.blg'):
+                blg_files_details[file_path] = (size, modify_time_ticks,
+                                                datetime.strptime(modify_time, "%Y-%m-%d %H:%M:%S"))
+            else:
+                parsed_log_files.add(file_path.lower())
 
-        first_time_stamp_datetime = datetime.strptime(initial_timestamp, "%d/%m/%Y %H:%M:%S")
-
-        folders_in_logs = self.os_station.get_list_of_files_in_folder(folder_path=self.__collector_logs_folder)
-        for log_folder in folders_in_logs:
-            log_files_in_log_folder = self.os_station.get_list_of_files_in_folder(
-                folder_path=fr'{self.__collector_logs_folder}\{log_folder}', file_suffix='.blg')
-            for single_log_file in log_files_in_log_folder:
-
-                # if file not modified after initial timestamp
-                last_modified_date = self.os_station.get_file_last_modify_date(file_path=single_log_file, date_format="'u'")
-                last_modified_date = last_modified_date.replace('Z', '')
-                last_modified_date_time = datetime.strptime(last_modified_date, "%Y-%m-%d %H:%M:%S")
+        return blg_files_details, parsed_log_files
 
-                if last_modified_date_time >= first_time_stamp_datetime:
-                    self.os_station.copy_files(source=single_log_file, target=self.__target_logs_folder)
+    @allure.step("{0} - Parse new and changed .blg log files")
+    def _parse_blg_files(self, log_parser_file: str, blg_files_details: Dict[str, Tuple[str, str, datetime]]):
+        """
+        Copy the given .blg files to the parsed logs folder and parse them. The parser is executed as before, without
+        arguments from the parsed logs folder (it parses all the .blg files of the current folder), so the copied
+        .blg files are removed after the parse, in order to parse only the new copies next time.
+        The command returns only after the parser exits, so there is no need to poll the folder until the parsed files
+        appear
+        """
+        blg_files = list(blg_files_details.keys())
+        copied_blg_files = [self._get_parsed_log_file_path(blg_file_path=blg_file, suffix='.blg')
+                            for blg_file in blg_files]
+        for i in range(0, len(blg_files), BLG_FILES_TO_PARSE_PER_CMD):
+            commands = []
+            for blg_file, copied_blg_file in zip(blg_files[i:i + BLG_FILES_TO_PARSE_PER_CMD],
+                                                 copied_blg_files[i:i + BLG_FILES_TO_PARSE_PER_CMD]):
+                parsed_log_file = self._get_parsed_log_file_path(blg_file_path=blg_file)
+                # old parsed file is removed first, so a failed parse will not leave a stale log file behind
+                commands.append(f'(del /Q "{parsed_log_file}" 2>nul & copy /Y "{blg_file}" "{copied_blg_file}" >nul)')
+
+            self.os_station.execute_cmd(cmd=' & '.join(commands), return_output=False, fail_on_err=False,
+                                        attach_output_to_report=False)
+
+        self.os_station.execute_cmd(cmd=f'cd /d "{self.__target_logs_folder}" & "{log_parser_file}" -q',
+                                    return_output=False, fail_on_err=False, attach_output_to_report=False,
+                                    timeout=BLG_PARSE_TIMEOUT)
+
+        for i in range(0, len(copied_blg_files), BLG_FILES_TO_PARSE_PER_CMD):
+            files_to_remove = ' '.join(f'"{x}"' for x in copied_blg_files[i:i + BLG_FILES_TO_PARSE_PER_CMD])
+            self.os_station.execute_cmd(cmd=f'del /Q {files_to_remove} 2>nul', return_output=False,
+                                        fail_on_err=False, attach_output_to_report=False)
+
+        parsed_log_files = self.os_station.get_list_of_files_in_folder(folder_path=self.__target_logs_folder,
+                                                                       file_suffix='.log') or []
+        parsed_log_files = set(file_path.lower() for file_path in parsed_log_files)
+        for blg_file, (size, modify_time_ticks, _) in blg_files_details.items():
+            parsed_log_file = self._get_parsed_log_file_path(blg_file_path=blg_file)
+            if parsed_log_file.lower() not in parsed_log_files:
+                self.__parsed_blg_files_cache.pop(blg_file, None)
+                assert False, f"Failed to parse {blg_file}, {parsed_log_file} was not created"
+
+            self.__parsed_blg_files_cache[blg_file] = (size, modify_time_ticks)
 
     @allure.step("{0} - Remove all log files from parsed log folder C:\\ParsedLogsFolder")
     def _remove_all_log_files_from_parsed_log_folder(self):
+        self.__parsed_blg_files_cache.clear()
         if self.os_station.is_path_exist(path=fr'{self.__target_logs_folder}\*.log'):
             self.os_station.remove_file(file_path=fr'{self.__target_logs_folder}\*.log')
 
@@ -462,9 +533,9 @@ class WindowsCollector(CollectorAgent):
                 print(e)
 
     @allure.step("{0} - Remove all irrelevant blg2log parsers from C:\\ParsedLogsFolder")
-    def _remove_all_irrelevant_blg2log_parsers(self):
+    def _remove_all_irrelevant_blg2log_parsers(self, current_version: str = None):
         parsers = self.os_station.get_list_of_files_in_folder(folder_path=fr'{self.__target_logs_folder}\blg2log_*')
-        current_version = self.get_version()
+        current_version = current_version if current_version is not None else self.get_version()
         if parsers is not None and len(parsers) > 0:
             for file in parsers:
                 if current_version not in file:
@@ -484,40 +555,46 @@ class WindowsCollector(CollectorAgent):
             self.os_station.remove_file(file_path=fr'{self.__collector_logs_folder}\{sub_folder}\*.blg')
         self.start_collector()
 
-    def _prepare_parsed_logs(self, initial_timestamp: str):
-
-        self._remove_all_log_files_from_parsed_log_folder()
-        self._remove_all_irrelevant_blg2log_parsers()
-
-        log_parser_file = self.copy_log_parser_to_machine()
-        self._copy_blg_log_files_that_was_modified_after_given_timestamp_to_parsed_log_folder(
-            initial_timestamp=initial_timestamp
-        )
-
-        Reporter.report("Checking if all .blg files parsed successfully")
-        # extract number of blg files after copy - 1 (minus the log parser itself)
-        num_blg_files = len(self.os_station.get_list_of_files_in_folder(folder_path=self.__target_logs_folder)) - 1
-
-        # parse logs in quite mode - without waiting to prompt (no need to enter key for exit)
-        self.os_station.execute_cmd(cmd=f'cd {self.__target_logs_folder} & {log_parser_file} -q')
-
-        curr_num_of_files = len(self.os_station.get_list_of_files_in_folder(folder_path=self.__target_logs_folder)) - 1
-        expected_file_num = num_blg_files * 2
+    def _get_log_parser(self) -> str:
+        """ Copy the parser of the current version only once, or again after the collector version was changed """
+        version = self.get_version()
+        if version != self.__log_parser_version:
+            self._remove_all_irrelevant_blg2log_parsers(current_version=version)
+            self.__log_parser_file = self.copy_log_parser_to_machine(version=version)
+            self.__log_parser_version = version
+            self.__parsed_blg_files_cache.clear()
 
-        timeout = 60
-        sleep_delay = 2
-        start_time = time.time()
-        if curr_num_of_files != expected_file_num:
-            while curr_num_of_files < expected_file_num and time.time() - start_time < timeout:
-                curr_num_of_files = len(
-                    self.os_station.get_list_of_files_in_folder(folder_path=self.__target_logs_folder)) - 1
-                time.sleep(sleep_delay)
+        return self.__log_parser_file
 
-        if curr_num_of_files != expected_file_num:
-            assert False, f"Not all log files parsed within {timeout}"
-        else:
+    def _prepare_parsed_logs(self, initial_timestamp: str) -> List[str]:
+        """
+        Parse the .blg files that were modified after the initial timestamp, files that were parsed before and were
+        not changed since (same size and modify time) are not parsed again
+        :param initial_timestamp: should be in the format: 25/01/2022 16:11:38
+        :return: paths of the parsed log files of the .blg files that were modified after the initial timestamp
+        """
+        first_time_stamp_datetime = datetime.strptime(initial_timestamp, "%d/%m/%Y %H:%M:%S")
+        log_parser_file = self._get_log_parser()
+        blg_files_details, parsed_log_files = self._get_blg_and_parsed_log_files_details()
+
+        relevant_blg_files = [blg_file for blg_file, (_, _, modify_time) in blg_files_details.items()
+                              if modify_time >= first_time_stamp_datetime]
+
+        blg_files_to_parse = {}
+        for blg_file in relevant_blg_files:
+            size, modify_time_ticks, _ = blg_files_details[blg_file]
+            is_parsed_log_exist = self._get_parsed_log_file_path(blg_file_path=blg_file).lower() in parsed_log_files
+            if not is_parsed_log_exist or self.__parsed_blg_files_cache.get(blg_file) != (size, modify_time_ticks):
+                blg_files_to_parse[blg_file] = blg_files_details[blg_file]
+
+        Reporter.report(f"{len(blg_files_to_parse)} of {len(relevant_blg_files)} .blg files should be parsed, "
+                        f"the rest were parsed before and not changed since")
+        if len(blg_files_to_parse) > 0:
+            self._parse_blg_files(log_parser_file=log_parser_file, blg_files_details=blg_files_to_parse)
             Reporter.report("all .blg files parsed successfully :)")
 
+        return [self._get_parsed_log_file_path(blg_file_path=blg_file) for blg_file in relevant_blg_files]
+
     @allure.step("{0} - Get logs content")
     def get_logs_content(self, file_suffix='.blg', filter_regex=None) -> dict:
         """
@@ -530,12 +607,7 @@ class WindowsCollector(CollectorAgent):
         Returns:
             dict: a dictionary of log-file-name: content
         """
-        self._prepare_parsed_logs(initial_timestamp=datetime.strftime(datetime.min, "%d/%m/%Y %H:%M:%S"))
-
-        # for each .txt file
-        log_files = self.os_station.get_list_of_files_in_folder(
-            folder_path=self.__target_logs_folder, file_suffix='.log'
-        )
+        log_files = self._prepare_parsed_logs(initial_timestamp=datetime.strftime(datetime.min, "%d/%m/%Y %H:%M:%S"))
 
         logs = {}
         for single_parsed_file in log_files:
@@ -559,44 +631,15 @@ class WindowsCollector(CollectorAgent):
         machine_timestamp_regex = r'(\d+)\/(\d+)\/(\d+)\s+(\d+):(\d+):(\d+)'
         first_time_stamp_datetime_to_append = datetime.strptime(first_log_timestamp_to_append, "%d/%m/%Y %H:%M:%S")
 
-        self._prepare_parsed_logs(initial_timestamp=first_log_timestamp_to_append)
-
-        # for each .txt file
-        log_files = self.os_station.get_list_of_files_in_folder(
-            folder_path=self.__target_logs_folder, file_suffix='.log'
-        )
+        log_files = self._prepare_parsed_logs(initial_timestamp=first_log_timestamp_to_append)
 
         for single_parsed_file in log_files:
-
-            is_logs_exist_after_the_first_timestamp = False
-            content = self.os_station.get_file_content(file_path=single_parsed_file)
-            first_date_in_log_file = StringUtils.get_txt_by_regex(
-                text=content, regex=f'({machine_timestamp_regex})', group=1
-            )
-
-            first_time_stamp_in_log_file_datetime = datetime.strptime(first_date_in_log_file, "%d/%m/%Y %H:%M:%S")
-
-            if first_log_timestamp_to_append in content:
-                index = content.index(first_log_timestamp_to_append)
-                content = content[index:]
-                is_logs_exist_after_the_first_timestamp = True
-            elif first_time_stamp_in_log_file_datetime >= first_time_stamp_datetime_to_append:
-                is_logs_exist_after_the_first_timestamp = True
-            else:
-                content_split = content.split('\n')
-                for single_line in content_split:
-                    line_date = StringUtils.get_txt_by_regex(
-                        text=single_line, regex=f'({machine_timestamp_regex})', group=1
-                    )
-
-                    if line_date is not None:
-                        if datetime.strptime(line_date, "%d/%m/%Y %H:%M:%S") > first_time_stamp_datetime_to_append:
-                            first_index = content.index(line_date)
-                            content = content[first_index:]
-                            logs_dict_with_content[single_parsed_file] = content
-                            break
-
-            if is_logs_exist_after_the_first_timestamp:
+            # binary search the parsed file on the collector, only the logs after the time stamp are transferred
+            content = self.os_station.get_log_content_from_timestamp(file_path=single_parsed_file,
+                                                                     timestamp=first_time_stamp_datetime_to_append,
+                                                                     timestamp_regex=machine_timestamp_regex,
+                                                                     timestamp_format="%d/%m/%Y %H:%M:%S")
+            if content is not None:
                 logs_dict_with_content[single_parsed_file] = content
 
         return logs_dict_with_content
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple
 
 import allure
 
@@ -8,6 +8,9 @@ from infra.containers.system_component_containers import CoreDetails
 from infra.enums import ComponentType
 from infra.system_components.forti_edr_linux_station import FortiEdrLinuxStation
 
+FIND_NEWERMT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BLG_PARSE_TIMEOUT = 10 * 60
+
 
 class Core(FortiEdrLinuxStation):
 
@@ -23,6 +26,7 @@ class Core(FortiEdrLinuxStation):
         self._details = core_details
         self.__parsed_logs_location = "/tmp/parsed_logs"
         self.__is_blg_parser_exist_for_current_version = True
+        self.__parsed_blg_files_stats: Dict[str, Tuple[str, str]] = {}  # .blg path -> (size, modify time) when parsed
 
     def __repr__(self):
         return f"Core {self._host_ip}"
@@ -38,6 +42,13 @@ class Core(FortiEdrLinuxStation):
     def get_logs_folder_path(self):
         return "/opt/FortiEDR/core/Logs/Core"
 
+    def create_logs_cursor(self, folder_path: str = None, file_suffix: str = '.log') -> None:
+        """
+        Logs of core are binary .blg files, a byte offset cursor is meaningless for them,
+        so they are always appended by time stamp (parsed with blg2log)
+        """
+        return None
+
     def _is_dedicated_blg_log_parser_exist_for_version(self, version):
         log_parser_name = f'blg2log_{version}'
         parser_full_path = f'{self._version_content_folder}/{log_parser_name}'
@@ -68,6 +79,7 @@ class Core(FortiEdrLinuxStation):
         log_folder = self.get_logs_folder_path()
         Reporter.report("Going to remove all core .blg log files")
         self.remove_file(file_path=f'{log_folder}/*.*')
+        self.__parsed_blg_files_stats.clear()
         self.start_service()
 
     @allure.step("{0} - Append logs to report")
@@ -143,36 +155,97 @@ class Core(FortiEdrLinuxStation):
 
         parser_full_path = f'{self._version_content_folder}/{log_parser_name}'
 
-        # parse logs
-        converted_files_paths = []
-
         with allure.step(f"Filter log files that was created after: {modified_after_date_time}"):
-            for blg_log_file_path in blg_log_files_paths:
-
-                if modified_after_date_time is not None:
-
-                    # check if file modified after initial timestamp
-                    current_file_modified_date = self.get_file_last_modify_date(file_path=blg_log_file_path, date_format=machine_datetime_format)
-
-                    first_timestamp_date_time = datetime.strptime(modified_after_date_time, machine_datetime_format)
-                    current_file_modified_date_time = datetime.strptime(current_file_modified_date, machine_datetime_format)
-
-                    if current_file_modified_date_time < first_timestamp_date_time:
-                        continue
-
-                cmd = f"{parser_full_path} -q {blg_log_file_path}"
-                output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=False, attach_output_to_report=True)
-                if f'converting {blg_log_file_path}' not in output:
-                    assert False, "Failed to parse log file"
-
-                # check that .log file is exist
-                converted_file = blg_log_file_path.replace('.blg', '.log')
-                Reporter.report(f"Checking that {converted_file} created")
-                is_parsed_log_files_created = self.is_path_exist(path=converted_file)
-                if not is_parsed_log_files_created:
-                    assert False, "Parsed log file are not created, check if .blg file to be parsed"
-
-                # read file content
-                converted_files_paths.append(blg_log_file_path.replace('.blg', '.log'))
-
-        return converted_files_paths
+            blg_files_to_parse, parsed_files_paths = self._get_blg_files_to_parse(
+                blg_log_files_paths=blg_log_files_paths,
+                modified_after_date_time=modified_after_date_time,
+                machine_datetime_format=machine_datetime_format)
+
+        if len(blg_files_to_parse) > 0:
+            self._parse_blg_files(parser_full_path=parser_full_path, blg_files_stats=blg_files_to_parse)
+            parsed_files_paths.update(blg_files_to_parse.keys())
+
+        # keep the order of the given files
+        return [self._get_parsed_log_path(blg_log_file_path) for blg_log_file_path in blg_log_files_paths
+                if blg_log_file_path in parsed_files_paths]
+
+    @staticmethod
+    def _get_parsed_log_path(blg_log_file_path: str) -> str:
+        return blg_log_file_path.replace('.blg', '.log')
+
+    def _get_blg_files_to_parse(self,
+                                blg_log_files_paths: List[str],
+                                modified_after_date_time,
+                                machine_datetime_format) -> (Dict[str, Tuple[str, str]], set):
+        """
+        Get the size and modify time of all the .blg files and the existing .log files with a single command
+        :return: dict of .blg files that should be parsed -> (size, modify time),
+        set of .blg files that their .log file is already up to date (parsed before and the .blg was not changed since)
+        """
+        if len(blg_log_files_paths) == 0:
+            return {}, set()
+
+        newer_than_filter = ''
+        if modified_after_date_time is not None:
+            # -newermt is "newer than", the original comparison included files modified in the same second
+            first_timestamp_date_time = datetime.strptime(modified_after_date_time, machine_datetime_format)
+            newer_than = (first_timestamp_date_time - timedelta(seconds=1)).strftime(FIND_NEWERMT_DATETIME_FORMAT)
+            newer_than_filter = f"-newermt '{newer_than}'"
+
+        # all the existing .log files (already parsed) and the .blg files that were modified after the time stamp
+        paths = ' '.join(f'{path} {self._get_parsed_log_path(path)}' for path in blg_log_files_paths)
+        cmd = f"find {paths} -maxdepth 0 \\( -name '*.log' -o \\( -name '*.blg' {newer_than_filter} \\) \\) " \
+              f"-printf '%s %T@ %p\\n' 2>/dev/null"
+        output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=False, attach_output_to_report=False)
+
+        files_stats = {}
+        for line in (output or '').split('\n'):
+            parts = line.split(' ', 2)
+            if len(parts) == 3:
+                size, modify_time, path = parts
+                files_stats[path] = (size, modify_time)
+
+        if modified_after_date_time is None:
+            assert any(path.endswith('.blg') for path in files_stats), \
+                f"None of the .blg files was found, output of the listing command: {output}"
+
+        blg_files_to_parse = {}
+        up_to_date_blg_files = set()
+        for blg_log_file_path in blg_log_files_paths:
+            blg_file_stats = files_stats.get(blg_log_file_path)
+            if blg_file_stats is None:
+                # modified before the given time stamp (or removed)
+                continue
+
+            is_parsed_log_exist = self._get_parsed_log_path(blg_log_file_path) in files_stats
+            if is_parsed_log_exist and self.__parsed_blg_files_stats.get(blg_log_file_path) == blg_file_stats:
+                up_to_date_blg_files.add(blg_log_file_path)
+            else:
+                blg_files_to_parse[blg_log_file_path] = blg_file_stats
+
+        Reporter.report(f"{len(blg_files_to_parse)} .blg files should be parsed, "
+                        f"{len(up_to_date_blg_files)} were already parsed and not changed since")
+        return blg_files_to_parse, up_to_date_blg_files
+
+    @allure.step("{0} - Parse .blg files in parallel")
+    def _parse_blg_files(self, parser_full_path: str, blg_files_stats: Dict[str, Tuple[str, str]]):
+        """
+        Parse all the files with a single command, blg2log processes are executed in parallel (process per CPU),
+        old .log files are removed first so the listing at the end shows only the files that were really created
+        """
+        blg_files = ' '.join(blg_files_stats.keys())
+        parsed_log_files = ' '.join(self._get_parsed_log_path(path) for path in blg_files_stats.keys())
+        cmd = f"printf '%s\\n' {blg_files} | " \
+              f"xargs -r -P $(nproc) -I {{}} sh -c 'rm -f \"${{1%.blg}}.log\"; {parser_full_path} -q \"$1\"' _ {{}} " \
+              f"> /dev/null 2>&1; ls -1 {parsed_log_files} 2>/dev/null"
+        output = self.execute_cmd(cmd=cmd, return_output=True, fail_on_err=False, attach_output_to_report=True,
+                                  timeout=BLG_PARSE_TIMEOUT)
+
+        created_log_files = set((output or '').split('\n'))
+        for blg_log_file_path, blg_file_stats in blg_files_stats.items():
+            converted_file = self._get_parsed_log_path(blg_log_file_path)
+            if converted_file not in created_log_files:
+                self.__parsed_blg_files_stats.pop(blg_log_file_path, None)
+                assert False, f"Parsed log file {converted_file} was not created, check if .blg file to be parsed"
+
+            self.__parsed_blg_files_stats[blg_log_file_path] = blg_file_stats
@@ -10,6 +10,7 @@ from infra.forti_edr_versions_service_handler.forti_edr_versions_service_handler
 from infra.allure_report_handler.reporter import Reporter
 from infra.enums import FortiEdrSystemState, ComponentType
 from infra.os_stations.linux_station import LinuxStation
+from infra.os_stations.log_cursor import LogsCursor
 from infra.utils.utils import StringUtils
 
 
@@ -257,24 +258,44 @@ class FortiEdrLinuxStation(LinuxStation):
                 content = self.get_file_content(file_path=single_file)
 
             else:
-                # else go trough the entire file in order to search logs rows that matching to our test time,
-                # logs that created after the start time
-                tmp_content = self.get_file_content(file_path=single_file)
-                tmp_content_splitted = tmp_content.split('\n')
-                for single_line in tmp_content_splitted:
-                    line_date = StringUtils.get_txt_by_regex(text=single_line, regex=f'({log_file_datetime_regex_python})',
-                                                             group=1)
-
-                    if line_date is not None:
-                        if datetime.strptime(line_date, log_timestamp_date_format) > first_log_timestamp_date_time:
-                            first_index = tmp_content.index(line_date)
-                            content = tmp_content[first_index:]
-                            Reporter.attach_str_as_file(file_name=single_file, file_content=content)
-                            break
+                # else binary search the file on the remote machine for the first log row that was created after
+                # the start time, only the rows after it are transferred
+                content = self.get_log_content_from_timestamp(file_path=single_file,
+                                                              timestamp=first_log_timestamp_date_time,
+                                                              timestamp_regex=log_file_datetime_regex_python,
+                                                              timestamp_format=log_timestamp_date_format)
 
             if content is not None:
                 Reporter.attach_str_as_file(file_name=single_file, file_content=content)
 
+    @allure.step("{0} - Create logs cursor")
+    def create_logs_cursor(self, folder_path: str = None, file_suffix: str = '.log') -> LogsCursor | None:
+        """
+        Save the current position of every log file, used in order to append to report only the logs that were written
+        after this point (see append_logs_to_report_from_cursor)
+        :return: None if the logs of the component are not plain text (appended by time stamp instead)
+        """
+        folder_path = folder_path if folder_path is not None else self.get_logs_folder_path()
+        return super().create_logs_cursor(folder_path=folder_path, file_suffix=file_suffix)
+
+    @allure.step("{0} - Append logs to report that were written after the cursor")
+    def append_logs_to_report_from_cursor(self, cursor: LogsCursor):
+        """
+        Unlike append_logs_to_report_by_given_timestamp, files are not searched or parsed by their timestamps,
+        only the bytes that were written after the cursor are fetched (including files that were rotated or created
+        after it)
+        """
+        is_appended = False
+        for file_path, content in self.iter_logs_appended_after_cursor(cursor=cursor):
+            if content == '':
+                continue
+
+            Reporter.attach_str_as_file(file_name=file_path, file_content=content)
+            is_appended = True
+
+        if not is_appended:
+            Reporter.report(f"There is no logs that were written after {cursor}")
+
     @allure.step("Upgrade {0} machine to build: {desired_build}")
     def upgrade_to_specific_build(self,
                                   desired_build: int = None,
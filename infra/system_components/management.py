@@ -195,22 +195,24 @@ class Management(FortiEdrLinuxStation):
         user_name : str, optional
             Which username will add the Rest API role, by default 'admin'
         """
-        user_id = self._get_user_id_by_username_from_db(user_name)
-        role_id = self._get_management_role_id_from_db(ManagementUserRoles.ROLE_REST_API.value)
-        is_exist = self._user_id_exist_with_role_id_in_db(user_id, role_id)
+        # all the queries below reuse the same tunnel and db connection
+        with self._postgresql_db:
+            user_id = self._get_user_id_by_username_from_db(user_name)
+            role_id = self._get_management_role_id_from_db(ManagementUserRoles.ROLE_REST_API.value)
+            is_exist = self._user_id_exist_with_role_id_in_db(user_id, role_id)
+
+            if is_exist:
+                Reporter.report(f"Rest API enabled for user: {user_name}, Nothing to do")
+                return
 
-        if is_exist:
-            Reporter.report(f"Rest API enabled for user: {user_name}, Nothing to do")
-            return
-        else:
             Reporter.report(f"Finished enabling {ManagementUserRoles.ROLE_REST_API.value}")
             self.add_role_id_with_user_id_db(user_id, role_id)
 
-            Reporter.report(f"Restarting after setting role via database to user '{user_name}'")
-            self.restart_service()
+        Reporter.report(f"Restarting after setting role via database to user '{user_name}'")
+        self.restart_service()
 
-            self.wait_till_service_up(timeout=self._WAIT_MANAGEMENT_SERVICE_TIMEOUT,
-                                      interval=self._WAIT_MANAGEMENT_SERVICE_INTERVAL)
+        self.wait_till_service_up(timeout=self._WAIT_MANAGEMENT_SERVICE_TIMEOUT,
+                                  interval=self._WAIT_MANAGEMENT_SERVICE_INTERVAL)
 
     @allure.step("Wait till the service is up with timeout set to {timeout} sec.")
     def wait_till_service_up(self, timeout: int = 60, interval: int = 5):
@@ -225,16 +227,17 @@ class Management(FortiEdrLinuxStation):
 
     @allure.step("Adding user ID to role ID in the DB")
     def add_role_id_with_user_id_db(self, user_id, role_id):
-        query = f"insert into {self._DB_TBL_ADM_USERS_ROLES} (user_id, role_id) values ({user_id}, {role_id})"
-        self._postgresql_db.execute_sql_command(sql_cmd=query)
+        query = f"insert into {self._DB_TBL_ADM_USERS_ROLES} (user_id, role_id) values (:user_id, :role_id)"
+        self._postgresql_db.execute(sql=query, params={'user_id': user_id, 'role_id': role_id})
 
         user_with_role_exist = self._user_id_exist_with_role_id_in_db(user_id, role_id)
         assert user_with_role_exist, "User ID with role ID doesn't exists in the DB and unable to add one :("
 
     @allure.step("Check if user id({user_id}) is already mapped with role id({expected_role_id})")
     def _user_id_exist_with_role_id_in_db(self, user_id, expected_role_id) -> bool:
-        user_roles = self._postgresql_db.execute_sql_command(
-            sql_cmd=f"select role_id from {self._DB_TBL_ADM_USERS_ROLES} where user_id={user_id}")
+        user_roles = self._postgresql_db.query(
+            sql=f"select role_id from {self._DB_TBL_ADM_USERS_ROLES} where user_id = :user_id",
+            params={'user_id': user_id})
         for user_role in user_roles:
             if user_role.get('role_id') == expected_role_id:
                 Reporter.report(f"Role ID is already enabled for user id: {user_id}, expected role ID: {expected_role_id}")
@@ -244,8 +247,9 @@ class Management(FortiEdrLinuxStation):
 
     @allure.step("Get {user_name} user_id from db")
     def _get_user_id_by_username_from_db(self, user_name) -> int:
-        users_table_results = self._postgresql_db.execute_sql_command(
-            sql_cmd=f"select id from {self._DB_TBL_ADM_USERS} where username ='{user_name}'")
+        users_table_results = self._postgresql_db.query(
+            sql=f"select id from {self._DB_TBL_ADM_USERS} where username = :user_name",
+            params={'user_name': user_name})
         assert len(users_table_results) == 1, f"Issue with finding user_id for the user '{user_name}'.({len(users_table_results)})"
 
         user_id = users_table_results[0].get('id')
@@ -253,8 +257,9 @@ class Management(FortiEdrLinuxStation):
 
     @allure.step("Get {user_role} id from db")
     def _get_management_role_id_from_db(self, user_role) -> int:
-        users_roles_results = self._postgresql_db.execute_sql_command(
-            sql_cmd=f"select id from {self._DB_TBL_ADM_ROLES} where authority = '{user_role}'")
+        users_roles_results = self._postgresql_db.query(
+            sql=f"select id from {self._DB_TBL_ADM_ROLES} where authority = :user_role",
+            params={'user_role': user_role})
         assert len(users_roles_results) == 1, f"Issue with finding role_id for the role.({len(users_roles_results)})"
 
         role_id = users_roles_results[0].get('id')
@@ -321,10 +326,9 @@ class Management(FortiEdrLinuxStation):
                  False if the content failed uploading or if file doesn't exist.
         """
         content_version = str(desired_content_num)
-        result = FortiEdrVersionsServiceHandler.get_latest_content_files_from_shared_folder(num_last_content_files=100)
         content_file_name = f"FortiEDRCollectorContent-{content_version}.nslo"
 
-        if f"FortiEDRCollectorContent-{content_version}.nslo" not in result:
+        if not FortiEdrVersionsServiceHandler.is_content_file_exist_in_shared_folder(content_file_name=content_file_name):
             assert False, f"Can not find content file {content_file_name} in shared folder"
 
         else:
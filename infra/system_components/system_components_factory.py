@@ -10,6 +10,8 @@ from infra.system_components.collectors.linux_os.linux_collector import LinuxCol
 from infra.system_components.collectors.windows_os.windows_collector import WindowsCollector
 from infra.system_components.core import Core
 from infra.system_components.management import Management
+from infra.os_stations.station_group import StationGroup
+from infra.os_stations.windows_station import WindowsStation
 from infra.utils.utils import StringUtils
 from infra.api.management_api.organization import is_organization_exist_by_name
 from infra.api.api_object_factory.rest_collectors_factory import get_collectors_without_org
@@ -76,21 +78,16 @@ class SystemComponentsFactory:
             if organization_rest_collectors is not None:
                 rest_collectors += organization_rest_collectors
 
+        windows_stations = []
         for rest_collector in rest_collectors:
             if 'windows' in collector_type.value.lower() and 'windows' in rest_collector.get_os_family(from_cache=True).lower():
-                user_name = sut_details.win_user_name
-                password = sut_details.win_password
                 if collector_type.value.lower() not in rest_collector.get_operating_system(from_cache=True).lower():
                     continue
-                collector_agent = WindowsCollector(host_ip=rest_collector.get_ip(from_cache=True), user_name=user_name,
-                                                   password=password)
-
-                if '64' in collector_type.name and '64' not in collector_agent.os_station.os_architecture:
-                    continue
-
-                if '32' in collector_type.name and '32' not in collector_agent.os_station.os_architecture:
-                    continue
-                agents_list.append(collector_agent)
+                # constructing a windows collector is heavy, so first check the architecture on a bare station,
+                # the station is then reused by the collector
+                windows_stations.append(WindowsStation(host_ip=rest_collector.get_ip(from_cache=True),
+                                                       user_name=sut_details.win_user_name,
+                                                       password=sut_details.win_password))
 
             elif 'linux' in collector_type.name.lower() and 'linux' in rest_collector.get_os_family(from_cache=True).lower():
                 if collector_type.value.lower() not in rest_collector.get_operating_system(from_cache=True).lower():
@@ -101,4 +98,25 @@ class SystemComponentsFactory:
                                                  password=sut_details.linux_password)
 
                 agents_list.append(collector_agent)
+
+        architectures = StationGroup(stations=windows_stations).run(func=lambda station: station.os_architecture,
+                                                                    raise_on_error=True)
+        for windows_station in windows_stations:
+            os_architecture = architectures[windows_station].result
+            if '64' in collector_type.name and '64' not in os_architecture:
+                continue
+
+            if '32' in collector_type.name and '32' not in os_architecture:
+                continue
+
+            collector_agent = WindowsCollector(host_ip=windows_station.host_ip,
+                                               user_name=sut_details.win_user_name,
+                                               password=sut_details.win_password,
+                                               os_station=windows_station)
+            agents_list.append(collector_agent)
+
+        for collector_agent in agents_list:
+            # the vm is usually needed only for snapshots revert later, find it while the other fixtures are set up
+            collector_agent.os_station.prefetch_details(os_details=False, vm_operations=True)
+
         return agents_list
@@ -2,14 +2,24 @@ import json
 import random
 import re
 import string
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
 
 import allure
 import requests
 from functools import singledispatch
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from infra.allure_report_handler.reporter import Reporter
 from infra.enums import HttpRequestMethodsEnum
 
+HTTP_POOL_SIZE = 10
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUS_CODES = (502, 503, 504)
+
 
 @singledispatch
 def remove_null_bool(ob):
@@ -94,6 +104,46 @@ class DictionaryUtils:
 
 
 class HttpRequesterUtils:
+    # one keep-alive session (connection pool) per base url (scheme://host:port)
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    @staticmethod
+    def get_session(url: str,
+                    pool_size: int = HTTP_POOL_SIZE,
+                    max_retries: int = HTTP_MAX_RETRIES,
+                    backoff_factor: float = HTTP_RETRY_BACKOFF_FACTOR) -> requests.Session:
+        """
+        Return the shared session of the base url of the given url, the session is created on the first call so
+        pool_size, max_retries and backoff_factor are taken into account only at the first call per base url.
+        Idempotent requests that failed on connection errors or on 502/503/504 are retried with exponential backoff.
+        """
+        url_parts = urlsplit(url)
+        base_url = f'{url_parts.scheme}://{url_parts.netloc}'
+        with HttpRequesterUtils._sessions_lock:
+            session = HttpRequesterUtils._sessions.get(base_url)
+            if session is None:
+                retries = Retry(total=max_retries,
+                                backoff_factor=backoff_factor,
+                                status_forcelist=HTTP_RETRY_STATUS_CODES,
+                                raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+                session = requests.Session()
+                # the session is used only for connection reuse, requests stay stateless as before (no cookies)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount(f'{base_url}/', adapter)
+                HttpRequesterUtils._sessions[base_url] = session
+
+            return session
+
+    @staticmethod
+    def close_sessions():
+        with HttpRequesterUtils._sessions_lock:
+            sessions = list(HttpRequesterUtils._sessions.values())
+            HttpRequesterUtils._sessions.clear()
+
+        for session in sessions:
+            session.close()
 
     @staticmethod
     @allure.step("Going to send an HTTP request")
@@ -104,35 +154,41 @@ class HttpRequesterUtils:
                      body: dict = None,
                      expected_status_code: int = 200,
                      verify_tls_certificate: bool = True,
-                     dumps_the_body=True):
-
-        Reporter.attach_str_as_file(file_name='request_method', file_content=request_method.name)
-        Reporter.attach_str_as_file(file_name='url', file_content=url)
+                     dumps_the_body=True,
+                     attach_to_report: bool = True):
+        """
+        :param attach_to_report: False - the request and the response are not attached to the report,
+        use it on polling paths where the same request is sent over and over
+        """
+        if attach_to_report:
+            Reporter.attach_str_as_file(file_name='request_method', file_content=request_method.name)
+            Reporter.attach_str_as_file(file_name='url', file_content=url)
 
-        if headers is not None:
-            Reporter.attach_str_as_file(file_name='headers', file_content=json.dumps(headers, indent=4))
+            if headers is not None:
+                Reporter.attach_str_as_file(file_name='headers', file_content=json.dumps(headers, indent=4))
 
-        if body is not None:
-            Reporter.attach_str_as_file(file_name='body', file_content=json.dumps(body, indent=4))
+            if body is not None:
+                Reporter.attach_str_as_file(file_name='body', file_content=json.dumps(body, indent=4))
 
+        session = HttpRequesterUtils.get_session(url=url)
         response = None
         match request_method:
 
             case HttpRequestMethodsEnum.GET:
-                response = requests.get(url=url, auth=auth, headers=headers, verify=verify_tls_certificate)
+                response = session.get(url=url, auth=auth, headers=headers, verify=verify_tls_certificate)
 
             case HttpRequestMethodsEnum.POST:
                 if dumps_the_body is True:
                     body = json.dumps(body) if body is not None else body
-                response = requests.post(url=url, auth=auth, headers=headers, data=body, verify=verify_tls_certificate)
+                response = session.post(url=url, auth=auth, headers=headers, data=body, verify=verify_tls_certificate)
 
             case HttpRequestMethodsEnum.PUT:
                 if dumps_the_body is True:
                     body = json.dumps(body) if body is not None else body
-                response = requests.put(url=url, auth=auth, headers=headers, data=body, verify=verify_tls_certificate)
+                response = session.put(url=url, auth=auth, headers=headers, data=body, verify=verify_tls_certificate)
 
             case HttpRequestMethodsEnum.DELETE:
-                response = requests.delete(url=url, auth=auth, headers=headers, verify=verify_tls_certificate)
+                response = session.delete(url=url, auth=auth, headers=headers, verify=verify_tls_certificate)
 
             case HttpRequestMethodsEnum.CONNECT | \
                     HttpRequestMethodsEnum.HEAD | \
@@ -140,7 +196,8 @@ class HttpRequesterUtils:
                     HttpRequestMethodsEnum.TRACE:
                 raise Exception(f"There is not implementation for {request_method.name}, sorry :(")
 
-        Reporter.attach_str_as_file(file_name='response status code', file_content=str(response.status_code))
+        if attach_to_report:
+            Reporter.attach_str_as_file(file_name='response status code', file_content=str(response.status_code))
 
         if expected_status_code != response.status_code:
             if not (expected_status_code == 200 and response.status_code == 201):
@@ -153,6 +210,7 @@ class HttpRequesterUtils:
         except json.decoder.JSONDecodeError:
             content = str(response.content)
 
-        Reporter.attach_str_as_file(file_name='response body', file_content=json.dumps(content, indent=4))
+        if attach_to_report:
+            Reporter.attach_str_as_file(file_name='response body', file_content=json.dumps(content, indent=4))
 
         return content
@@ -1,14 +1,14 @@
-import atexit
 import time
 from enum import Enum
 
 import allure
-from pyVim.connect import SmartConnectNoSSL, Disconnect
 from pyVmomi import vim
 
 from infra.allure_report_handler.reporter import Reporter
 from infra.vpshere.vsphere_cluster_details import ClusterDetails
 from infra.enums import AutomationVmTemplates
+from infra.vpshere.vsphere_inventory_index import VsphereInventoryIndex
+from infra.vpshere.vsphere_session_cache import VsphereSessionCache
 from infra.vpshere.vsphere_vm_operations import VsphereMachineOperations
 from third_party_details import USER_NAME_DOMAIN, PASSWORD
 
@@ -27,6 +27,7 @@ class VsphereClusterHandler(object):
         self._cluster_details = cluster_details
         self._service_instance = None
         self._container_view = None
+        self._inventory_index = None
 
     @property
     def cluster_details(self):
@@ -34,42 +35,22 @@ class VsphereClusterHandler(object):
 
     @property
     def service_instance(self):
-        if self._service_instance is not None:
-            return self._service_instance
-        else:
+        if self._service_instance is None:
             self.connect_to_vsphere()
+        return self._service_instance
 
-    def _get_resource_pool_object(self) -> object:
-        resourse_pool = self._get_all_resource_pools_objects()
-
-        if self.cluster_details.cluster_resources_pool[0] in resourse_pool:
-            return resourse_pool[self.cluster_details.cluster_resources_pool[0]]
-        else:
-            return None
-
-    def _get_all_folders_objects(self) -> dict:
-        folders_dict = {}
-
-        folders = self._get_vsphere_objects(
-                content=self.service_instance.content,
-                vim_type=[vim.Folder]
-            )
-        for folder in folders:
-            folders_dict[folder.name] = folder
-
-        return folders_dict
-
-    def _get_all_resource_pools_objects(self) -> dict:
-        resource_pools_dict = {}
+    @property
+    def inventory_index(self) -> VsphereInventoryIndex:
+        if self._inventory_index is None:
+            self.connect_to_vsphere()
+        return self._inventory_index
 
-        resource_pools = self._get_vsphere_objects(
-                content=self.service_instance.content,
-                vim_type=[vim.ResourcePool]
-            )
-        for resource_pool in resource_pools:
-            resource_pools_dict[resource_pool.name] = resource_pool
+    def _get_resource_pool_object(self) -> object:
+        return self.inventory_index.get_object_by_name(vim_type=vim.ResourcePool,
+                                                       name=self.cluster_details.cluster_resources_pool[0])
 
-        return resource_pools_dict
+    def _get_folder_object(self, folder_name: str) -> object:
+        return self.inventory_index.get_object_by_name(vim_type=vim.Folder, name=folder_name)
 
     def _wait_until_machine_get_ip(self, vm_obj, timeout=5*60):
         curr_time = time.time()
@@ -92,13 +73,13 @@ class VsphereClusterHandler(object):
             txt_to_search=vm_template.value
         )
         resource_pool = self._get_resource_pool_object()
-        folders_dict = self._get_all_folders_objects()
+        vm_folder = self._get_folder_object(folder_name='vm')
 
         if vm_to_clone_from_obj is not None:
             created_vm_obj = vm_to_clone_from_obj.clone_vm_by_name(
                 vm_template_object=vm_to_clone_from_obj.vm_obj,
                 resource_pool_object=resource_pool,
-                folder_object=folders_dict['vm'],
+                folder_object=vm_folder,
                 power_on=True,
                 new_vm_name=desired_vm_name
             )
@@ -113,14 +94,15 @@ class VsphereClusterHandler(object):
     @allure.step("Connect to vsphere")
     def connect_to_vsphere(self, user_name: str = USER_NAME_DOMAIN, password: str = PASSWORD):
         try:
-            self._service_instance = SmartConnectNoSSL(
-                host=self.cluster_details.cluster_vhost,
-                user=user_name,
-                pwd=password
-            )
+            # the login is shared with all the other handlers of the same vCenter
+            self._service_instance = VsphereSessionCache.get_service_instance(vhost=self.cluster_details.cluster_vhost,
+                                                                              user_name=user_name,
+                                                                              password=password)
+            self._inventory_index = VsphereSessionCache.get_inventory_index(vhost=self.cluster_details.cluster_vhost,
+                                                                            user_name=user_name,
+                                                                            password=password)
             if self._service_instance is not None:
                 self._container_view = self.service_instance.content.viewManager.CreateContainerView
-            atexit.register(Disconnect, self._service_instance)
 
         except IOError as io_error:
             Reporter.report(io_error)
@@ -140,37 +122,24 @@ class VsphereClusterHandler(object):
         object
             Returns a VM object
         """
-        vm_objs = self._get_list_of_vms_inside_child_entity(child_entity=self._service_instance.content.rootFolder.childEntity[0].vmFolder.childEntity)
-
-        for vm_obj in vm_objs:
-            if isinstance(vm_obj, vim.Folder):
-                pass
-
-            if vm_name == vm_obj.name:
-                Reporter.report(f"VM found by name: {vm_name}")
-                return vm_obj
-
-        return None
-
-    def _get_list_of_vms_inside_child_entity(self, child_entity):
-        vm_objs = []
-        for obj in child_entity:
-            if isinstance(obj, vim.VirtualMachine):
-                vm_objs.append(obj)
-            elif isinstance(obj, vim.Folder):
-                vm_objs += self._get_list_of_vms_inside_child_entity(child_entity=obj.childEntity)
+        vm_objs = self.inventory_index.get_vms_by_name(vm_name=vm_name)
+        if len(vm_objs) == 0:
+            return None
 
-        return vm_objs
+        Reporter.report(f"VM found by name: {vm_name}")
+        return vm_objs[0]
 
     @allure.step("Search for VM by ip")
     def search_vm_by_ip(self, ip_address: str):
         """Return pyvmomi vm obj from vcenter, by desired ip.
         If there are more than 1 vm with the same ip so it is an issue in the env.
-        'FindAllByIP' returns more than one match for one VM that's why we are searching for unique vms by their uuid
+        The vms are taken from the inventory index (by the ips of all the guest NICs), a VM can appear more than once (for
+        example linked clones) that's why we are searching for unique vms by their uuid
         """
         # Validate that we have only 0-1 vm with the desired ip
-        all_vms = self._service_instance.content.searchIndex.FindAllByIp(None, ip_address, True)
-        all_uuids = [vm.config.uuid for vm in all_vms]
+        inventory_index = self.inventory_index
+        all_vms = inventory_index.get_vms_by_ip(ip_address=ip_address)
+        all_uuids = [inventory_index.get_vm_property(vm_obj=vm, property_name='config.uuid') for vm in all_vms]
         unique_uuids = set(all_uuids)
         unique_vms_count = len(unique_uuids)
         assert unique_vms_count < 2, f"There are {unique_vms_count} vms with the same ip '{ip_address}', should be one"
@@ -178,13 +147,13 @@ class VsphereClusterHandler(object):
             Reporter.report(f"VM with ip {ip_address}, was not found under {self._cluster_details.cluster_name}")
             return None
         # Get the desired vm
-        vm_obj = self._service_instance.content.searchIndex.FindByIp(None, ip_address, True)
-        assert vm_obj is not None
+        vm_obj = all_vms[0]
 
-        if ip_address == vm_obj.guest.ipAddress and vm_obj.guest.ipAddress and vm_obj.configStatus == 'green':
-            Reporter.report(f"IP address '{ip_address}' of a collector {vm_obj.name} found. ")
+        if inventory_index.get_vm_property(vm_obj=vm_obj, property_name='configStatus') == 'green':
+            vm_name = inventory_index.get_vm_property(vm_obj=vm_obj, property_name='name')
+            Reporter.report(f"IP address '{ip_address}' of a collector {vm_name} found. ")
         else:
-            raise Exception("vm object is found but there is no IP address or machine is powered off")
+            raise Exception("vm object is found but machine is not in a healthy state (configStatus is not green)")
 
         return vm_obj
 
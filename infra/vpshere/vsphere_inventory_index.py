@@ -0,0 +1,219 @@
+"""
+In memory index of the virtual machines of a vCenter.
+
+References
+----------
+    - https://github.com/vmware/pyvmomi-community-samples/blob/master/samples/waitforupdates.py
+"""
+import logging
+import threading
+
+from pyVmomi import vim, vmodl
+
+logger = logging.getLogger(__name__)
+
+VM_PROPERTIES = ['name', 'guest.ipAddress', 'guest.net', 'config.uuid', 'runtime.powerState', 'configStatus', 'snapshot']
+MAX_OBJECTS_PER_UPDATE = 1000
+
+
+class VsphereInventoryIndex:
+    """
+    Holds the properties of all the VMs of a vCenter, so searching a VM by name/ip/uuid does not cost an RPC per VM.
+    The first fetch gets all the VMs in bulk, later calls to refresh only get the VMs that were changed since
+    the previous fetch (WaitForUpdatesEx with the last version), refresh is called automatically before every lookup.
+    """
+
+    def __init__(self, service_instance):
+        self._service_instance = service_instance
+        self._lock = threading.RLock()
+        self._property_collector = None
+        self._container_view = None
+        self._version = ''
+        self._vms_properties = {}  # vm object -> dict of the properties in VM_PROPERTIES
+        self._vms_by_name = {}
+        self._vms_by_ip = {}
+        self._vms_by_uuid = {}
+        self._objects_by_name_by_type = {}
+
+    def refresh(self):
+        """ Apply the changes that were done in vCenter since the previous refresh """
+        with self._lock:
+            if self._property_collector is None:
+                self._create_filter()
+
+            options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=0,
+                                                                maxObjectUpdates=MAX_OBJECTS_PER_UPDATE)
+            while True:
+                update_set = self._property_collector.WaitForUpdatesEx(self._version, options)
+                if update_set is None:
+                    # no changes since the previous version
+                    return
+
+                self._version = update_set.version
+                for filter_set in update_set.filterSet:
+                    for object_update in filter_set.objectSet:
+                        self._apply_object_update(object_update)
+
+                if not update_set.truncated:
+                    return
+
+    def close(self):
+        with self._lock:
+            if self._property_collector is not None:
+                try:
+                    self._property_collector.Destroy()
+                    self._container_view.Destroy()
+                except Exception as e:
+                    logger.debug(f"Failed to destroy the inventory property collector, original exception: {e}")
+            self._property_collector = None
+            self._container_view = None
+            self._version = ''
+            self._vms_properties = {}
+            self._vms_by_name = {}
+            self._vms_by_ip = {}
+            self._vms_by_uuid = {}
+
+    def get_vms_by_name(self, vm_name: str) -> list:
+        self.refresh()
+        return list(self._vms_by_name.get(vm_name, []))
+
+    def get_vms_by_ip(self, ip_address: str) -> list:
+        self.refresh()
+        return list(self._vms_by_ip.get(ip_address, []))
+
+    def get_vm_by_uuid(self, uuid: str):
+        self.refresh()
+        return self._vms_by_uuid.get(uuid)
+
+    def get_vm_property(self, vm_obj, property_name: str):
+        """ Cached value of one of VM_PROPERTIES (as of the last refresh) """
+        return self._vms_properties.get(vm_obj, {}).get(property_name)
+
+    def get_objects_by_name(self, vim_type) -> dict:
+        """
+        Names of all the objects of the given type (folders, resource pools, etc.), fetched once in bulk.
+        These objects are rarely changed during a run, so they are fetched again only when a name is missing
+        (see get_object_by_name).
+        :param vim_type: for example vim.Folder
+        :return: dict of name -> object
+        """
+        with self._lock:
+            if vim_type not in self._objects_by_name_by_type:
+                self._objects_by_name_by_type[vim_type] = self._retrieve_objects_names(vim_type=vim_type)
+            return self._objects_by_name_by_type[vim_type]
+
+    def get_object_by_name(self, vim_type, name: str):
+        """
+        :return: object of the given type and name, None if it does not exist. Objects that were created after the
+        objects were fetched are found by fetching them again
+        """
+        with self._lock:
+            obj = self.get_objects_by_name(vim_type=vim_type).get(name)
+            if obj is None:
+                self._objects_by_name_by_type[vim_type] = self._retrieve_objects_names(vim_type=vim_type)
+                obj = self._objects_by_name_by_type[vim_type].get(name)
+            return obj
+
+    def _create_filter(self):
+        content = self._service_instance.content
+        self._container_view = content.viewManager.CreateContainerView(content.rootFolder,
+                                                                       [vim.VirtualMachine],
+                                                                       True)
+        self._property_collector = content.propertyCollector.CreatePropertyCollector()
+        self._property_collector.CreateFilter(self._get_filter_spec(container_view=self._container_view,
+                                                                    vim_type=vim.VirtualMachine,
+                                                                    properties=VM_PROPERTIES),
+                                              partialUpdates=False)
+
+    @staticmethod
+    def _get_filter_spec(container_view, vim_type, properties):
+        traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(name='traverse_container_view',
+                                                                     path='view',
+                                                                     skip=False,
+                                                                     type=vim.view.ContainerView)
+        object_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=container_view,
+                                                               skip=True,
+                                                               selectSet=[traversal_spec])
+        property_spec = vmodl.query.PropertyCollector.PropertySpec(type=vim_type,
+                                                                   pathSet=properties,
+                                                                   all=False)
+        return vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=[property_spec])
+
+    def _retrieve_objects_names(self, vim_type) -> dict:
+        content = self._service_instance.content
+        container_view = content.viewManager.CreateContainerView(content.rootFolder, [vim_type], True)
+        try:
+            filter_spec = self._get_filter_spec(container_view=container_view, vim_type=vim_type,
+                                                properties=['name'])
+            objects_by_name = {}
+            result = content.propertyCollector.RetrievePropertiesEx([filter_spec],
+                                                                    vmodl.query.PropertyCollector.RetrieveOptions())
+            while result is not None:
+                for object_content in result.objects:
+                    for prop in object_content.propSet:
+                        objects_by_name[prop.val] = object_content.obj
+
+                if not result.token:
+                    break
+                result = content.propertyCollector.ContinueRetrievePropertiesEx(result.token)
+
+            return objects_by_name
+        finally:
+            container_view.Destroy()
+
+    def _apply_object_update(self, object_update):
+        vm_obj = object_update.obj
+        if object_update.kind == 'leave':
+            self._unindex(vm_obj)
+            self._vms_properties.pop(vm_obj, None)
+            return
+
+        self._unindex(vm_obj)
+        properties = self._vms_properties.setdefault(vm_obj, {})
+        for change in object_update.changeSet:
+            if change.op in ('remove', 'indirectRemove'):
+                properties.pop(change.name, None)
+            else:
+                properties[change.name] = change.val
+        self._index(vm_obj)
+
+    @staticmethod
+    def _get_ip_addresses(properties: dict) -> set:
+        """ The primary ip and the addresses of all the NICs of the guest (as SearchIndex.FindAllByIp) """
+        ip_addresses = set()
+        if properties.get('guest.ipAddress') is not None:
+            ip_addresses.add(properties.get('guest.ipAddress'))
+
+        for nic in properties.get('guest.net') or []:
+            ip_addresses.update(nic.ipAddress or [])
+
+        return ip_addresses
+
+    def _index(self, vm_obj):
+        properties = self._vms_properties[vm_obj]
+        name = properties.get('name')
+        uuid = properties.get('config.uuid')
+        if name is not None:
+            self._vms_by_name.setdefault(name, []).append(vm_obj)
+        for ip_address in self._get_ip_addresses(properties):
+            self._vms_by_ip.setdefault(ip_address, []).append(vm_obj)
+        if uuid is not None:
+            self._vms_by_uuid[uuid] = vm_obj
+
+    def _unindex(self, vm_obj):
+        properties = self._vms_properties.get(vm_obj)
+        if properties is None:
+            return
+
+        keys_by_index = [(self._vms_by_name, properties.get('name'))]
+        keys_by_index += [(self._vms_by_ip, ip_address) for ip_address in self._get_ip_addresses(properties)]
+        for index, key in keys_by_index:
+            vms = index.get(key)
+            if vms is not None and vm_obj in vms:
+                vms.remove(vm_obj)
+                if len(vms) == 0:
+                    del index[key]
+
+        uuid = properties.get('config.uuid')
+        if uuid is not None and self._vms_by_uuid.get(uuid) == vm_obj:
+            del self._vms_by_uuid[uuid]
@@ -0,0 +1,117 @@
+import atexit
+import logging
+import threading
+import time
+
+from pyVim.connect import SmartConnectNoSSL, Disconnect
+
+from infra.vpshere.vsphere_inventory_index import VsphereInventoryIndex
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE_INTERVAL = 10 * 60  # vCenter drops idle sessions after 30 minutes by default
+SESSION_CHECK_INTERVAL = 60
+
+
+class _CachedSession:
+
+    def __init__(self, service_instance):
+        self.service_instance = service_instance
+        self.inventory_index = VsphereInventoryIndex(service_instance=service_instance)
+        self.last_check = time.time()
+
+
+class VsphereSessionCache:
+    """
+    Process wide cache of logged in vCenter service instances (and their inventory index), one per vCenter and user,
+    so creating many VsphereClusterHandler objects costs a single login per vCenter.
+    A background thread keeps the sessions alive and a session that expired anyway is replaced on the next use.
+    """
+
+    _sessions = {}
+    _session_locks = {}
+    _lock = threading.Lock()
+    _keep_alive_thread = None
+
+    @classmethod
+    def get_service_instance(cls, vhost: str, user_name: str, password: str):
+        return cls._get_session(vhost=vhost, user_name=user_name, password=password).service_instance
+
+    @classmethod
+    def get_inventory_index(cls, vhost: str, user_name: str, password: str) -> VsphereInventoryIndex:
+        return cls._get_session(vhost=vhost, user_name=user_name, password=password).inventory_index
+
+    @classmethod
+    def _get_session(cls, vhost: str, user_name: str, password: str) -> _CachedSession:
+        key = (vhost, user_name)
+        with cls._lock:
+            # login to one vCenter should not block the logins to the others
+            session_lock = cls._session_locks.setdefault(key, threading.Lock())
+
+        with session_lock:
+            cached_session = cls._sessions.get(key)
+            if cached_session is not None and not cls._is_alive(cached_session):
+                logger.info(f"Session to vCenter {vhost} is not valid anymore, login again")
+                cached_session.inventory_index.close()
+                cached_session = None
+
+            if cached_session is None:
+                logger.debug(f"Login to vCenter {vhost} with user {user_name}")
+                service_instance = SmartConnectNoSSL(host=vhost, user=user_name, pwd=password)
+                cached_session = _CachedSession(service_instance=service_instance)
+                with cls._lock:
+                    cls._sessions[key] = cached_session
+                    cls._start_keep_alive_thread()
+
+            return cached_session
+
+    @staticmethod
+    def _is_alive(cached_session: _CachedSession) -> bool:
+        if time.time() - cached_session.last_check < SESSION_CHECK_INTERVAL:
+            return True
+
+        try:
+            is_alive = cached_session.service_instance.content.sessionManager.currentSession is not None
+        except Exception as e:
+            logger.debug(f"Failed to check vCenter session, original exception: {e}")
+            is_alive = False
+
+        cached_session.last_check = time.time()
+        return is_alive
+
+    @classmethod
+    def _start_keep_alive_thread(cls):
+        if cls._keep_alive_thread is not None and cls._keep_alive_thread.is_alive():
+            return
+
+        cls._keep_alive_thread = threading.Thread(target=cls._keep_alive, name='vsphere_keep_alive', daemon=True)
+        cls._keep_alive_thread.start()
+
+    @classmethod
+    def _keep_alive(cls):
+        while True:
+            time.sleep(KEEP_ALIVE_INTERVAL)
+            with cls._lock:
+                cached_sessions = list(cls._sessions.items())
+
+            for (vhost, _), cached_session in cached_sessions:
+                try:
+                    cached_session.service_instance.CurrentTime()
+                except Exception as e:
+                    logger.debug(f"Keep alive of vCenter {vhost} session failed, original exception: {e}")
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            cached_sessions = list(cls._sessions.values())
+            cls._sessions.clear()
+
+        for cached_session in cached_sessions:
+            cached_session.inventory_index.close()
+            try:
+                Disconnect(cached_session.service_instance)
+            except Exception as e:
+                logger.debug(f"Failed to disconnect from vCenter, original exception: {e}")
+
+
+atexit.register(VsphereSessionCache.close_all)
@@ -1,4 +1,13 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
 import allure
+from pyVim.task import WaitForTasks
 
 from infra.enums import AutomationVmTemplates
 from infra.vpshere.vsphere_cluster_details import ENSILO_VCSA_10, ENSILO_VCSA_20, ENSILO_VCSA_30, ENSILO_VCSA_40, \
@@ -7,6 +16,51 @@ from infra.vpshere.vsphere_cluster_handler import VmSearchTypeEnum, VsphereClust
 from infra.vpshere.vsphere_vm_operations import VsphereMachineOperations
 from third_party_details import USER_NAME_DOMAIN, PASSWORD
 
+logger = logging.getLogger(__name__)
+
+ALL_CLUSTERS_DETAILS = [ENSILO_VCSA_20, ENSILO_VCSA_10, ENSILO_VCSA_30, ENSILO_VCSA_40]
+# remembers in which cluster every vm was found, kept between runs so the next run searches the right cluster first
+CLUSTER_AFFINITY_FILE_PATH = os.path.join(tempfile.gettempdir(), 'vsphere_cluster_affinity.json')
+
+
+class _ClusterAffinityCache:
+
+    def __init__(self, file_path: str):
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._affinity = None
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            return self._load().get(key)
+
+    def set(self, key: str, cluster_name: str):
+        with self._lock:
+            affinity = self._load()
+            if affinity.get(key) == cluster_name:
+                return
+
+            affinity[key] = cluster_name
+            try:
+                temp_file_path = f'{self._file_path}.{os.getpid()}.tmp'
+                with open(temp_file_path, 'w') as f:
+                    json.dump(affinity, f, indent=4)
+                os.replace(temp_file_path, self._file_path)
+            except OSError as e:
+                logger.debug(f"Failed to save the cluster affinity file, original exception: {e}")
+
+    def _load(self) -> dict:
+        if self._affinity is None:
+            try:
+                with open(self._file_path) as f:
+                    self._affinity = json.load(f)
+            except (OSError, ValueError):
+                self._affinity = {}
+        return self._affinity
+
+
+_cluster_affinity_cache = _ClusterAffinityCache(file_path=CLUSTER_AFFINITY_FILE_PATH)
+
 
 class VsphereUtils:
 
@@ -19,6 +73,8 @@ class VsphereUtils:
         """
         The role of this method is to search the host IP on the all vSphere clusters
         and return object that contains the operations logic such as create_snapshot, revert_to_snapshot, etc.
+        The cluster where the vm was found last time is searched first, if it is not there (or the search in it
+        failed) the clusters are searched concurrently and the first of ALL_CLUSTERS_DETAILS that has the vm wins.
 
         :param vm_search_type:  VmSearchTypeEnum
         :param txt_to_search: txt_to_search, for example host ip or host name, depend on enum
@@ -26,19 +82,91 @@ class VsphereUtils:
         :param password: password to vSphere
         :return:
         """
-        all_clusters_details = [ENSILO_VCSA_20, ENSILO_VCSA_10, ENSILO_VCSA_30, ENSILO_VCSA_40]
+        affinity_key = f'{vm_search_type.value}:{txt_to_search}'
+
+        def search_in_cluster(cluster_details: ClusterDetails) -> VsphereMachineOperations:
+            vsphere_cluster_handler = VsphereClusterHandler(cluster_details=cluster_details)
+            return vsphere_cluster_handler.get_specific_vm_from_cluster(vm_search_type=vm_search_type,
+                                                                        txt_to_search=txt_to_search,
+                                                                        user_name=user_name,
+                                                                        password=password)
 
-        for single_cluster_details in all_clusters_details:
-            vsphere_cluster_handler = VsphereClusterHandler(cluster_details=single_cluster_details)
-            vm_ops = vsphere_cluster_handler.get_specific_vm_from_cluster(vm_search_type=vm_search_type,
-                                                                          txt_to_search=txt_to_search,
-                                                                          user_name=user_name,
-                                                                          password=password)
-            if vm_ops is not None:
-                return vm_ops
+        clusters_details = list(ALL_CLUSTERS_DETAILS)
+        affinity_cluster_name = _cluster_affinity_cache.get(key=affinity_key)
+        affinity_clusters = [cluster for cluster in clusters_details if cluster.cluster_name == affinity_cluster_name]
+        if len(affinity_clusters) > 0:
+            try:
+                vm_ops = search_in_cluster(cluster_details=affinity_clusters[0])
+            except Exception as e:
+                # the cluster may be temporarily unavailable, it is searched again with all the other clusters
+                logger.info(f"Failed to search {txt_to_search} in {affinity_cluster_name}, search in all the clusters, "
+                            f"original exception: {e}")
+            else:
+                if vm_ops is not None:
+                    return vm_ops
+                logger.info(f"{txt_to_search} is not in {affinity_cluster_name} anymore, search in all the clusters")
+                clusters_details.remove(affinity_clusters[0])
+
+        executor = ThreadPoolExecutor(max_workers=len(clusters_details), thread_name_prefix='vsphere_search')
+        try:
+            futures = [executor.submit(search_in_cluster, cluster) for cluster in clusters_details]
+            first_exception = None
+            # the clusters are searched concurrently but the results are taken in the order of ALL_CLUSTERS_DETAILS,
+            # so a vm that is found in several clusters is always taken from the same one
+            for cluster_details, future in zip(clusters_details, futures):
+                try:
+                    vm_ops = future.result()
+                except Exception as e:
+                    logger.info(f"Failed to search {txt_to_search} in {cluster_details.cluster_name}, "
+                                f"original exception: {e}")
+                    first_exception = first_exception or e
+                    continue
+
+                if vm_ops is not None:
+                    _cluster_affinity_cache.set(key=affinity_key, cluster_name=cluster_details.cluster_name)
+                    return vm_ops
+        finally:
+            # searches that are still running are not waited for, their results are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if first_exception is not None:
+            raise first_exception
 
         return None
 
+    @staticmethod
+    @allure.step("Revert {num_of_vms} VMs to snapshots together")
+    def _revert_vms_to_snapshots(snapshot_names_by_vm: Dict[VsphereMachineOperations, str], num_of_vms: int):
+        tasks_by_service_instance = {}
+        for vm_ops, snapshot_name in snapshot_names_by_vm.items():
+            task = vm_ops.start_snapshot_revert_by_name(snapshot_name=snapshot_name)
+            tasks_by_service_instance.setdefault(vm_ops.service_instance, []).append(task)
+
+        def wait_for_tasks(service_instance):
+            # a single property collector tracks all the tasks of the same vCenter
+            WaitForTasks(tasks=tasks_by_service_instance[service_instance], raiseOnError=True, si=service_instance)
+
+        service_instances = list(tasks_by_service_instance.keys())
+        if len(service_instances) == 1:
+            wait_for_tasks(service_instances[0])
+            return
+
+        with ThreadPoolExecutor(max_workers=len(service_instances), thread_name_prefix='vsphere_tasks') as executor:
+            for future in [executor.submit(wait_for_tasks, si) for si in service_instances]:
+                future.result()
+
+    @staticmethod
+    def revert_vms_to_snapshots(snapshot_names_by_vm: Dict[VsphereMachineOperations, str]):
+        """
+        Start the revert tasks of all the given vms at once and wait until all of them finish, so the total time
+        is about the time of a single revert
+        :param snapshot_names_by_vm: snapshot name to revert to, for each vm
+        """
+        if len(snapshot_names_by_vm) == 0:
+            return
+        VsphereUtils._revert_vms_to_snapshots(snapshot_names_by_vm=snapshot_names_by_vm,
+                                              num_of_vms=len(snapshot_names_by_vm))
+
     @staticmethod
     @allure.step("Clone VM from template '{template_name}'")
     def clone_vm_from_template(cluster_details: ClusterDetails, template_name: AutomationVmTemplates, desired_name: str):
@@ -47,6 +47,10 @@ class VsphereMachineOperations:
     def vm_obj(self):
         return self._vm_obj
 
+    @property
+    def service_instance(self):
+        return self._service_instance
+
     def vm_info_parsed(self):
         """
         Reporter.report information for a particular virtual machine or recurse into a folder
@@ -136,12 +140,21 @@ class VsphereMachineOperations:
             the virtual machine will not be powered on regardless of the power state when the current snapshot was created.
             defaults False
         """
+        task = self.start_snapshot_revert_by_name(snapshot_name=snapshot_name, suppress_power_on=suppress_power_on)
+        WaitForTask(task, self._service_instance)
+
+    def start_snapshot_revert_by_name(self, snapshot_name: str, suppress_power_on: bool = False):
+        """Same as snapshot_revert_by_name but does not wait for the revert to finish.
+
+        Returns
+        -------
+        object
+            The vSphere revert task, wait for it with WaitForTask/WaitForTasks
+        """
         for item in self._snapshots_list:
             if item[0] == snapshot_name:
                 Reporter.report(f"Snapshot found and starting revert to snapshot name: {snapshot_name}")
-                task = item[1].RevertToSnapshot_Task(suppressPowerOn=suppress_power_on)
-                WaitForTask(task, self._service_instance)
-                return
+                return item[1].RevertToSnapshot_Task(suppressPowerOn=suppress_power_on)
         raise Exception(f"Snapshot '{snapshot_name}' was not found")
 
     @allure.step("Revert to VM snapshot creation order")
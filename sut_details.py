@@ -18,6 +18,8 @@ win_user_name = 'user1'
 win_password = 'P@ssword1!'
 
 debug_mode = True if os.getenv("debug_mode") == 'true' else False
+# full / buffered / buffered_full_log_on_failure, see ReportMode
+report_mode = os.getenv("report_mode", default='full')
 upgrade_management_to_latest_build = True if os.getenv("upgrade_management_to_latest_build") == 'true' else False
 upgrade_aggregator_to_latest_build = True if os.getenv("upgrade_aggregator_to_latest_build") == 'true' else False
 upgrade_core_to_latest_build = True if os.getenv("upgrade_core_to_latest_build") == 'true' else False
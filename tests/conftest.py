@@ -7,9 +7,12 @@ from tests.utils.collector_utils import CollectorUtils, \
 import sut_details
 import third_party_details
 from infra.allure_report_handler.reporter import Reporter
+from infra.allure_report_handler.attachment_writer import get_attachment_writer
+from infra.allure_report_handler.report_buffer import get_report_buffer
 from infra.assertion.assertion import Assertion
+from infra.os_stations.station_group import StationGroup
 from infra.enums import CollectorTypes, FortiEdrSystemState, AutomationVmTemplates, \
-    CleanVMsReadyForCollectorInstallation
+    CleanVMsReadyForCollectorInstallation, ReportMode
 from infra.environment_creation.environment_creation_handler import EnvironmentCreationHandler
 from infra.forti_edr_versions_service_handler.forti_edr_versions_service_handler import FortiEdrVersionsServiceHandler
 from infra.jenkins_utils.jenkins_handler import JenkinsHandler
@@ -91,6 +94,7 @@ def create_service_machine_for_session():
 def pytest_configure(config):
     global pytest_config
     pytest_config = config
+    Reporter.set_report_mode(ReportMode(sut_details.report_mode))
     if not pytest_config.getoption('--jira-xray'):
         return
     global jira_xray_handler
@@ -106,12 +110,22 @@ def pytest_sessionstart(session):
     session.results = dict()
 
 
+def pytest_runtest_setup(item):
+    get_attachment_writer().start_test(test_name=item.nodeid)
+    get_report_buffer().start_test()
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     outcome = yield
 
     result = outcome.get_result()
 
+    report_buffer = get_report_buffer()
+    report_buffer.flush_all()
+    if result.failed and report_buffer.mode == ReportMode.BUFFERED_FULL_LOG_ON_FAILURE:
+        report_buffer.attach_full_log(name=f'Full report log ({call.when})')
+
     test_path = str(result.nodeid)
     if test_path in tests_results.keys():
         if tests_results[test_path]['hit'] == 3:
@@ -181,7 +195,9 @@ def pytest_runtest_makereport(item, call):
 
 def pytest_sessionfinish(session, exitstatus):
     # create_results_json(session, tests_results=tests_results)
-    pass
+    get_attachment_writer().flush()
+    if pytest_config.getoption('--jira-xray'):
+        jira_xray_handler.flush()
 
 
 def create_results_json(session, tests_results: dict):
@@ -355,8 +371,8 @@ def collector(management, aggregator) -> CollectorAgent:
             collector_agent.install_collector(version=collector_latest_version, aggregator_ip=aggregator.host_ip,
                                               organization=tenant.organization.get_name(),
                                               registration_password=tenant.organization.registration_password)
-            collector_agent.wait_until_agent_running()
-            rest_collector.wait_until_running()
+            CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector_agent,
+                                                                    rest_collector=rest_collector)
     yield collector_agent
 
 
@@ -409,8 +425,7 @@ def create_snapshot_for_collector(snapshot_name: str,
 
     Reporter.report("Start the collector so it will be ready for a new test")
     collector.start_collector()
-    collector.wait_until_agent_running()
-    rest_collector.wait_until_running()
+    CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector, rest_collector=rest_collector)
     Reporter.report("Check that starting collector didn't create any crashes (for debugging)")
     check_if_collectors_has_crashed([collector])
 
@@ -497,7 +512,7 @@ def validate_all_system_components_are_running(management: Management,
     non_collector_sys_components = [management, aggregator, core]
     collector_status_timeout = 30
 
-    for sys_comp in non_collector_sys_components:
+    def validate_system_component_is_running(sys_comp):
         #     if isinstance(sys_comp, Core):
         #         with allure.step("Workaround for core - change DeploymentMethod to Cloud although it's onPrem"):
         #             content = core.get_file_content(file_path='/opt/FortiEDR/core/Config/Core/CoreBootstrap.jsn')
@@ -509,6 +524,9 @@ def validate_all_system_components_are_running(management: Management,
         #                 core.start_service()
         sys_comp.validate_system_component_is_in_desired_state(desired_state=FortiEdrSystemState.RUNNING)
 
+    StationGroup(stations=non_collector_sys_components).run(func=validate_system_component_is_running,
+                                                            raise_on_error=True)
+
     assert rest_collector.is_running(), f"{collector} is not running in {management}"
     Reporter.report(f"Assert that {collector} status is running in CLI")
     assert collector.is_agent_running(), f"{collector} status is not running"
@@ -524,14 +542,31 @@ def check_if_soft_asserts_were_collected():
 @allure.step("Get machines current time stamps")
 def get_forti_edr_machines_time_stamp_as_dict(forti_edr_stations: List[FortiEdrLinuxStation],
                                               machine_date_format):
-    new_dict = {}
-    for station in forti_edr_stations:
+    def get_station_time_stamp(station):
         with allure.step(f"Get {station} current date time"):
             date_time = station.get_current_machine_datetime(date_format=machine_date_format)
             Reporter.report(f"{station} current time stamp is: {date_time}")
-            new_dict[station] = date_time
+            return date_time
+
+    results = StationGroup(stations=forti_edr_stations).run(func=get_station_time_stamp, raise_on_error=True)
+    return {station: station_result.result for station, station_result in results.items()}
 
-    return new_dict
+
+@allure.step("Create logs cursors")
+def get_forti_edr_machines_logs_cursors_as_dict(forti_edr_stations: List[FortiEdrLinuxStation]):
+    """
+    :return: dict of station -> logs cursor, None for a station that the cursor could not be created for or that its
+    logs are not plain text (its logs will be appended by the time stamp)
+    """
+    results = StationGroup(stations=forti_edr_stations).run(func=lambda station: station.create_logs_cursor())
+    cursors_dict = {}
+    for station, station_result in results.items():
+        if station_result.exception is not None:
+            Reporter.report(f"Failed to create logs cursor for {station}, logs will be appended by time stamp, "
+                            f"original exception: {station_result.exception}")
+        cursors_dict[station] = station_result.result
+
+    return cursors_dict
 
 
 def append_logs_from_forti_edr_linux_station(initial_timestamps_dict: dict,
@@ -539,9 +574,16 @@ def append_logs_from_forti_edr_linux_station(initial_timestamps_dict: dict,
                                              machine_timestamp_date_format,
                                              log_timestamp_date_format,
                                              log_timestamp_date_format_regex_linux,
-                                             log_file_datetime_regex_python):
+                                             log_file_datetime_regex_python,
+                                             initial_cursors_dict: dict = None):
+    initial_cursors_dict = initial_cursors_dict or {}
     for station in forti_edr_stations:
         try:
+            cursor = initial_cursors_dict.get(station)
+            if cursor is not None:
+                station.append_logs_to_report_from_cursor(cursor=cursor)
+                continue
+
             time_stamp = initial_timestamps_dict.get(station)
             station.append_logs_to_report_by_given_timestamp(first_log_timestamp=time_stamp,
                                                              machine_timestamp_date_format=machine_timestamp_date_format,
@@ -558,9 +600,8 @@ def get_forti_edr_log_files(
         collectors: List[CollectorAgent],
         filter_regex: str = None,
 ):
-    log_files = {}
-    for station in forti_edr_stations:
-        log_files[f'{station}'] = {}
+    def get_station_log_files(station) -> dict:
+        station_log_files = {}
         log_folder = station.get_logs_folder_path()
         tmp_log_files = station.get_list_of_files_in_folder(folder_path=log_folder, file_suffix='.log')
 
@@ -572,16 +613,26 @@ def get_forti_edr_log_files(
         for log_file in tmp_log_files:
             content = station.get_file_content(log_file, filter_regex)
             if content is not None:
-                log_files[f'{station}'][log_file] = content.splitlines()
+                station_log_files[log_file] = content.splitlines()
 
-    for collector in collectors:
-        log_files[f'{collector}'] = {}
+        return station_log_files
+
+    def get_collector_log_files(collector) -> dict:
+        collector_log_files = {}
         logs_content = collector.get_logs_content(filter_regex=filter_regex)
         for log_file, content in logs_content.items():
             if content:
-                log_files[f'{collector}'][log_file] = content.splitlines()
+                collector_log_files[log_file] = content.splitlines()
+
+        return collector_log_files
+
+    def get_log_files(station_or_collector) -> dict:
+        if isinstance(station_or_collector, CollectorAgent):
+            return get_collector_log_files(station_or_collector)
+        return get_station_log_files(station_or_collector)
 
-    return log_files
+    results = StationGroup(stations=forti_edr_stations + collectors).run(func=get_log_files, raise_on_error=True)
+    return {f'{station}': station_result.result for station, station_result in results.items()}
 
 
 @pytest.fixture(scope="session", autouse=False)
@@ -621,6 +672,7 @@ def management_logs(management):
 
     time_stamps_dict = get_forti_edr_machines_time_stamp_as_dict(forti_edr_stations=[management],
                                                                  machine_date_format=machine_date_format)
+    cursors_dict = get_forti_edr_machines_logs_cursors_as_dict(forti_edr_stations=[management])
     yield
     logger.info(f"Test end - collect management logs")
     append_logs_from_forti_edr_linux_station(initial_timestamps_dict=time_stamps_dict,
@@ -628,7 +680,8 @@ def management_logs(management):
                                              machine_timestamp_date_format=machine_date_format,
                                              log_timestamp_date_format=log_date_format,
                                              log_timestamp_date_format_regex_linux=log_timestamp_date_format_regex,
-                                             log_file_datetime_regex_python=log_file_datetime_regex_python)
+                                             log_file_datetime_regex_python=log_file_datetime_regex_python,
+                                             initial_cursors_dict=cursors_dict)
 
 
 @pytest.fixture(scope="function", autouse=sut_details.debug_mode)
@@ -641,6 +694,7 @@ def aggregator_logs(aggregator: Aggregator):
 
     time_stamps_dict = get_forti_edr_machines_time_stamp_as_dict(forti_edr_stations=[aggregator],
                                                                  machine_date_format=machine_date_format)
+    cursors_dict = get_forti_edr_machines_logs_cursors_as_dict(forti_edr_stations=[aggregator])
     yield
     logger.info(f"Test end - collect aggregator logs")
     append_logs_from_forti_edr_linux_station(initial_timestamps_dict=time_stamps_dict,
@@ -648,7 +702,8 @@ def aggregator_logs(aggregator: Aggregator):
                                              machine_timestamp_date_format=machine_date_format,
                                              log_timestamp_date_format=log_date_format,
                                              log_timestamp_date_format_regex_linux=log_timestamp_date_format_regex,
-                                             log_file_datetime_regex_python=log_file_datetime_regex_python)
+                                             log_file_datetime_regex_python=log_file_datetime_regex_python,
+                                             initial_cursors_dict=cursors_dict)
 
 
 @pytest.fixture(scope="function", autouse=sut_details.debug_mode)
@@ -661,6 +716,7 @@ def cores_logs(core: Core):
 
     time_stamps_dict = get_forti_edr_machines_time_stamp_as_dict(forti_edr_stations=[core],
                                                                  machine_date_format=machine_date_format)
+    cursors_dict = get_forti_edr_machines_logs_cursors_as_dict(forti_edr_stations=[core])
     yield
     logger.info("Test end - collect core logs")
     append_logs_from_forti_edr_linux_station(initial_timestamps_dict=time_stamps_dict,
@@ -668,7 +724,8 @@ def cores_logs(core: Core):
                                              machine_timestamp_date_format=machine_date_format,
                                              log_timestamp_date_format=log_date_format,
                                              log_timestamp_date_format_regex_linux=log_timestamp_date_format_regex,
-                                             log_file_datetime_regex_python=log_file_datetime_regex_python)
+                                             log_file_datetime_regex_python=log_file_datetime_regex_python,
+                                             initial_cursors_dict=cursors_dict)
 
 
 @pytest.fixture(scope="function", autouse=sut_details.debug_mode)
@@ -730,13 +787,19 @@ def revert_to_first_snapshot_for_all_collectors(management: Management, collecto
     We also check that the revert operation didn't damage the collector (no crashes)
     """
     wait_after_revert = 10
+    snapshot_names_by_vm = {collector.os_station.vm_operations: collector.os_station.vm_operations.snapshot_list[0][0]
+                            for collector in collectors}
+    VsphereUtils.revert_vms_to_snapshots(snapshot_names_by_vm=snapshot_names_by_vm)
     for collector in collectors:
-        first_snapshot_name = collector.os_station.vm_operations.snapshot_list[0][0]
-        collector.os_station.vm_operations.snapshot_revert_by_name(snapshot_name=first_snapshot_name)
+        first_snapshot_name = snapshot_names_by_vm[collector.os_station.vm_operations]
         Reporter.report(f"{collector} vm reverted to:'{first_snapshot_name}'", logger.info)
+
+    def prepare_collector_after_revert(collector: CollectorAgent):
         if isinstance(collector, LinuxCollector):  # To establish new connection after revert
             time.sleep(wait_after_revert)
             collector.os_station.disconnect()
+        elif isinstance(collector, WindowsCollector):  # pooled sessions point to the machine state before the revert
+            collector.os_station.reset_sessions()
         Reporter.report("Wait until collector is offline in MGMT because it still might be online from previous test",
                         logger.info)
         assert collector.is_agent_down(), "Collector was not stopped"
@@ -747,11 +810,14 @@ def revert_to_first_snapshot_for_all_collectors(management: Management, collecto
         collector.remove_all_crash_dumps_files()
         Reporter.report("Start the collector so it will be ready for a new test", logger.info)
         collector.start_collector()
-        collector.wait_until_agent_running()
-        rest_collector.wait_until_running()
+        CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector,
+                                                                rest_collector=rest_collector)
         Reporter.report("Check that starting collector didn't create any crashes (for debugging)", logger.info)
         check_if_collectors_has_crashed([collector])
 
+    # all the collectors were reverted together, so also bring them back up together
+    StationGroup(stations=collectors).run(func=prepare_collector_after_revert, raise_on_error=True)
+
 
 def get_collector_latest_version(collector: CollectorAgent) -> str:
     collector_version = collector.get_version()
@@ -82,6 +82,8 @@ def report_results_to_jira_xray(collector: CollectorAgent, test_results_dict: di
 
             # logger.info(f"Adding test {single_test_result['TicketId']} ({test})")
 
+        # results are published in background, wait until all of them are sent
+        jira_xray_handler.flush()
         logger.info(f"Execution: {jira_xray_handler.execution_key}")
     else:
         raise Exception(f"Results file is empty, therefore, it not created test execution for the suite.\n"
@@ -7,6 +7,7 @@ from infra.allure_report_handler.reporter import Reporter
 from infra.enums import CollectorConfigurationTypes
 from infra.forti_edr_versions_service_handler.forti_edr_versions_service_handler import FortiEdrVersionsServiceHandler
 from infra.system_components.collector import CollectorAgent
+from infra.system_components.collectors.default_values import MAX_WAIT_FOR_STATUS, get_status_polling_kwargs
 from infra.system_components.collectors.linux_os.linux_collector import LinuxCollector
 from infra.api.management_api.collector import RestCollector
 from infra.multi_tenancy.tenant import Tenant
@@ -68,8 +69,8 @@ class CollectorUtils:
         collector_agent.wait_until_agent_down()
         if start_collector:
             collector_agent.start_collector()
-            collector_agent.wait_until_agent_running()
-            rest_collector.wait_until_running()
+            CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector_agent,
+                                                                    rest_collector=rest_collector)
 
     @staticmethod
     @allure.step("Validate collector installed successfully")
@@ -78,8 +79,8 @@ class CollectorUtils:
         logger.info(f"Validate {collector_agent} installed successfully")
         rest_collector = tenant.rest_components.collectors.get_by_ip(ip=collector_agent.host_ip)
         logger.info(f"Validate {collector_agent} status CLI & Management")
-        rest_collector.wait_until_running()
-        collector_agent.wait_until_agent_running()
+        CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector_agent,
+                                                                rest_collector=rest_collector)
 
         logger.info(f"Validate {collector_agent} installed version, expected {expected_version}")
         assert collector_agent.get_version() == expected_version, \
@@ -108,6 +109,16 @@ class CollectorUtils:
         else:
             rest_collector.wait_until_disconnected()
 
+    @staticmethod
+    @allure.step("Wait until {collector_agent} is running in CLI and in management")
+    def wait_until_running_in_cli_and_management(collector_agent: CollectorAgent, rest_collector: RestCollector,
+                                                 timeout_sec=MAX_WAIT_FOR_STATUS):
+        """ Both statuses are polled at the same time, so the wait is as long as the slower of them """
+        logger.info(f"Wait until {collector_agent} is running in CLI and in management")
+        conditions = [(collector_agent.is_agent_running, f"{collector_agent} is running"),
+                      (rest_collector.is_running, f"{rest_collector} is in 'running' state in management")]
+        common_utils.wait_for_conditions(conditions=conditions, timeout_sec=timeout_sec, **get_status_polling_kwargs())
+
 
 @contextmanager
 def revive_collector_agent_on_failure_context(tenant: Tenant, collector_agent: CollectorAgent, aggregator,
@@ -160,8 +171,8 @@ def start_collector_agent_if_is_down(tenant: Tenant, collector_agent: CollectorA
     if collector_agent.is_agent_down():
         logger.info(f"{collector_agent} is down, start it and validate")
         collector_agent.start_collector()
-        collector_agent.wait_until_agent_running()
-        rest_collector.wait_until_running()
+        CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector_agent,
+                                                                rest_collector=rest_collector)
     else:
         logger.info(f"{collector_agent} is not down, it is: {collector_agent.get_agent_status()}")
 
@@ -172,8 +183,8 @@ def enable_collector_agent_if_is_disabled(tenant: Tenant, collector_agent: Colle
     if collector_agent.is_agent_disabled():
         logger.info(f"{collector_agent} is disabled, enable it via management and validate")
         rest_collector.enable()
-        collector_agent.wait_until_agent_running()
-        rest_collector.wait_until_running()
+        CollectorUtils.wait_until_running_in_cli_and_management(collector_agent=collector_agent,
+                                                                rest_collector=rest_collector)
     else:
         logger.info(f"{collector_agent} is not disabled, it is: {collector_agent.get_agent_status()}")
 
@@ -60,10 +60,8 @@ def wait_until_content_file_appear_in_shared_folder(build_number_of_content_job_
 
     is_found = False
     while time.time() - start_time < timeout and not is_found:
-        result = FortiEdrVersionsServiceHandler.get_latest_content_files_from_shared_folder(
-            num_last_content_files=5)
         expected_file_name = f"FortiEDRCollectorContent-{build_number_of_content_job_in_jenkins}.nslo"
-        if expected_file_name in result:
+        if FortiEdrVersionsServiceHandler.is_content_file_exist_in_shared_folder(content_file_name=expected_file_name):
             is_found = True
             Reporter.report(f"{expected_file_name} is found in shared folder", logger_func=logger.info)
         else: